@@ -0,0 +1,28 @@
+"""
+Benchmark suite of hot kernels.
+
+Run all benchmarks (or --quick for the small grids) and save results of the current commit:
+    python -m benchmarks run --output results/bench_<commit>.json [--quick] [--names ...] [--groups ...]
+
+Groups: kernels (solver steps), scaling (threads), plots (frame rendering), io (track writers, snapshot writing,
+GIF/AVI encoding, pdf compilation); output-path cases report throughput in MB/s and frames/s.
+
+Compare results of two commits, the exit code is 1 if some benchmark became slower by more than threshold:
+    python -m benchmarks compare bench_old.json bench_new.json --threshold 0.1
+
+Error versus wall time and memory of the propagation on cases with analytic (or reference) solutions, the cheapest
+setting which meets the tolerance is printed for every case; accuracy_check fails if the error of some setting grew:
+    python -m benchmarks accuracy --output results/accuracy_<commit>.json [--quick] [--tolerance 1e-3]
+    python -m benchmarks accuracy_check accuracy_old.json accuracy_new.json --rtol 0.1
+
+Scan steps/second of the XY step versus FFTW and numba threads, --tune caches the best split for the machine,
+FourierDiffractionExecutorXY uses it by default:
+    python -m benchmarks scaling --n_x 2048 [--tune]
+
+List benchmarks and their parameters:
+    python -m benchmarks list
+"""
+
+from .suite import REGISTRY, Benchmark, BenchmarkSuite, benchmark, make_key, compare, format_comparison, \
+    save_results, load_results
+from . import kernels, outputs
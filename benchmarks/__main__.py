@@ -0,0 +1,147 @@
+import argparse
+import os
+import sys
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from benchmarks import REGISTRY, BenchmarkSuite, compare, format_comparison, save_results, load_results
+
+
+def parse_filters(items):
+    """Converts list of param=value1,value2 to dict of lists"""
+
+    filters = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if not values:
+            raise Exception('Wrong filter "%s"!' % item)
+        filters[name] = values.split(',')
+
+    return filters
+
+
+# parse args from command line
+parser = argparse.ArgumentParser(prog='python -m benchmarks')
+subparsers = parser.add_subparsers(dest='command', required=True)
+
+parser_run = subparsers.add_parser('run', help='run benchmarks and save results to json')
+parser_run.add_argument('--output', required=True)
+parser_run.add_argument('--names', nargs='+', default=None)
+parser_run.add_argument('--groups', nargs='+', default=None)
+parser_run.add_argument('--where', nargs='+', default=[], help='parameter filters, e.g. n_xy=512,1024 precision=single')
+parser_run.add_argument('--quick', action='store_true')
+parser_run.add_argument('--warmup', type=int, default=2)
+parser_run.add_argument('--repeat', type=int, default=5)
+parser_run.add_argument('--min_time', type=float, default=0.2)
+
+parser_compare = subparsers.add_parser('compare', help='compare results of two commits')
+parser_compare.add_argument('baseline')
+parser_compare.add_argument('current')
+parser_compare.add_argument('--threshold', type=float, default=0.1)
+parser_compare.add_argument('--statistic', default='min', choices=['min', 'median', 'mean'])
+
+subparsers.add_parser('list', help='list benchmarks')
+
+parser_accuracy = subparsers.add_parser('accuracy', help='error versus wall time and memory on analytic cases')
+parser_accuracy.add_argument('--output', default=None)
+parser_accuracy.add_argument('--cases', nargs='+', default=None)
+parser_accuracy.add_argument('--quick', action='store_true')
+parser_accuracy.add_argument('--tolerance', type=float, default=10**-3, help='tolerance of the cheapest setting')
+parser_accuracy.add_argument('--error', default='error_l2', choices=['error_l2', 'error_max'])
+parser_accuracy.add_argument('--cost', default='wall_time', choices=['wall_time', 'time_per_step', 'memory'])
+parser_accuracy.add_argument('--no_memory', action='store_true', help='do not measure peak memory')
+parser_accuracy.add_argument('--precision', default='mixed', choices=['single', 'mixed', 'double'])
+
+parser_accuracy_check = subparsers.add_parser('accuracy_check', help='check accuracy loss against baseline')
+parser_accuracy_check.add_argument('baseline')
+parser_accuracy_check.add_argument('current')
+parser_accuracy_check.add_argument('--rtol', type=float, default=0.1)
+parser_accuracy_check.add_argument('--error', default='error_l2', choices=['error_l2', 'error_max'])
+
+parser_scaling = subparsers.add_parser('scaling', help='steps/second of the XY step versus FFTW and numba threads')
+parser_scaling.add_argument('--n_x', type=int, required=True)
+parser_scaling.add_argument('--n_y', type=int, default=None)
+parser_scaling.add_argument('--dtype', default='complex64')
+parser_scaling.add_argument('--fftw_threads', type=int, nargs='+', default=None)
+parser_scaling.add_argument('--numba_threads', type=int, nargs='+', default=None)
+parser_scaling.add_argument('--n_steps', type=int, default=5)
+parser_scaling.add_argument('--tune', action='store_true', help='cache the best split for the machine')
+
+args = parser.parse_args()
+
+if args.command == 'run':
+    suite = BenchmarkSuite(names=args.names,
+                           groups=args.groups,
+                           filters=parse_filters(args.where),
+                           quick=args.quick,
+                           warmup=args.warmup,
+                           repeat=args.repeat,
+                           min_time=args.min_time)
+    results = suite.run()
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    save_results(results, args.output)
+
+elif args.command == 'compare':
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    rows = compare(baseline, current, threshold=args.threshold, statistic=args.statistic)
+    print(format_comparison(rows, baseline, current))
+    sys.exit(1 if any(row['status'] == 'regression' for row in rows) else 0)
+
+elif args.command == 'accuracy':
+    from benchmarks.accuracy import CASES, AccuracyHarness, cheapest
+
+    if args.cost == 'memory' and args.no_memory:
+        raise Exception('Wrong cost: memory is not measured!')
+
+    harness = AccuracyHarness(cases=args.cases or sorted(CASES), quick=args.quick, measure_memory=not args.no_memory,
+                              precision=args.precision)
+    results = harness.run()
+    if args.output:
+        output_dir = os.path.dirname(os.path.abspath(args.output))
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        save_results(results, args.output)
+
+    print('\ncheapest settings with %s <= %.1e by %s:' % (args.error, args.tolerance, args.cost))
+    for name, result in cheapest(results, args.tolerance, args.error, args.cost).items():
+        if result is None:
+            print('%-16s no setting meets the tolerance' % name)
+        else:
+            print('%-16s n = %5d, radii_in_grid = %3d, n_z = %5d: %s = %.3e, %s = %s' %
+                  (name, result['setting']['n'], result['setting']['radii_in_grid'], result['setting']['n_z'],
+                   args.error, result[args.error], args.cost, result[args.cost]))
+
+elif args.command == 'accuracy_check':
+    from benchmarks.accuracy import check_accuracy
+
+    losses = check_accuracy(load_results(args.baseline), load_results(args.current), rtol=args.rtol,
+                            error=args.error)
+    for loss in losses:
+        print('ACCURACY LOSS %-16s %s: %.3e -> %.3e' % (loss['case'], loss['setting'], loss['baseline'],
+                                                        loss['current']))
+    print('%d accuracy losses' % len(losses))
+    sys.exit(1 if losses else 0)
+
+elif args.command == 'scaling':
+    from core.threads import ThreadTuner, CACHE_PATH
+
+    kwargs = {'n_x': args.n_x, 'n_y': args.n_y or args.n_x, 'dtype': args.dtype, 'n_steps': args.n_steps}
+    if args.fftw_threads:
+        kwargs['fftw_threads'] = args.fftw_threads
+    if args.numba_threads:
+        kwargs['numba_threads'] = args.numba_threads
+    tuner = ThreadTuner(**kwargs)
+
+    if args.tune:
+        best = tuner.tune()
+        print('best: fftw_threads = %d, numba_threads = %d, %.3f steps/s, saved to %s' %
+              (best['fftw_threads'], best['numba_threads'], best['steps_per_second'], CACHE_PATH))
+    else:
+        tuner.scan()
+
+elif args.command == 'list':
+    for name in sorted(REGISTRY):
+        bench = REGISTRY[name]
+        print('%-30s %-10s %s' % (name, bench.group, bench.combinations()))
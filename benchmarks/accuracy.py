@@ -0,0 +1,294 @@
+"""
+Accuracy versus cost of the propagation: every case (linear diffraction of Gaussian and Laguerre-Gaussian vortex
+beams, low-power Kerr self-focusing) is run for the grid of settings (number of points, radii in grid, number of
+steps along z), the error against the reference solution is reported together with wall time and memory.
+
+Linear cases are compared with the analytic solution of the paraxial equation of the repo, -2 i k_0 dA/dz + Delta A = 0:
+
+LATEX SYNTAX:
+A(r, \varphi, z) = \frac{(r / r_0)^{|m|} e^{i m \varphi}}{q^{|m| + 1}} \exp\biggl(-\frac{r^2}{2 r_0^2 q}\biggr),
+\quad q = 1 - i z / z_{diff}, \quad z_{diff} = k_0 r_0^2
+
+Kerr cases have no analytic solution, they are compared with the run on the reference (the finest) setting,
+which is interpolated to the grid of every setting.
+"""
+
+from time import perf_counter
+import json
+import tracemalloc
+
+from numpy import array, exp, pi, sqrt, arctan2, meshgrid, interp, abs as np_abs, sum as np_sum, complex128
+from scipy.interpolate import RegularGridInterpolator
+from scipy.special import gamma
+
+from core import BeamR, BeamXY, SweepDiffractionExecutorR, FourierDiffractionExecutorXY, KerrExecutorR, \
+    KerrExecutorXY
+
+
+CASES = {
+    'gauss_r': {'geometry': 'r', 'm': 0, 'p_0_to_p': 0.0, 'z': 1.0},
+    'vortex_r': {'geometry': 'r', 'm': 1, 'p_0_to_p': 0.0, 'z': 1.0},
+    'kerr_gauss_r': {'geometry': 'r', 'm': 0, 'p_0_to_p': 0.3, 'z': 0.5},
+    'kerr_vortex_r': {'geometry': 'r', 'm': 1, 'p_0_to_p': 0.3, 'z': 0.5},
+    'gauss_xy': {'geometry': 'xy', 'm': 0, 'p_0_to_p': 0.0, 'z': 1.0},
+    'vortex_xy': {'geometry': 'xy', 'm': 1, 'p_0_to_p': 0.0, 'z': 1.0},
+    'kerr_vortex_xy': {'geometry': 'xy', 'm': 1, 'p_0_to_p': 0.3, 'z': 0.5},
+}  # cases: topological charge, power in critical powers (0 for linear diffraction), distance in z_diff
+
+SETTINGS = {
+    'r': {'n': [256, 512, 1024, 2048, 4096], 'radii_in_grid': [10, 20, 40], 'n_z': [50, 100, 200, 400]},
+    'xy': {'n': [128, 256, 512, 1024], 'radii_in_grid': [8, 12, 16], 'n_z': [10, 50, 100]},
+}  # grids of settings: number of points along r (along x and y), radii in grid, number of steps along z
+
+QUICK_SETTINGS = {
+    'r': {'n': [512, 2048], 'radii_in_grid': [10, 20], 'n_z': [50, 200]},
+    'xy': {'n': [128, 256], 'radii_in_grid': [8, 16], 'n_z': [10, 50]},
+}
+
+REFERENCE_SETTINGS = {
+    'r': {'n': 8192, 'radii_in_grid': 40, 'n_z': 1600},
+    'xy': {'n': 1024, 'radii_in_grid': 16, 'n_z': 400},
+}  # reference settings for the cases without analytic solution
+
+
+def analytic_field(r, phi, m, r_0, z, z_diff):
+    """
+    :param r: radial coordinate (array)
+    :param phi: azimuthal angle (array of the same shape)
+    :param m: topological charge, the initial condition is (r / r_0)^|m| exp(i m phi - r^2 / 2 r_0^2)
+    :param r_0: characteristic spatial size
+    :param z: evolutionary coordinate
+    :param z_diff: diffraction length k_0 r_0^2
+
+    :return: complex field of the linear diffraction
+    """
+    q = 1 - 1j * z / z_diff
+    return (r / r_0)**abs(m) * exp(1j * m * phi) / q**(abs(m) + 1) * exp(-r**2 / (2 * r_0**2 * q))
+
+
+def make_beam(geometry, m, p_0_to_p, n, radii_in_grid, r_0=100 * 10**-6, precision='mixed'):
+    """
+    Creates the beam with the Laguerre-Gaussian initial condition (r / r_0)^|m| exp(i m phi - r^2 / 2 r_0^2)
+    on the grid of the setting, I_0 and r_kerr are consistent with the initial condition
+
+    :return: beam, grid coordinates (r, phi) of the field
+    """
+
+    if geometry == 'r':
+        beam = BeamR(medium='SiO2', p_0_to_p_gauss=p_0_to_p or 1.0, p_0_to_p_vortex=p_0_to_p or 1.0, m=m, M=abs(m),
+                     lmbda=800 * 10**-9, r_0=r_0, radii_in_grid=radii_in_grid, n_r=n, precision=precision)
+        r, phi = array(beam.rs), 0.0
+    elif geometry == 'xy':
+        beam = BeamXY(medium='SiO2', p_0_to_p_gauss=p_0_to_p or 1.0, p_0_to_p_vortex=p_0_to_p or 1.0, m=m, M=abs(m),
+                      lmbda=800 * 10**-9, x_0=r_0, y_0=r_0, radii_in_grid=radii_in_grid, n_x=n, n_y=n,
+                      precision=precision)
+        x, y = meshgrid(array(beam.xs), array(beam.ys), indexing='ij')
+        r, phi = sqrt(x**2 + y**2), arctan2(y, x)
+    else:
+        raise Exception('Wrong geometry!')
+
+    beam._field = analytic_field(r, phi, m, r_0, 0.0, beam.z_diff).astype(beam.precision.complex_dtype)
+    beam._i_0 = beam.p_0 / (pi * r_0**2 * gamma(abs(m) + 1))
+    beam._r_kerr = 2 * beam.medium.k_0 * beam.medium.n_2 * beam._i_0 * beam.z_diff / beam.medium.n_0
+    beam.update_intensity()
+
+    return beam, r, phi
+
+
+def propagate(beam, kerr, z, n_z):
+    """
+    Propagates the beam to z with n_z constant steps (Lie splitting as in Propagator)
+
+    :return: wall time of the propagation, [s]
+    """
+
+    if beam.info == 'beam_r':
+        diffraction = SweepDiffractionExecutorR(beam=beam)
+        kerr_effect = KerrExecutorR(beam=beam) if kerr else None
+    else:
+        diffraction = FourierDiffractionExecutorXY(beam=beam)
+        kerr_effect = KerrExecutorXY(beam=beam) if kerr else None
+
+    dz = z / n_z
+    t_start = perf_counter()
+    for _ in range(n_z):
+        diffraction.process_diffraction(dz)
+        if kerr_effect:
+            kerr_effect.process_kerr_effect(dz)
+        beam.update_intensity()
+
+    return perf_counter() - t_start
+
+
+def relative_errors(field, reference, weights=1.0):
+    """
+    :param field: computed field
+    :param reference: reference field on the same grid
+    :param weights: weights of the grid nodes (r for the axisymmetric beam)
+
+    :return: relative L2 error and relative maximal error of the field
+    """
+    diff = np_abs(field.astype(complex128) - reference)
+    l2 = sqrt(np_sum(weights * diff**2) / np_sum(weights * np_abs(reference)**2))
+    return float(l2), float(diff.max() / np_abs(reference).max())
+
+
+class AccuracyHarness:
+    """
+    Class for running the cases on the grid of settings. Every result contains the errors of the field against the
+    reference solution at the end of the propagation, wall time of the propagation and peak memory (traced by
+    tracemalloc, numpy and pyfftw buffers included) of creating and propagating the beam.
+    """
+
+    def __init__(self, **kwargs):
+        self.__cases = kwargs.get('cases', sorted(CASES))  # names of cases
+        self.__quick = kwargs.get('quick', False)  # use QUICK_SETTINGS
+        self.__settings = kwargs.get('settings', QUICK_SETTINGS if self.__quick else SETTINGS)
+        self.__reference_settings = kwargs.get('reference_settings', REFERENCE_SETTINGS)
+        self.__measure_memory = kwargs.get('measure_memory', True)  # run every setting once more under tracemalloc
+        self.__verbose = kwargs.get('verbose', True)
+        self.__precision = kwargs.get('precision', 'mixed')  # precision policy of the beams, references are double
+
+        for name in self.__cases:
+            if name not in CASES:
+                raise Exception('Wrong case "%s"!' % name)
+
+        self.__references = {}  # reference fields of Kerr cases
+        self.__compiled = set()  # geometries and Kerr flags for which JIT kernels are compiled
+
+    def settings(self, geometry):
+        grid = self.__settings[geometry]
+        return [{'n': n, 'radii_in_grid': radii_in_grid, 'n_z': n_z} for n in grid['n']
+                for radii_in_grid in grid['radii_in_grid'] for n_z in grid['n_z']]
+
+    def __reference(self, name, beam, r, phi):
+        """Reference field of the case on the grid of the beam"""
+
+        case = CASES[name]
+        if not case['p_0_to_p']:
+            return analytic_field(r, phi, case['m'], beam.r_0 if case['geometry'] == 'r' else beam.x_0,
+                                  case['z'] * beam.z_diff, beam.z_diff)
+
+        if name not in self.__references:
+            setting = self.__reference_settings[case['geometry']]
+            ref_beam, _, _ = make_beam(case['geometry'], case['m'], case['p_0_to_p'], setting['n'],
+                                       setting['radii_in_grid'], precision='double')
+            propagate(ref_beam, True, case['z'] * ref_beam.z_diff, setting['n_z'])
+            if case['geometry'] == 'r':
+                self.__references[name] = (array(ref_beam.rs), ref_beam._field.copy())
+            else:
+                self.__references[name] = (array(ref_beam.xs), array(ref_beam.ys), ref_beam._field.copy())
+
+        if case['geometry'] == 'r':
+            rs, field = self.__references[name]
+            return interp(r, rs, field.real) + 1j * interp(r, rs, field.imag)
+
+        xs, ys, field = self.__references[name]
+        x, y = meshgrid(array(beam.xs), array(beam.ys), indexing='ij')
+        return RegularGridInterpolator((xs, ys), field, bounds_error=False, fill_value=0.0)((x, y))
+
+    def __peak_memory(self, case, setting):
+        """Peak traced memory of creating the beam and of two steps, [bytes]"""
+
+        tracemalloc.start()
+        try:
+            beam, _, _ = make_beam(case['geometry'], case['m'], case['p_0_to_p'], setting['n'],
+                                   setting['radii_in_grid'], precision=self.__precision)
+            propagate(beam, case['p_0_to_p'] > 0, 2 * case['z'] * beam.z_diff / setting['n_z'], 2)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def run_one(self, name, setting):
+        """
+        :param name: name of case
+        :param setting: dict with n, radii_in_grid, n_z
+
+        :return: dict with case, setting, errors, wall time and memory
+        """
+
+        case = CASES[name]
+
+        # JIT compilation is excluded from wall time by a short run on the small grid
+        if (case['geometry'], case['p_0_to_p'] > 0) not in self.__compiled:
+            beam, _, _ = make_beam(case['geometry'], case['m'], case['p_0_to_p'], 64, setting['radii_in_grid'],
+                                   precision=self.__precision)
+            propagate(beam, case['p_0_to_p'] > 0, beam.z_diff / 100, 1)
+            self.__compiled.add((case['geometry'], case['p_0_to_p'] > 0))
+
+        beam, r, phi = make_beam(case['geometry'], case['m'], case['p_0_to_p'], setting['n'],
+                                 setting['radii_in_grid'], precision=self.__precision)
+        wall_time = propagate(beam, case['p_0_to_p'] > 0, case['z'] * beam.z_diff, setting['n_z'])
+
+        reference = self.__reference(name, beam, r, phi)
+        error_l2, error_max = relative_errors(beam._field, reference, r if case['geometry'] == 'r' else 1.0)
+
+        result = {'case': name,
+                  'geometry': case['geometry'],
+                  'setting': setting,
+                  'precision': self.__precision,
+                  'error_l2': error_l2,
+                  'error_max': error_max,
+                  'wall_time': wall_time,
+                  'time_per_step': wall_time / setting['n_z'],
+                  'memory': self.__peak_memory(case, setting) if self.__measure_memory else None}
+
+        if self.__verbose:
+            print('%-16s n = %5d, radii_in_grid = %3d, n_z = %5d: error_l2 = %.3e, error_max = %.3e, '
+                  'time = %.3f s, memory = %s' % (name, setting['n'], setting['radii_in_grid'], setting['n_z'],
+                                                  error_l2, error_max, wall_time,
+                                                  '%.1f MB' % (result['memory'] / 2**20)
+                                                  if result['memory'] is not None else '--'), flush=True)
+
+        return result
+
+    def run(self):
+        """
+        :return: list of results of all cases and settings
+        """
+
+        return [self.run_one(name, setting) for name in self.__cases
+                for setting in self.settings(CASES[name]['geometry'])]
+
+
+def cheapest(results, tolerance, error='error_l2', cost='wall_time'):
+    """
+    :param results: results of AccuracyHarness.run
+    :param tolerance: maximal error
+    :param error: error_l2 or error_max
+    :param cost: wall_time, time_per_step or memory
+
+    :return: dict case -> the cheapest result which meets the tolerance (None if no setting meets it)
+    """
+
+    best = {}
+    for result in results:
+        best.setdefault(result['case'], None)
+        if result[error] <= tolerance and (best[result['case']] is None or
+                                           result[cost] < best[result['case']][cost]):
+            best[result['case']] = result
+
+    return best
+
+
+def check_accuracy(baseline, current, rtol=0.1, atol=10**-6, error='error_l2'):
+    """
+    Guards optimisations against accuracy loss: every common (case, setting) of current results must not have
+    the error greater than the baseline one by more than rtol (errors below atol are not compared)
+
+    :return: list of dicts (case, setting, baseline, current) of results with accuracy loss
+    """
+
+    def key(result):
+        return result['case'], json.dumps(result['setting'], sort_keys=True)
+
+    base = {key(e): e for e in baseline}
+    losses = []
+    for result in current:
+        if key(result) in base:
+            before, after = base[key(result)][error], result[error]
+            if after > max(before * (1 + rtol), atol):
+                losses.append({'case': result['case'], 'setting': result['setting'], 'baseline': before,
+                               'current': after})
+
+    return losses
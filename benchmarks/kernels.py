@@ -0,0 +1,159 @@
+from tempfile import mkdtemp
+
+from core import BeamR, BeamXY, SweepDiffractionExecutorR, FourierDiffractionExecutorXY, KerrExecutorR, \
+    KerrExecutorXY, VisualizerR, VisualizerXY
+from core.functions import r_to_xy_real, r_to_xy_complex
+from core.threads import available_cpus, set_numba_threads
+from core.spectrum import SpectrumR, SpectrumXY
+
+from .suite import benchmark
+
+
+N_RS = [1024, 2048, 4096, 8192, 16384]
+N_XYS = [512, 1024, 2048, 4096, 8192]
+PRECISIONS = ['single', 'mixed', 'double']
+THREADS = sorted({e for e in (1, 2, 4, 8, 16) if e <= available_cpus()} | {available_cpus()})
+
+
+def make_beam_r(n_r, precision='mixed'):
+    return BeamR(medium='SiO2',
+                 p_0_to_p_vortex=1,
+                 m=1,
+                 M=1,
+                 lmbda=800 * 10**-9,
+                 r_0=100 * 10**-6,
+                 radii_in_grid=20,
+                 n_r=n_r,
+                 precision=precision)
+
+
+def make_beam_xy(n_xy, precision='mixed'):
+    return BeamXY(medium='SiO2',
+                  p_0_to_p_vortex=1,
+                  m=1,
+                  M=1,
+                  lmbda=800 * 10**-9,
+                  x_0=100 * 10**-6,
+                  y_0=150 * 10**-6,
+                  radii_in_grid=10,
+                  n_x=n_xy,
+                  n_y=n_xy,
+                  precision=precision)
+
+
+@benchmark('sweep_diffraction_r', params={'n_r': N_RS, 'precision': PRECISIONS},
+           quick_params={'n_r': [1024, 4096], 'precision': ['mixed']})
+def sweep_diffraction_r(n_r, precision):
+    beam = make_beam_r(n_r, precision)
+    diffraction = SweepDiffractionExecutorR(beam=beam)
+    dz = beam.z_diff / 1000
+    return lambda: diffraction.process_diffraction(dz)
+
+
+@benchmark('fourier_diffraction_xy', params={'n_xy': N_XYS, 'precision': PRECISIONS},
+           quick_params={'n_xy': [512, 1024], 'precision': ['mixed']})
+def fourier_diffraction_xy(n_xy, precision):
+    beam = make_beam_xy(n_xy, precision)
+    diffraction = FourierDiffractionExecutorXY(beam=beam)
+    dz = beam.z_diff / 1000
+    return lambda: diffraction.process_diffraction(dz)
+
+
+@benchmark('kerr_effect_r', params={'n_r': N_RS, 'precision': PRECISIONS},
+           quick_params={'n_r': [1024, 4096], 'precision': ['mixed']})
+def kerr_effect_r(n_r, precision):
+    beam = make_beam_r(n_r, precision)
+    kerr_effect = KerrExecutorR(beam=beam)
+    dz = beam.z_diff / 1000
+    return lambda: kerr_effect.process_kerr_effect(dz)
+
+
+@benchmark('kerr_effect_xy', params={'n_xy': N_XYS, 'precision': PRECISIONS},
+           quick_params={'n_xy': [512, 1024], 'precision': ['mixed']})
+def kerr_effect_xy(n_xy, precision):
+    beam = make_beam_xy(n_xy, precision)
+    kerr_effect = KerrExecutorXY(beam=beam)
+    dz = beam.z_diff / 1000
+    return lambda: kerr_effect.process_kerr_effect(dz)
+
+
+@benchmark('update_intensity_r', params={'n_r': N_RS, 'precision': PRECISIONS},
+           quick_params={'n_r': [1024, 4096], 'precision': ['mixed']})
+def update_intensity_r(n_r, precision):
+    return make_beam_r(n_r, precision).update_intensity
+
+
+@benchmark('update_intensity_xy', params={'n_xy': N_XYS, 'precision': PRECISIONS},
+           quick_params={'n_xy': [512, 1024], 'precision': ['mixed']})
+def update_intensity_xy(n_xy, precision):
+    return make_beam_xy(n_xy, precision).update_intensity
+
+
+@benchmark('beam_init_r', params={'n_r': N_RS}, quick_params={'n_r': [1024]})
+def beam_init_r(n_r):
+    return lambda: make_beam_r(n_r)
+
+
+@benchmark('beam_init_xy', params={'n_xy': [512, 1024, 2048]}, quick_params={'n_xy': [512]})
+def beam_init_xy(n_xy):
+    return lambda: make_beam_xy(n_xy)
+
+
+@benchmark('r_to_xy_real', params={'n_r': [512, 1024, 2048, 4096]}, quick_params={'n_r': [512]})
+def r_to_xy_real_(n_r):
+    intensity = make_beam_r(n_r).intensity
+    return lambda: r_to_xy_real(intensity)
+
+
+@benchmark('r_to_xy_complex', params={'n_r': [512, 1024, 2048, 4096]}, quick_params={'n_r': [512]})
+def r_to_xy_complex_(n_r):
+    field = make_beam_r(n_r)._field
+    return lambda: r_to_xy_complex(field)
+
+
+@benchmark('spectrum_r_update', params={'n_r': [512, 1024, 2048]}, quick_params={'n_r': [512]})
+def spectrum_r_update(n_r):
+    return SpectrumR(beam=make_beam_r(n_r)).update_data
+
+
+@benchmark('spectrum_xy_update', params={'n_xy': [512, 1024, 2048, 4096]}, quick_params={'n_xy': [512]})
+def spectrum_xy_update(n_xy):
+    return SpectrumXY(beam=make_beam_xy(n_xy)).update_data
+
+
+@benchmark('xy_step_threads', params={'n_xy': [1024, 2048, 4096], 'fftw_threads': THREADS, 'numba_threads': THREADS},
+           quick_params={'n_xy': [1024], 'fftw_threads': [1, available_cpus()], 'numba_threads': [1, available_cpus()]},
+           group='scaling')
+def xy_step_threads(n_xy, fftw_threads, numba_threads):
+    beam = make_beam_xy(n_xy)
+    diffraction = FourierDiffractionExecutorXY(beam=beam, n_jobs=fftw_threads, numba_threads=numba_threads)
+    kerr_effect = KerrExecutorXY(beam=beam)
+    dz = beam.z_diff / 1000
+
+    def step():
+        set_numba_threads(numba_threads)  # other cases of the suite may change the number of numba threads
+        diffraction.process_diffraction(dz)
+        kerr_effect.process_kerr_effect(dz)
+        beam.update_intensity()
+
+    return step
+
+
+@benchmark('plot_pair_r', params={'n_r': [256, 1024]}, quick_params={'n_r': [256]}, group='plots')
+def plot_pair_r(n_r):
+    beam = make_beam_r(n_r)
+    visualizer = VisualizerR(beam=beam,
+                             remaining_central_part_coeff_field=0.2,
+                             remaining_central_part_coeff_spectrum=0.2)
+    visualizer.get_path_to_save(mkdtemp(prefix='benchmark_'))
+    return (lambda: visualizer.plot_pair(beam, 0.0, 0)), {'frames': 1}
+
+
+@benchmark('plot_pair_xy', params={'n_xy': [512, 2048]}, quick_params={'n_xy': [512]}, group='plots')
+def plot_pair_xy(n_xy):
+    beam = make_beam_xy(n_xy)
+    visualizer = VisualizerXY(beam=beam,
+                              remaining_central_part_coeff_field=0.2,
+                              remaining_central_part_coeff_spectrum=0.2)
+    visualizer.get_path_to_save(mkdtemp(prefix='benchmark_'))
+    return (lambda: visualizer.plot_pair(beam, 0.0, 0)), {'frames': 1}
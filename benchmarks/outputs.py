@@ -0,0 +1,134 @@
+from glob import glob
+from shutil import which
+from tempfile import mkdtemp
+import os
+
+import cv2
+from numpy import savez, array, linspace, random, roll
+
+from core import Logger, SnapshotWriter, VisualizerXY
+from core.functions import make_animation, make_video
+
+from .kernels import make_beam_r, make_beam_xy
+from .suite import benchmark
+
+
+N_ROWS = [1000, 10000, 50000]  # number of steps in the track
+N_FRAMES = [25, 100, 250]  # number of frames of animation and video
+TRACK_COLUMNS = ['z, m', 'dz, m', 'i_max / i_0', 'i_max, W / m^2', 'power, W', 'radius, m', 'r_peak, m',
+                 'i_axis, W / m^2']
+
+
+def megabytes(*paths):
+    return sum(os.path.getsize(path) for path in paths) / 10**6
+
+
+def make_states_arr(n_rows):
+    """States array of the track with realistic number of columns"""
+
+    states_arr = random.default_rng(0).random((n_rows, len(TRACK_COLUMNS)))
+    states_arr[:, 0] = linspace(0.0, 1.0, n_rows)
+    return states_arr
+
+
+def make_frames(n_frames, n_xy=512):
+    """
+    Renders one frame of plot_pair and saves its shifted copies as series of pictures
+
+    :return: root directory and name of directory with pictures
+    """
+
+    root_dir = mkdtemp(prefix='benchmark_')
+    images_dir = root_dir + '/images'
+    os.makedirs(images_dir)
+
+    beam = make_beam_xy(n_xy)
+    visualizer = VisualizerXY(beam=beam,
+                              remaining_central_part_coeff_field=0.2,
+                              remaining_central_part_coeff_spectrum=0.2)
+    visualizer.get_path_to_save(images_dir)
+    visualizer.plot_pair(beam, 0.0, 0)
+
+    frame = cv2.imread(images_dir + '/0000.png', cv2.IMREAD_UNCHANGED)
+    for step in range(1, n_frames):
+        cv2.imwrite(images_dir + '/%04d.png' % step, roll(frame, 4 * step, axis=1))
+
+    return root_dir, 'images'
+
+
+@benchmark('log_track', params={'n_rows': N_ROWS}, quick_params={'n_rows': [1000]}, group='io')
+def log_track(n_rows):
+    path = mkdtemp(prefix='benchmark_')
+    logger = Logger(path=path, diffraction=None, kerr_effect=None)
+    states_arr = make_states_arr(n_rows)
+
+    events = [(n_rows // 2, 0.5, 'threshold', 'stop')]
+    func = lambda: logger.log_track(states_arr, TRACK_COLUMNS, events)
+
+    return func, lambda: {'MB': megabytes(logger.track_filename, logger.track_binary_filename), 'rows': n_rows}
+
+
+@benchmark('track_npz', params={'n_rows': N_ROWS}, quick_params={'n_rows': [1000]}, group='io')
+def track_npz(n_rows):
+    path = mkdtemp(prefix='benchmark_') + '/propagation.npz'
+    states_arr = make_states_arr(n_rows)
+
+    func = lambda: savez(path, states=states_arr, columns=array(TRACK_COLUMNS))
+
+    return func, lambda: {'MB': megabytes(path), 'rows': n_rows}
+
+
+@benchmark('snapshot_write_r', params={'n_r': [2048, 8192], 'codec': ['zlib', 'lzma']},
+           quick_params={'n_r': [2048], 'codec': ['zlib']}, group='io')
+def snapshot_write_r(n_r, codec):
+    beam = make_beam_r(n_r)
+    writer = SnapshotWriter(beam=beam, codec=codec)
+    writer.open(mkdtemp(prefix='benchmark_') + '/snapshots.vsnap')
+    steps = iter(range(10**9))
+
+    return lambda: writer.write(beam, 0.0, next(steps)), {'MB': beam._field.nbytes / 10**6, 'snapshots': 1}
+
+
+@benchmark('snapshot_write_xy', params={'n_xy': [512, 1024, 2048], 'codec': ['zlib', 'lzma'],
+                                        'quantities': ['intensity+phase', 'field']},
+           quick_params={'n_xy': [512], 'codec': ['zlib'], 'quantities': ['intensity+phase']}, group='io')
+def snapshot_write_xy(n_xy, codec, quantities):
+    beam = make_beam_xy(n_xy)
+    writer = SnapshotWriter(beam=beam, codec=codec, quantities=tuple(quantities.split('+')))
+    writer.open(mkdtemp(prefix='benchmark_') + '/snapshots.vsnap')
+    steps = iter(range(10**9))
+
+    return lambda: writer.write(beam, 0.0, next(steps)), {'MB': beam._field.nbytes / 10**6, 'snapshots': 1}
+
+
+@benchmark('make_animation', params={'n_frames': N_FRAMES}, quick_params={'n_frames': [25]}, group='io')
+def make_animation_(n_frames):
+    root_dir, images_dir = make_frames(n_frames)
+    pictures = sorted(glob(root_dir + '/' + images_dir + '/*'))
+
+    func = lambda: make_animation(root_dir, 'animation', images_dir)
+
+    return func, lambda: {'MB': megabytes(*pictures), 'frames': n_frames}
+
+
+@benchmark('make_video', params={'n_frames': N_FRAMES}, quick_params={'n_frames': [25]}, group='io')
+def make_video_(n_frames):
+    root_dir, images_dir = make_frames(n_frames)
+    pictures = sorted(glob(root_dir + '/' + images_dir + '/*'))
+
+    func = lambda: make_video(root_dir, 'video', images_dir)
+
+    return func, lambda: {'MB': megabytes(*pictures), 'frames': n_frames}
+
+
+@benchmark('save_initial_parameters', group='io')
+def save_initial_parameters():
+    if which('pdflatex') is None:
+        return None
+
+    logger = Logger(path=mkdtemp(prefix='benchmark_'), diffraction=None, kerr_effect=None)
+    beam = make_beam_r(256)
+
+    func = lambda: logger.save_initial_parameters(beam, 1000, beam.z_diff / 1000, 10**17)
+
+    return func, {'documents': 1}
@@ -0,0 +1,275 @@
+from datetime import datetime
+from itertools import product
+from multiprocessing import cpu_count
+from statistics import median, mean, stdev
+from time import perf_counter
+import json
+import os
+import platform
+import subprocess
+
+
+REGISTRY = {}  # registered benchmarks by name
+
+
+class Benchmark:
+    """
+    Class for a benchmark case. setup(**params) prepares the objects for the combination of parameters and returns
+    the function without arguments which is timed. Parameters are given as dict of lists, the case is run for all
+    their combinations; quick_params is the smaller grid for fast runs.
+
+    Output-path cases may return (function, work), where work is a dict of amounts processed by one call,
+    e.g. {'MB': 12.5, 'frames': 100}, or a function which returns such dict after timing (sizes of written files);
+    results then contain throughput in units per second. Setup returns None if the case can not run here
+    (e.g. external tool is not installed), the case is skipped.
+    """
+
+    def __init__(self, **kwargs):
+        self.__name = kwargs['name']  # name of benchmark
+        self.__setup = kwargs['setup']  # function which returns the timed function
+        self.__params = kwargs.get('params', {})  # dict of lists of parameter values
+        self.__quick_params = kwargs.get('quick_params', self.__params)  # parameters for quick runs
+        self.__group = kwargs.get('group', 'kernels')  # group of benchmarks
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def group(self):
+        return self.__group
+
+    @staticmethod
+    def __combinations(params):
+        names = list(params)
+        for values in product(*[params[name] for name in names]):
+            yield dict(zip(names, values))
+
+    def combinations(self, quick=False):
+        return list(self.__combinations(self.__quick_params if quick else self.__params))
+
+    def setup(self, **params):
+        return self.__setup(**params)
+
+
+def benchmark(name, params=None, quick_params=None, group='kernels'):
+    """Decorator which registers setup function of the benchmark"""
+
+    def decorator(setup):
+        REGISTRY[name] = Benchmark(name=name, setup=setup, params=params or {},
+                                   quick_params=quick_params if quick_params is not None else params or {},
+                                   group=group)
+        return setup
+
+    return decorator
+
+
+def make_key(name, params):
+    """Unique key of the benchmark result: name[param_1=value_1,...]"""
+    return '%s[%s]' % (name, ','.join('%s=%s' % (k, v) for k, v in params.items()))
+
+
+def git_commit(path='.'):
+    """
+    :return: hash of HEAD commit and True if the working tree has changes, (None, None) outside of git
+    """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=path, stderr=subprocess.DEVNULL).decode()
+        status = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=path,
+                                         stderr=subprocess.DEVNULL).decode()
+        return commit.strip(), bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def environment():
+    """Versions and hardware the results were obtained with"""
+
+    import numba
+    import numpy
+    import pyfftw
+
+    commit, dirty = git_commit(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    return {'commit': commit,
+            'dirty': dirty,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'numba': numba.__version__,
+            'pyfftw': pyfftw.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': cpu_count()}
+
+
+class BenchmarkSuite:
+    """
+    Class for running registered benchmarks. Every timed function is called warmup times before timing, so
+    JIT compilation, FFTW planning and allocation of workspace buffers are excluded. Then it is timed repeat times,
+    every time for number calls, number is chosen so one timing lasts at least min_time seconds.
+    """
+
+    def __init__(self, **kwargs):
+        self.__names = kwargs.get('names', None)  # names of benchmarks (all registered by default)
+        self.__groups = kwargs.get('groups', None)  # groups of benchmarks (all groups by default)
+        self.__quick = kwargs.get('quick', False)  # use quick_params
+        self.__filters = kwargs.get('filters', {})  # run only combinations with these parameter values
+
+        self.__warmup = kwargs.get('warmup', 2)  # number of calls before timing
+        self.__repeat = kwargs.get('repeat', 5)  # number of timings
+        self.__min_time = kwargs.get('min_time', 0.2)  # minimal duration of one timing, [s]
+        self.__verbose = kwargs.get('verbose', True)  # print results during run
+
+    def benchmarks(self):
+        names = self.__names or sorted(REGISTRY)
+        for name in names:
+            if name not in REGISTRY:
+                raise Exception('Wrong benchmark "%s"!' % name)
+
+        return [REGISTRY[name] for name in names if self.__groups is None or REGISTRY[name].group in self.__groups]
+
+    def __selected(self, params):
+        return all(str(params[k]) in [str(e) for e in v] for k, v in self.__filters.items() if k in params)
+
+    def __time(self, func):
+        for _ in range(self.__warmup):
+            func()
+
+        t_start = perf_counter()
+        func()
+        t_single = perf_counter() - t_start
+        number = max(1, int(self.__min_time / max(t_single, 10**-9)))
+
+        times = []
+        for _ in range(self.__repeat):
+            t_start = perf_counter()
+            for _ in range(number):
+                func()
+            times.append((perf_counter() - t_start) / number)
+
+        return number, times
+
+    def run_one(self, bench, params):
+        """
+        :return: dict with timings of the benchmark for the combination of parameters, times are per call, [s]
+        """
+
+        func = bench.setup(**params)
+        if func is None:
+            if self.__verbose:
+                print('%-70s skipped' % make_key(bench.name, params), flush=True)
+            return None
+
+        func, work = func if isinstance(func, tuple) else (func, None)
+        number, times = self.__time(func)
+
+        result = {'name': bench.name,
+                  'group': bench.group,
+                  'key': make_key(bench.name, params),
+                  'params': params,
+                  'number': number,
+                  'repeat': self.__repeat,
+                  'times': times,
+                  'min': min(times),
+                  'median': median(times),
+                  'mean': mean(times),
+                  'stdev': stdev(times) if len(times) > 1 else 0.0}
+
+        if work is not None:
+            work = work() if callable(work) else work
+            result['work'] = work
+            result['throughput'] = {'%s/s' % unit: amount / result['min'] for unit, amount in work.items()}
+
+        if self.__verbose:
+            print('%-70s %12.6f s  (median %.6f s, %d x %d)%s' % (
+                result['key'], result['min'], result['median'], self.__repeat, number,
+                ''.join('  %.2f %s' % (v, k) for k, v in result.get('throughput', {}).items())), flush=True)
+
+        return result
+
+    def run(self):
+        """
+        :return: dict with environment and list of results
+        """
+
+        results = []
+        for bench in self.benchmarks():
+            for params in bench.combinations(self.__quick):
+                if self.__selected(params):
+                    result = self.run_one(bench, params)
+                    if result is not None:
+                        results.append(result)
+
+        return {'environment': environment(), 'results': results}
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=4)
+
+
+def load_results(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.1, statistic='min'):
+    """
+    Compares two results of BenchmarkSuite.run
+
+    :param baseline: results of the base commit
+    :param current: results of the new commit
+    :param threshold: relative slowdown which is considered as a regression
+    :param statistic: min, median or mean
+
+    :return: list of dicts (key, baseline, current, ratio, status), status is regression, improvement, ok,
+             new or missing
+    """
+
+    if statistic not in ('min', 'median', 'mean'):
+        raise Exception('Wrong statistic!')
+
+    base = {e['key']: e for e in baseline['results']}
+    new = {e['key']: e for e in current['results']}
+
+    rows = []
+    for key in list(base) + [e for e in new if e not in base]:
+        if key not in new:
+            rows.append({'key': key, 'baseline': base[key][statistic], 'current': None, 'ratio': None,
+                         'status': 'missing'})
+        elif key not in base:
+            rows.append({'key': key, 'baseline': None, 'current': new[key][statistic], 'ratio': None,
+                         'status': 'new'})
+        else:
+            ratio = new[key][statistic] / base[key][statistic]
+            if ratio > 1 + threshold:
+                status = 'regression'
+            elif ratio < 1 / (1 + threshold):
+                status = 'improvement'
+            else:
+                status = 'ok'
+            rows.append({'key': key, 'baseline': base[key][statistic], 'current': new[key][statistic],
+                         'ratio': ratio, 'status': status})
+
+    return rows
+
+
+def format_comparison(rows, baseline=None, current=None):
+    """Table of comparison for printing"""
+
+    lines = []
+    if baseline is not None and current is not None:
+        lines.append('baseline: %s   current: %s' % (baseline['environment'].get('commit'),
+                                                     current['environment'].get('commit')))
+
+    lines.append('%-70s %12s %12s %8s  %s' % ('benchmark', 'baseline, s', 'current, s', 'ratio', 'status'))
+    for row in rows:
+        lines.append('%-70s %12s %12s %8s  %s' % (
+            row['key'],
+            '%.6f' % row['baseline'] if row['baseline'] is not None else '--',
+            '%.6f' % row['current'] if row['current'] is not None else '--',
+            '%.3f' % row['ratio'] if row['ratio'] is not None else '--',
+            row['status'].upper() if row['status'] == 'regression' else row['status']))
+
+    return '\n'.join(lines)
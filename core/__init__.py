@@ -1,12 +1,31 @@
 from .functions import calc_ticks_x, crop_x, linear_approximation_complex, linear_approximation_real, r_to_xy_real, \
     make_paths, create_dir, create_multidir, make_animation, make_video, compile_to_pdf, xlsx_to_df, \
-    calculate_p_gauss, calculate_p_vortex, parse_args, load_dirnames
-from .beam import BeamR, BeamXY
-from .diffraction import SweepDiffractionExecutorR, FourierDiffractionExecutorXY
-from .kerr_effect import KerrExecutorR, KerrExecutorXY
+    normalize_track_df, calculate_p_gauss, calculate_p_vortex, parse_args, load_dirnames
+from .beam import BeamR, BeamXY, BeamRT, BeamXYT
+from .cache import ResultCache
+from .catalog import Catalog
+from .diffraction import SweepDiffractionExecutorR, FourierDiffractionExecutorXY, SweepDiffractionExecutorRT, \
+    FourierDiffractionExecutorXYT, DistributedFourierDiffractionExecutorXY, OutOfCoreFourierDiffractionExecutorXY, \
+    SymmetricFourierDiffractionExecutorXY
+from .distributed import SlabPool
+from .drivers import CompiledDriverR
+from .events import ThresholdEvent, RelativeChangeEvent, StabilizationEvent
+from .integrators import RK4IPIntegrator
+from .kerr_effect import KerrExecutorR, KerrExecutorXY, KerrExecutorRT, KerrExecutorXYT, \
+    DistributedKerrExecutorXY, OutOfCoreKerrExecutorXY
 from .logger import Logger
 from .m_constants import MathConstants
 from .manager import Manager
-from .medium import Medium
+from .medium import Medium, MATERIALS, register_material
+from .observers import Observer, CallbackObserver, PrintObserver, PlotObserver, SnapshotObserver, \
+    CheckpointObserver, ProgressObserver, StepView, BeamView
+from .out_of_core import OutOfCorePool, TileStream
+from .precision import Precision, PRECISIONS
 from .propagation import Propagator
+from .threads import ThreadTuner, Concurrency, default_threads, auto_threads
+from .tracks import TrackLoader, read_track
+from .symmetry import Symmetry
+from .snapshot import SnapshotWriter, SnapshotReader
+from .rendering import SnapshotBeam, SnapshotRenderer
+from .workspace import Workspace, AllocationMonitor
 from .visualization import VisualizerR, VisualizerXY
@@ -1,2 +1,4 @@
 from .beam_r import BeamR
 from .beam_xy import BeamXY
+from .beam_rt import BeamRT
+from .beam_xyt import BeamXYT
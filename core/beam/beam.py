@@ -1,9 +1,11 @@
 from abc import ABCMeta, abstractmethod
-from numba import jit
-from numpy import max as maximum
+from numba import jit, prange, get_num_threads
+from numpy import float64
 
 from core.medium import Medium
 from core.m_constants import MathConstants
+from core.precision import Precision
+from core.workspace import Workspace
 
 
 class Beam(metaclass=ABCMeta):
@@ -15,6 +17,8 @@ class Beam(metaclass=ABCMeta):
     respectively on A_0 and I_0, where I_0 = c n_0 epsilon_0 |A_0|^2 / 2
     """
 
+    PARALLEL_MIN_SIZE = 2**16  # minimal number of grid points for numba parallel kernels
+
     def __init__(self, **kwargs):
         self.__m_constants = MathConstants()  # mathematical constants
         self._lmbda = kwargs['lmbda']  # beam wavelength, [m]
@@ -33,6 +37,8 @@ class Beam(metaclass=ABCMeta):
 
         self._radii_in_grid = kwargs.get('radii_in_grid', 20)  # grid_size / radius, [a.u.]
 
+        self._precision = Precision.make(kwargs.get('precision', None))  # precision policy: single, mixed or double
+
         self._field = None              # array for complex light field
         self._intensity = None          # array for float intensity of the field
         self._i_max = None              # peak beam intensity for z = const, [W/m^2]
@@ -42,13 +48,107 @@ class Beam(metaclass=ABCMeta):
         self._r_kerr = None             # nonlinearity parameter for Kerr effect, [rad]
                                         # r_kerr = 2 k_0 n_2 I_0 z_diff / n_0
 
+        self._slab_pool = None          # pool which owns slabs of the field if the beam is distributed
+                                        # (see SlabPool) or out of core (see OutOfCorePool)
+
+        self._workspace = Workspace()   # preallocated aligned buffers for in-place calculations
+
     @abstractmethod
     def info(self):
         """Beam type"""
 
+    @abstractmethod
+    def diagnostics_keys(self):
+        """Keys of reduced quantities which are recorded in the track"""
+
+    @abstractmethod
+    def diagnostics_columns(self):
+        """Track columns for diagnostics_keys"""
+
+    @abstractmethod
+    def reduced_quantities(self):
+        """
+        Cheap reduced quantities of the beam calculated in a single pass: power, [W], rms radius, [m],
+        centroid, [m], peak position, [m], and on-axis intensity, [W/m^2]
+        """
+
     def update_intensity(self):
-        self._intensity = self._field_to_intensity(self._field)
-        self._i_max = maximum(self._intensity) * self._i_0
+        if self._slab_pool is not None:
+            self._i_max = self._slab_pool.update_intensity() * self._i_0
+            return
+
+        self._intensity = self._workspace.buffer('intensity', self._field.shape, self._field.real.dtype)
+
+        field, intensity = self._field.reshape(-1), self._intensity.reshape(-1)
+        if field.shape[0] >= self.PARALLEL_MIN_SIZE:
+            i_max = self._update_intensity_parallel(field, intensity, self._chunk_maxima(), self._precision.tiny)
+        else:
+            i_max = self._update_intensity(field, intensity, self._precision.tiny)
+
+        self._i_max = i_max * self._i_0
+
+    def _chunk_maxima(self, name='maxima'):
+        """:return: preallocated array for maxima of chunks of _update_intensity_parallel, 4 chunks per thread"""
+        return self._workspace.buffer(name, (4 * get_num_threads(),), float64)
+
+    @staticmethod
+    @jit(nopython=True)
+    def _update_intensity(field, intensity, tiny):
+        """
+        Calculates intensity as a squared field norm in place and its maximum in the same pass
+
+        :param field: flat array for complex light field
+        :param intensity: flat array for float intensity of the field
+        :param tiny: intensities below tiny are flushed to zero (see Precision.tiny)
+
+        :return: maximum of intensity
+        """
+        i_max = 0.0
+        for i in range(field.shape[0]):
+            w = field[i].real**2 + field[i].imag**2
+            if w < tiny:
+                w = 0.0
+            intensity[i] = w
+            if w > i_max:
+                i_max = w
+
+        return i_max
+
+    @staticmethod
+    @jit(nopython=True, parallel=True)
+    def _update_intensity_parallel(field, intensity, maxima, tiny):
+        """
+        Parallel version of _update_intensity, every thread processes its chunks of the arrays
+
+        :param field: flat array for complex light field
+        :param intensity: flat array for float intensity of the field
+        :param maxima: preallocated array for maxima of chunks, its size is the number of chunks (see _chunk_maxima)
+        :param tiny: intensities below tiny are flushed to zero (see Precision.tiny)
+
+        :return: maximum of intensity
+        """
+        n, n_chunks = field.shape[0], maxima.shape[0]
+        chunk = (n + n_chunks - 1) // n_chunks
+        for c in prange(n_chunks):
+            i_max = 0.0
+            for i in range(c * chunk, min((c + 1) * chunk, n)):
+                w = field[i].real**2 + field[i].imag**2
+                if w < tiny:
+                    w = 0.0
+                intensity[i] = w
+                if w > i_max:
+                    i_max = w
+            maxima[c] = i_max
+
+        return maxima.max()
+
+    def full_field(self):
+        """:return: field on the full grid, subclasses which store a part of the grid reconstruct it"""
+        return self._field
+
+    def full_intensity(self):
+        """:return: intensity on the full grid, subclasses which store a part of the grid reconstruct it"""
+        return self._intensity
 
     @staticmethod
     @jit(nopython=True)
@@ -58,10 +158,37 @@ class Beam(metaclass=ABCMeta):
 
         return intensity
 
+    @property
+    def slab_pool(self):
+        return self._slab_pool
+
+    @property
+    def workspace(self):
+        return self._workspace
+
     @property
     def medium(self):
         return self._medium
 
+    @property
+    def precision(self):
+        return self._precision
+
+    @property
+    def radii_in_grid(self):
+        return self._radii_in_grid
+
+    @property
+    def parameters(self):
+        """Parameters which define the beam, subclasses extend them"""
+        return {'beam': self.info,
+                'medium': self._medium.info,
+                'lmbda': self._lmbda,
+                'M': self._M,
+                'distribution_type': self._distribution_type,
+                'radii_in_grid': self._radii_in_grid,
+                'precision': self._precision.name}
+
     @property
     def lmbda(self):
         return self._lmbda
@@ -82,6 +209,10 @@ class Beam(metaclass=ABCMeta):
     def i_max(self):
         return self._i_max
 
+    @property
+    def field(self):
+        return self._field
+
     @property
     def intensity(self):
         return self._intensity
@@ -56,4 +56,13 @@ class Beam3D(Beam):
 
     @property
     def p_0(self):
-        return self._p_0
\ No newline at end of file
+        return self._p_0
+
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'m': self._m,
+                           'p_0': self._p_0,
+                           'p_0_to_p_gauss': getattr(self, '_Beam3D__p_0_to_p_gauss', None),
+                           'p_0_to_p_vortex': getattr(self, '_Beam3D__p_0_to_p_vortex', None)})
+        return parameters
@@ -1,4 +1,4 @@
-from numpy import pi, exp, zeros, complex64
+from numpy import pi, exp, sqrt, zeros, array
 from scipy.special import gamma
 from numba import jit
 
@@ -18,9 +18,12 @@ class BeamR(Beam3D):
         self.__n_r = kwargs['n_r']  # number of points in spatial grid
         self.__dr = self.__r_max / self.__n_r  # spatial grid step, [m]
         self.__rs = [i * self.__dr for i in range(self.__n_r)]  # spatial grid nodes, [m]
+        self.__rs_arr = array(self.__rs, dtype=self._precision.real_compute_dtype)  # grid nodes for diagnostics
 
         # field initialization
-        self._field = self.__initialize_field(self._M, self.__r_0, self.__dr, self.__n_r)
+        self._field = zeros(shape=(self.__n_r,), dtype=self._precision.complex_dtype)
+        self.__initialize_field(self._field, self._M, self.__r_0, self.__dr, self.__n_r)
+        self._precision.flush_tails(self._field)
 
         # other parameters initialization
         self._i_0 = self.__calculate_i0()
@@ -54,6 +57,59 @@ class BeamR(Beam3D):
     def dr(self):
         return self.__dr
 
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'r_0': self.__r_0, 'n_r': self.__n_r})
+        return parameters
+
+    @property
+    def diagnostics_keys(self):
+        return ['power', 'radius', 'r_peak', 'i_axis']
+
+    @property
+    def diagnostics_columns(self):
+        return ['power, W', 'radius, m', 'r_peak, m', 'i_axis, W / m^2']
+
+    @staticmethod
+    @jit(nopython=True)
+    def _calculate_diagnostics(intensity, rs, dr, zero):
+        """
+        Calculates all diagnostics in a single pass over the intensity array
+
+        LATEX SYNTAX:
+        power = \int\limits_0^{+\infty} i(r) 2 \pi r dr,
+        radius^2 = \int\limits_0^{+\infty} i(r) r^2 2 \pi r dr / power
+
+        :param intensity: intensity array
+        :param rs: spatial grid nodes in the accumulation dtype
+        :param dr: spatial grid step
+        :param zero: zero of the accumulation dtype
+
+        :return: power in units of I_0, rms radius, position of intensity peak and on-axis intensity in units of I_0
+        """
+        s_0, s_2 = zero, zero
+        i_peak, peak = 0, intensity[0]
+        for i in range(intensity.shape[0]):
+            r = rs[i]
+            w = intensity[i] * r
+            s_0 += w
+            s_2 += w * r * r
+            if intensity[i] > peak:
+                i_peak, peak = i, intensity[i]
+
+        power = 2.0 * pi * dr * s_0
+        radius = sqrt(s_2 / s_0) if s_0 > 0.0 else 0.0
+
+        return power, radius, i_peak * dr, intensity[0]
+
+    def reduced_quantities(self):
+        power, radius, r_peak, i_axis = self._calculate_diagnostics(self._intensity, self.__rs_arr, self.__dr,
+                                                                    self._precision.real(0))
+
+        return {'power': power * self._i_0, 'radius': radius, 'x_c': 0.0, 'y_c': 0.0, 'r_peak': r_peak,
+                'i_axis': i_axis * self._i_0}
+
     def __calculate_i0(self):
         """
         LATEX SYNTAX:
@@ -67,19 +123,17 @@ class BeamR(Beam3D):
 
     @staticmethod
     @jit(nopython=True)
-    def __initialize_field(M, r_0, dr, n_r):
+    def __initialize_field(arr, M, r_0, dr, n_r):
         """
+        :param arr: array for complex light field, filled in place
         :param M: power of polynomial before exponent in initial condition
         :param r_0: characteristic spatial size
         :param dr: spatial grid step
         :param n_r: number of points in spatial grid
 
-        :return: initialized field array
+        :return: None
         """
-        arr = zeros(shape=(n_r,), dtype=complex64)
         for i in range(n_r):
             r = i * dr
             arr[i] = (r / r_0)**M * exp(-0.5 * (r / r_0)**2)
 
-        return arr
-
@@ -0,0 +1,86 @@
+from numpy import pi, sqrt, empty, array, multiply
+from numba import jit
+
+from .beam_r import BeamR
+from .beam_t import BeamT
+
+
+class BeamRT(BeamR, BeamT):
+    """
+    Subsubsubclass for time-resolved 3-dimensional beam in axisymmetric approximation: the field has shape (n_t, n_r)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._initialize_temporal_grid(**kwargs)
+
+        # memory estimate before allocation of spatio-temporal field
+        self._memory_estimate = self._check_memory(self._n_t * self.n_r)
+
+        # field initialization: initial spatial distribution multiplied by the temporal envelope
+        field = empty(shape=(self._n_t, self.n_r), dtype=self._precision.complex_dtype)
+        multiply(self._envelope().astype(self._precision.real_dtype)[:, None], self._field[None, :], out=field)
+        self._field = field
+
+        self.__rs_arr = array(self.rs, dtype=self._precision.real_compute_dtype)  # grid nodes for diagnostics
+
+        self.update_intensity()
+
+    @property
+    def info(self):
+        return 'beam_rt'
+
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'t_0': self._t_0, 'n_t': self._n_t, 't_max': self._t_max})
+        return parameters
+
+    @property
+    def diagnostics_keys(self):
+        return ['energy', 'radius', 'r_peak', 't_peak', 'i_axis']
+
+    @property
+    def diagnostics_columns(self):
+        return ['energy, J', 'radius, m', 'r_peak, m', 't_peak, s', 'i_axis, W / m^2']
+
+    @staticmethod
+    @jit(nopython=True)
+    def __calculate_diagnostics(intensity, rs, dr, dt, t_max, zero):
+        """
+        Calculates all diagnostics in a single pass over the intensity array
+
+        :param intensity: intensity array with shape (n_t, n_r)
+        :param rs: spatial grid nodes in the accumulation dtype
+        :param dr: spatial grid step
+        :param dt: temporal grid step
+        :param t_max: temporal grid size
+        :param zero: zero of the accumulation dtype
+
+        :return: energy in units of I_0 * s * m^2, rms radius of fluence, position of intensity peak
+                 and intensity on axis at t = 0 in units of I_0
+        """
+        n_t, n_r = intensity.shape[0], intensity.shape[1]
+        s_0, s_2 = zero, zero
+        k_peak, i_peak, peak = 0, 0, intensity[0, 0]
+        for k in range(n_t):
+            for i in range(n_r):
+                r = rs[i]
+                w = intensity[k, i] * r
+                s_0 += w
+                s_2 += w * r * r
+                if intensity[k, i] > peak:
+                    k_peak, i_peak, peak = k, i, intensity[k, i]
+
+        energy = 2.0 * pi * dr * dt * s_0
+        radius = sqrt(s_2 / s_0) if s_0 > 0.0 else 0.0
+
+        return energy, radius, i_peak * dr, k_peak * dt - 0.5 * t_max, intensity[n_t // 2, 0]
+
+    def reduced_quantities(self):
+        energy, radius, r_peak, t_peak, i_axis = self.__calculate_diagnostics(self._intensity, self.__rs_arr, self.dr,
+                                                                              self._dt, self._t_max,
+                                                                              self._precision.real(0))
+
+        return {'energy': energy * self._i_0, 'radius': radius, 'x_c': 0.0, 'y_c': 0.0, 'r_peak': r_peak,
+                't_peak': t_peak, 'i_axis': i_axis * self._i_0}
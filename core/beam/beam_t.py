@@ -0,0 +1,78 @@
+from numpy import pi, exp, array, float64
+import os
+
+
+class BeamT:
+    """
+    Mixin for time-resolved beams: the field carries a temporal axis (axis 0) with the Gaussian pulse envelope
+    exp(-t^2 / (2 t_0^2)) in the running time frame t = t_lab - k_1 z. Every time slice is stored contiguously,
+    so executors process the field slice by slice.
+
+    Memory of the field and intensity is estimated before allocation and compared
+    with max_memory (by default, the physical memory of the node).
+    """
+
+    def _initialize_temporal_grid(self, **kwargs):
+        self._t_0 = kwargs['t_0']  # characteristic pulse duration, [s]
+        self._n_t = kwargs['n_t']  # number of points in temporal grid
+        self._t_max = kwargs.get('durations_in_grid', 10) * self._t_0  # temporal grid size, [s]
+        self._dt = self._t_max / self._n_t  # temporal grid step, [s]
+        self._ts = array([i * self._dt - 0.5 * self._t_max for i in range(self._n_t)])  # temporal grid nodes, [s]
+
+        self._d_omega = 2.0 * pi / self._t_max  # frequency step, [rad/s]
+        self._omegas = array([i * self._d_omega if i < self._n_t / 2 else (i - self._n_t) * self._d_omega  # frequency
+                              for i in range(self._n_t)], dtype=float64)                          # grid nodes
+
+        self._max_memory = kwargs.get('max_memory', self.physical_memory())  # memory limit, [bytes]
+
+    @staticmethod
+    def physical_memory():
+        """Physical memory of the node, [bytes]"""
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+
+    def _check_memory(self, n_points):
+        """
+        Estimates memory needed for the time-resolved field before allocation
+
+        :param n_points: number of points in spatio-temporal grid
+
+        :return: memory estimate, [bytes]
+        """
+        memory = n_points * self._precision.bytes_per_point  # field and intensity, they are updated in place
+        if memory > self._max_memory:
+            raise Exception('Not enough memory for time-resolved beam: %.1f MB needed, %.1f MB available!' %
+                            (memory / 2**20, self._max_memory / 2**20))
+
+        return memory
+
+    def _envelope(self):
+        """Temporal envelope of the initial pulse"""
+        return exp(-0.5 * (self._ts / self._t_0)**2)
+
+    @property
+    def t_0(self):
+        return self._t_0
+
+    @property
+    def n_t(self):
+        return self._n_t
+
+    @property
+    def t_max(self):
+        return self._t_max
+
+    @property
+    def dt(self):
+        return self._dt
+
+    @property
+    def ts(self):
+        return self._ts
+
+    @property
+    def omegas(self):
+        return self._omegas
+
+    @property
+    def memory_estimate(self):
+        return self._memory_estimate
@@ -1,8 +1,10 @@
-from numpy import pi, arctan2, exp, sqrt, zeros, complex64, mean, sum as summ
+from numpy import pi, arctan2, exp, sqrt, zeros, ones, array, asarray, mean, sum as summ
 from scipy.special import gamma
 from numba import jit
 
 from .beam_3d import Beam3D
+from ..out_of_core import OutOfCorePool
+from ..symmetry import Symmetry
 
 
 class BeamXY(Beam3D):
@@ -28,6 +30,26 @@ class BeamXY(Beam3D):
         self.__xs = [i * self.__dx - 0.5 * self.__x_max for i in range(self.__n_x)]  # spatial grid nodes along x
         self.__ys = [i * self.__dy - 0.5 * self.__y_max for i in range(self.__n_y)]  # spatial grid nodes along y
 
+        # mirror symmetry declared by the user, only the quadrant of the field is stored if it is not None
+        self.__symmetry = Symmetry.make(kwargs.get('symmetry', None))
+
+        # grid nodes of the stored field and their weights (numbers of nodes of the full grid) for diagnostics
+        real_compute_dtype = self._precision.real_compute_dtype
+        if self.__symmetry is None:
+            self.__xs_arr, self.__ys_arr = array(self.__xs, dtype=real_compute_dtype), \
+                                           array(self.__ys, dtype=real_compute_dtype)
+            self.__weights_x, self.__weights_y = ones(self.__n_x, dtype=real_compute_dtype), \
+                                                 ones(self.__n_y, dtype=real_compute_dtype)
+            self.__starts = (0, 0)  # indices of the first stored node in the full grid
+        else:
+            nodes_x = Symmetry.nodes(self.__n_x, self.__symmetry.x)
+            nodes_y = Symmetry.nodes(self.__n_y, self.__symmetry.y)
+            self.__xs_arr = (self.__dx * nodes_x).astype(real_compute_dtype)
+            self.__ys_arr = (self.__dy * nodes_y).astype(real_compute_dtype)
+            self.__weights_x = Symmetry.weights(self.__n_x, self.__symmetry.x).astype(real_compute_dtype)
+            self.__weights_y = Symmetry.weights(self.__n_y, self.__symmetry.y).astype(real_compute_dtype)
+            self.__starts = (self.__n_x // 2 + nodes_x[0], self.__n_y // 2 + nodes_y[0])
+
         self.__dk_x = 2.0 * pi / self.__x_max  # wave vector step along x
         self.__dk_y = 2.0 * pi / self.__y_max  # wave vector step along y
 
@@ -38,9 +60,10 @@ class BeamXY(Beam3D):
                        for i in range(self.__n_y)]                                                # nodes along y
 
         self.__noise_percent = kwargs.get('noise_percent', 0.0)  # multiplicative noise percent
-        self.__noise_field = zeros(shape=(self.__n_x, self.__n_y))  # array for complex noise field
+        self.__noise = None  # noise object, the noise field is kept by it only if noise is on
 
         # noise initialization
+        noise_field = None
         if self.__noise_percent:
             self.__noise = kwargs['noise']
             self.__noise.initialize(n_x=self.__n_x,
@@ -48,12 +71,40 @@ class BeamXY(Beam3D):
                                     dx=self.__dx,
                                     dy=self.__dy)
             self.__noise.process()
-            self.__noise_field = self.__noise.noise_field
-
-        # field initialization
-        self._field = self.__initialize_field(self._M, self._m, self.__x_0, self.__y_0, self.__x_max, self.__y_max,
-                                              self.__dx, self.__dy, self.__n_x, self.__n_y, self.__noise_percent,
-                                              self.__noise_field)
+            noise_field = self.__noise.noise_field
+
+        if self.__symmetry is not None:
+            if self.info != 'beam_xy' or self._m != 0:
+                raise Exception('Wrong symmetry: only beams xy without vortex are mirror-symmetric!')
+            if self.__noise_percent or kwargs.get('memmap_dir', None) is not None:
+                raise Exception('Wrong symmetry: noise and out-of-core field are not supported!')
+
+        # field initialization, in memory or in the memory-mapped file (see OutOfCorePool) row tile by row tile
+        self.__memmap_dir = kwargs.get('memmap_dir', None)  # directory of memory-mapped field if it is out of core
+        if self.__memmap_dir is not None:
+            self._slab_pool = OutOfCorePool(beam=self,
+                                            directory=self.__memmap_dir,
+                                            n_tile=kwargs.get('n_tile', None),
+                                            n_jobs=kwargs.get('n_jobs', None),
+                                            prefetch=kwargs.get('prefetch', True))
+            self._field, self._intensity = self._slab_pool.field, self._slab_pool.intensity
+        else:
+            shape = (self.__n_x, self.__n_y) if self.__symmetry is None else self.__symmetry.shape(self.__n_x,
+                                                                                                  self.__n_y)
+            self._field = zeros(shape=shape, dtype=self._precision.complex_dtype)
+
+        # the initial field is loaded from the cache of results if it is stored by the key of its parameters
+        cache = kwargs.get('cache', None)
+        field_key = cache.key(self.field_parameters) if cache is not None and not self.__noise_percent else None
+        if field_key is None or not cache.load_field(field_key, self._field):
+            for start, stop in self.__row_blocks():
+                block = self._field[start:stop]
+                self.__initialize_field(asarray(block), self._M, self._m, self.__x_0, self.__y_0, self.__x_max,
+                                        self.__y_max, self.__dx, self.__dy, self.__starts[0] + start,
+                                        self.__starts[1], self.__noise_percent, noise_field)
+                self._precision.flush_tails(block)
+            if field_key is not None:
+                cache.store_field(field_key, self._field)
 
         # other parameters initialization
         self._i_0 = self.__calculate_i_0()
@@ -114,10 +165,34 @@ class BeamXY(Beam3D):
     def k_ys(self):
         return self.__k_ys
 
+    @property
+    def memmap_dir(self):
+        return self.__memmap_dir
+
+    @property
+    def symmetry(self):
+        return self.__symmetry
+
     @property
     def noise_percent(self):
         return self.__noise_percent
 
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'x_0': self.__x_0, 'y_0': self.__y_0, 'n_x': self.__n_x, 'n_y': self.__n_y,
+                           'noise_percent': self.__noise_percent,
+                           'symmetry': self.__symmetry.classes if self.__symmetry is not None else None})
+        return parameters
+
+    @property
+    def field_parameters(self):
+        """Parameters which define the initial field, its key in the cache of results"""
+        return {'field': 'beam_xy', 'M': self._M, 'm': self._m, 'x_0': self.__x_0, 'y_0': self.__y_0,
+                'n_x': self.__n_x, 'n_y': self.__n_y, 'radii_in_grid': self._radii_in_grid,
+                'precision': self._precision.name,
+                'symmetry': self.__symmetry.classes if self.__symmetry is not None else None}
+
     @property
     def i_0(self):
         return self._i_0
@@ -130,6 +205,102 @@ class BeamXY(Beam3D):
     def noise(self):
         return self.__noise
 
+    @property
+    def diagnostics_keys(self):
+        return ['power', 'radius', 'x_c', 'y_c', 'x_peak', 'y_peak', 'i_axis']
+
+    @property
+    def diagnostics_columns(self):
+        return ['power, W', 'radius, m', 'x_c, m', 'y_c, m', 'x_peak, m', 'y_peak, m', 'i_axis, W / m^2']
+
+    def __row_blocks(self):
+        """:return: bounds of blocks of rows, slabs or tiles of the pool if the beam has it, else all rows at once"""
+        return self._slab_pool.rows if self._slab_pool is not None else [(0, self._field.shape[0])]
+
+    def full_field(self):
+        """:return: field on the full grid n_x x n_y, unfolded from the quadrant if the beam is symmetric"""
+        if self.__symmetry is None:
+            return self._field
+
+        return self.__symmetry.unfold(self._field, self.__n_x, self.__n_y)
+
+    def full_intensity(self):
+        """:return: intensity on the full grid n_x x n_y, unfolded from the quadrant if the beam is symmetric"""
+        if self.__symmetry is None:
+            return self._intensity
+
+        return self.__symmetry.unfold(self._intensity, self.__n_x, self.__n_y, signed=False)
+
+    @staticmethod
+    @jit(nopython=True)
+    def __accumulate_moments(intensity, xs, ys, weights_x, weights_y, zero):
+        """
+        Calculates moments of the block of rows of the intensity array in a single pass
+
+        :param intensity: block of rows of the intensity array
+        :param xs: spatial grid nodes of the block along x in the accumulation dtype
+        :param ys: spatial grid nodes along y in the accumulation dtype
+        :param weights_x: weights of nodes of the block along x (numbers of nodes of the full grid)
+        :param weights_y: weights of nodes along y
+        :param zero: zero of the accumulation dtype
+
+        :return: sums of intensity, of intensity times x, y and x^2 + y^2, indices of intensity peak and the peak
+        """
+        n_x, n_y = intensity.shape[0], intensity.shape[1]
+        s_0, s_x, s_y, s_2 = zero, zero, zero, zero
+        i_peak, j_peak, peak = 0, 0, intensity[0, 0]
+        for i in range(n_x):
+            x, weight_x = xs[i], weights_x[i]
+            for j in range(n_y):
+                y = ys[j]
+                w = intensity[i, j]
+                if w > peak:
+                    i_peak, j_peak, peak = i, j, w
+                w = w * weight_x * weights_y[j]
+                s_0 += w
+                s_x += w * x
+                s_y += w * y
+                s_2 += w * (x * x + y * y)
+
+        return s_0, s_x, s_y, s_2, i_peak, j_peak, peak
+
+    def __calculate_diagnostics(self):
+        """
+        Calculates all diagnostics in a single pass over the intensity array, block of rows by block of rows
+
+        :return: power in units of I_0, centroid coordinates, rms radius, coordinates of intensity peak
+                 and on-axis intensity in units of I_0
+        """
+        zero = self._precision.real(0)
+        s_0, s_x, s_y, s_2 = zero, zero, zero, zero
+        i_peak, j_peak, peak = None, None, None
+        for start, stop in self.__row_blocks():
+            block_s_0, block_s_x, block_s_y, block_s_2, block_i_peak, block_j_peak, block_peak = \
+                self.__accumulate_moments(asarray(self._intensity[start:stop]), self.__xs_arr[start:stop],
+                                          self.__ys_arr, self.__weights_x[start:stop], self.__weights_y, zero)
+            s_0, s_x, s_y, s_2 = s_0 + block_s_0, s_x + block_s_x, s_y + block_s_y, s_2 + block_s_2
+            if peak is None or block_peak > peak:
+                i_peak, j_peak, peak = start + block_i_peak, block_j_peak, block_peak
+
+        x_peak, y_peak = self.__xs_arr[i_peak], self.__ys_arr[j_peak]
+        i_axis_x, i_axis_y = self.__n_x // 2 - self.__starts[0], self.__n_y // 2 - self.__starts[1]
+        i_axis = self._intensity[i_axis_x, i_axis_y] if i_axis_x >= 0 and i_axis_y >= 0 else 0.0
+
+        if s_0 == 0.0:
+            return 0.0, 0.0, 0.0, 0.0, x_peak, y_peak, i_axis
+
+        # first moments of the quadrant are not centroids, the centroid of the symmetric beam is in the center
+        x_c, y_c = (s_x / s_0, s_y / s_0) if self.__symmetry is None else (0.0, 0.0)
+        radius = sqrt(max(s_2 / s_0 - x_c**2 - y_c**2, 0.0))
+
+        return s_0 * self.__dx * self.__dy, x_c, y_c, radius, x_peak, y_peak, i_axis
+
+    def reduced_quantities(self):
+        power, x_c, y_c, radius, x_peak, y_peak, i_axis = self.__calculate_diagnostics()
+
+        return {'power': power * self._i_0, 'radius': radius, 'x_c': x_c, 'y_c': y_c, 'x_peak': x_peak,
+                'y_peak': y_peak, 'i_axis': i_axis * self._i_0}
+
     @staticmethod
     @jit(nopython=True)
     def __calculate_intensity_intergral(intensity, dx, dy):
@@ -159,13 +330,20 @@ class BeamXY(Beam3D):
         # if self.__noise_percent == 0.0 and self.__x_0 == self.__y_0:
         #     return self._p_0 / (pi * self.__x_0**2 * gamma(self._M+1))
         # else:
-        return self._p_0 / self.__calculate_intensity_intergral(self._field_to_intensity(self._field),
-                                                                self.__dx, self.__dy)
+        intensity_integral = 0.0
+        for start, stop in self.__row_blocks():
+            intensity = self._field_to_intensity(asarray(self._field[start:stop]))
+            if self.__symmetry is not None:
+                intensity = self.__weights_x[start:stop, None] * intensity * self.__weights_y[None, :]
+            intensity_integral += self.__calculate_intensity_intergral(intensity, self.__dx, self.__dy)
+
+        return self._p_0 / intensity_integral
 
     @staticmethod
     @jit(nopython=False)
-    def __initialize_field(M, m, x_0, y_0, x_max, y_max, dx, dy, n_x, n_y, noise_percent, noise):
+    def __initialize_field(arr, M, m, x_0, y_0, x_max, y_max, dx, dy, i_start, j_start, noise_percent, noise):
         """
+        :param arr: block of rows of array for complex light field, filled in place
         :param M: power of polynomial before exponent in initial condition
         :param m: topological charge
         :param x_0: characteristic spatial size along x
@@ -174,17 +352,16 @@ class BeamXY(Beam3D):
         :param y_max: spatial grid size along y
         :param dx: spatial grid step along x
         :param dy: spatial grid step along y
-        :param n_x: number of points in spatial grid along x
-        :param n_y: number of points in spatial grid along y
+        :param i_start: index of the first row of the block in spatial grid along x
+        :param j_start: index of the first column of the block in spatial grid along y
         :param noise_percent: multiplicative noise percent
         :param noise: array for complex noise field
 
-        :return: initialized field array
+        :return: None
         """
-        arr = zeros(shape=(n_x, n_y), dtype=complex64)
-        for i in range(n_x):
-            for j in range(n_y):
-                x, y = i * dx - 0.5 * x_max, j * dy - 0.5 * y_max
+        for i in range(arr.shape[0]):
+            for j in range(arr.shape[1]):
+                x, y = (i_start + i) * dx - 0.5 * x_max, (j_start + j) * dy - 0.5 * y_max
                 r = sqrt(x**2 + y**2)
                 #r_01 = 200 * 10**-6
                 #r_02 = 10 * 10 ** -6
@@ -195,7 +372,7 @@ class BeamXY(Beam3D):
                 if r < x_0 + 0.5 * (y_0 - x_0):
                     arr[i, j] *= exp(1j * m * (arctan2(x, y)))
                 else:
-                    arr[i, j] *= exp(1j * m * (arctan2(x, y) + pi / m))
+                    arr[i, j] *= exp(1j * (m * arctan2(x, y) + pi))
 
                 #arr[i, j] = exp(-0.5 * ((abs(x - r_0) / r_d) ** 2 + (abs(y - r_0) / r_d) ** 2)) *\
 
@@ -203,5 +380,3 @@ class BeamXY(Beam3D):
                 #             sqrt((abs(x) / x_0) ** 2 + (abs(y) / y_0) ** 2) ** M * \
                 #             exp(-0.5 * ((abs(x) / x_0) ** 2 + (abs(y) / y_0) ** 2))
 
-
-        return arr
@@ -0,0 +1,102 @@
+from numpy import sqrt, empty, array, multiply
+from numba import jit
+
+from .beam_xy import BeamXY
+from .beam_t import BeamT
+
+
+class BeamXYT(BeamXY, BeamT):
+    """
+    Subsubsubclass for time-resolved 3-dimensional beam with spatial coordinates x and y: the field has shape
+    (n_t, n_x, n_y)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._initialize_temporal_grid(**kwargs)
+
+        # memory estimate before allocation of spatio-temporal field
+        self._memory_estimate = self._check_memory(self._n_t * self.n_x * self.n_y)
+
+        # field initialization: initial spatial distribution multiplied by the temporal envelope
+        field = empty(shape=(self._n_t, self.n_x, self.n_y), dtype=self._precision.complex_dtype)
+        multiply(self._envelope().astype(self._precision.real_dtype)[:, None, None], self._field[None, :, :],
+                 out=field)
+        self._field = field
+
+        self.__xs_arr = array(self.xs, dtype=self._precision.real_compute_dtype)  # grid nodes for diagnostics
+        self.__ys_arr = array(self.ys, dtype=self._precision.real_compute_dtype)  #
+
+        self.update_intensity()
+
+    @property
+    def info(self):
+        return 'beam_xyt'
+
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'t_0': self._t_0, 'n_t': self._n_t, 't_max': self._t_max})
+        return parameters
+
+    @property
+    def diagnostics_keys(self):
+        return ['energy', 'radius', 'x_c', 'y_c', 'x_peak', 'y_peak', 't_peak', 'i_axis']
+
+    @property
+    def diagnostics_columns(self):
+        return ['energy, J', 'radius, m', 'x_c, m', 'y_c, m', 'x_peak, m', 'y_peak, m', 't_peak, s',
+                'i_axis, W / m^2']
+
+    @staticmethod
+    @jit(nopython=True)
+    def __calculate_diagnostics(intensity, xs, ys, t_max, dx, dy, dt, zero):
+        """
+        Calculates all diagnostics in a single pass over the intensity array
+
+        :param intensity: intensity array with shape (n_t, n_x, n_y)
+        :param xs: spatial grid nodes along x in the accumulation dtype
+        :param ys: spatial grid nodes along y in the accumulation dtype
+        :param t_max: temporal grid size
+        :param dx: spatial grid step along x
+        :param dy: spatial grid step along y
+        :param dt: temporal grid step
+        :param zero: zero of the accumulation dtype
+
+        :return: energy in units of I_0 * s * m^2, centroid coordinates and rms radius of fluence, coordinates
+                 of intensity peak and intensity on axis at t = 0 in units of I_0
+        """
+        n_t, n_x, n_y = intensity.shape[0], intensity.shape[1], intensity.shape[2]
+        s_0, s_x, s_y, s_2 = zero, zero, zero, zero
+        k_peak, i_peak, j_peak, peak = 0, 0, 0, intensity[0, 0, 0]
+        for k in range(n_t):
+            for i in range(n_x):
+                x = xs[i]
+                for j in range(n_y):
+                    y = ys[j]
+                    w = intensity[k, i, j]
+                    s_0 += w
+                    s_x += w * x
+                    s_y += w * y
+                    s_2 += w * (x * x + y * y)
+                    if w > peak:
+                        k_peak, i_peak, j_peak, peak = k, i, j, w
+
+        x_peak, y_peak, t_peak = xs[i_peak], ys[j_peak], k_peak * dt - 0.5 * t_max
+        i_axis = intensity[n_t // 2, n_x // 2, n_y // 2]
+
+        if s_0 == 0.0:
+            return 0.0, 0.0, 0.0, 0.0, x_peak, y_peak, t_peak, i_axis
+
+        x_c, y_c = s_x / s_0, s_y / s_0
+        radius = sqrt(max(s_2 / s_0 - x_c**2 - y_c**2, 0.0))
+
+        return s_0 * dx * dy * dt, x_c, y_c, radius, x_peak, y_peak, t_peak, i_axis
+
+    def reduced_quantities(self):
+        energy, x_c, y_c, radius, x_peak, y_peak, t_peak, i_axis = \
+            self.__calculate_diagnostics(self._intensity, self.__xs_arr, self.__ys_arr, self._t_max, self.dx,
+                                         self.dy, self._dt, self._precision.real(0))
+
+        return {'energy': energy * self._i_0, 'radius': radius, 'x_c': x_c, 'y_c': y_c, 'x_peak': x_peak,
+                'y_peak': y_peak, 't_peak': t_peak, 'i_axis': i_axis * self._i_0}
@@ -0,0 +1,173 @@
+from glob import glob
+from hashlib import sha256
+from shutil import copy2, copytree, rmtree
+from uuid import uuid4
+import json
+import os
+
+from numpy import load, save, savez, ndarray, generic
+
+
+class ResultCache:
+    """
+    Class for the content-addressed cache of results. The key is the SHA-256 hash of the canonical JSON of
+    the configuration and of the code version (the hash of sources of the core package), so the same configuration
+    gives the same key on every machine and any change of the code invalidates the cache.
+
+    Propagator with the cache hashes the full configuration of the run (beam, medium and grid parameters, executors,
+    stepping, events and observers) and on a hit returns the stored track, final field and artifacts immediately
+    instead of the calculations. BeamXY with the cache loads its initial field stored by the key of the parameters
+    of the field only, so runs with different powers or stepping share it.
+
+    Layout of the cache directory:
+        runs/<key>/entry.json    ->  configuration, final state and metadata of the run
+        runs/<key>/arrays.npz    ->  states table and final field
+        runs/<key>/artifacts     ->  files of the results directory (track, plots, snapshots, ...)
+        fields/<key>.npy         ->  initial fields of beams
+    Entries are written to temporary paths and renamed, so concurrent runs never read partial entries.
+    """
+
+    __code_version = None  # hash of sources of the core package, it is calculated once per process
+
+    def __init__(self, **kwargs):
+        self.__path = kwargs['path']  # cache directory
+
+        self.__runs_dir = os.path.join(self.__path, 'runs')
+        self.__fields_dir = os.path.join(self.__path, 'fields')
+        for path in (self.__runs_dir, self.__fields_dir):
+            os.makedirs(path, exist_ok=True)
+
+    @property
+    def path(self):
+        return self.__path
+
+    @staticmethod
+    def code_version():
+        """:return: SHA-256 hash of paths and contents of python sources of the core package"""
+
+        if ResultCache.__code_version is None:
+            package_dir = os.path.dirname(os.path.abspath(__file__))
+            digest = sha256()
+            for path in sorted(glob(os.path.join(package_dir, '**', '*.py'), recursive=True)):
+                digest.update(os.path.relpath(path, package_dir).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+            ResultCache.__code_version = digest.hexdigest()
+
+        return ResultCache.__code_version
+
+    @staticmethod
+    def __to_json(value):
+        """Converts numpy scalars and arrays for canonical JSON"""
+
+        if isinstance(value, (ndarray, generic)):
+            return value.tolist()
+
+        raise TypeError('Wrong value %r in configuration!' % (value,))
+
+    @staticmethod
+    def canonical(configuration):
+        """:return: canonical JSON of the configuration: sorted keys, no spaces, shortest repr of floats"""
+        return json.dumps(configuration, sort_keys=True, separators=(',', ':'), default=ResultCache.__to_json)
+
+    @staticmethod
+    def key(configuration):
+        """:return: hexadecimal SHA-256 key of the configuration and the code version"""
+
+        return sha256(ResultCache.canonical({'configuration': configuration,
+                                             'code_version': ResultCache.code_version()}).encode()).hexdigest()
+
+    def __temporary_path(self):
+        return os.path.join(self.__path, 'tmp-' + uuid4().hex)
+
+    @staticmethod
+    def __copy(src, dst):
+        """
+        Copies the file: artifacts are never shared with results directories, where later runs may overwrite them
+        in place. The file is skipped if the destination is the same file.
+        """
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return dst
+
+        return copy2(src, dst)
+
+    def __run_dir(self, key):
+        return os.path.join(self.__runs_dir, key)
+
+    def has_run(self, key):
+        return os.path.isfile(os.path.join(self.__run_dir(key), 'entry.json'))
+
+    def load_run(self, key):
+        """
+        :param key: key of the run
+
+        :return: entry of the run (dict) and its arrays (dict with states table and final field)
+        """
+        run_dir = self.__run_dir(key)
+        with open(os.path.join(run_dir, 'entry.json'), 'r') as f:
+            entry = json.load(f)
+        with load(os.path.join(run_dir, 'arrays.npz')) as arrays:
+            arrays = {name: arrays[name] for name in arrays.files}
+
+        return entry, arrays
+
+    def store_run(self, key, entry, arrays, results_dir, exclude=()):
+        """
+        Stores the run, the entry is not replaced if the run with the same key has been stored concurrently
+
+        :param key: key of the run
+        :param entry: JSON-serializable dict with the state and metadata of the run
+        :param arrays: dict of arrays of the run
+        :param results_dir: results directory, its files are stored as artifacts
+        :param exclude: names of files of the results directory which are not artifacts
+
+        :return: None
+        """
+        if self.has_run(key):
+            return
+
+        tmp_dir = self.__temporary_path()
+        copytree(results_dir, os.path.join(tmp_dir, 'artifacts'), copy_function=self.__copy,
+                 ignore=lambda path, names: [e for e in names if e in exclude])
+        savez(os.path.join(tmp_dir, 'arrays.npz'), **arrays)
+        with open(os.path.join(tmp_dir, 'entry.json'), 'w') as f:
+            json.dump(dict(entry, key=key), f, indent=4, default=self.__to_json)
+
+        try:
+            os.rename(tmp_dir, self.__run_dir(key))
+        except OSError:
+            rmtree(tmp_dir)  # the same run has been stored concurrently
+
+    def restore_artifacts(self, key, results_dir):
+        """Fills the results directory with artifacts of the stored run"""
+
+        copytree(os.path.join(self.__run_dir(key), 'artifacts'), results_dir, copy_function=self.__copy,
+                 dirs_exist_ok=True)
+
+    def __field_path(self, key):
+        return os.path.join(self.__fields_dir, key + '.npy')
+
+    def load_field(self, key, field):
+        """
+        Fills the field array in place with the stored field
+
+        :param key: key of the field
+        :param field: array of the field (in memory or memory-mapped)
+
+        :return: True on a hit, False if there is no stored field of the same shape and dtype
+        """
+        path = self.__field_path(key)
+        if not os.path.isfile(path):
+            return False
+
+        stored = load(path, mmap_mode='r')
+        if stored.shape != field.shape or stored.dtype != field.dtype:
+            return False
+        field[...] = stored
+
+        return True
+
+    def store_field(self, key, field):
+        tmp_path = self.__temporary_path() + '.npy'
+        save(tmp_path, field)
+        os.replace(tmp_path, self.__field_path(key))
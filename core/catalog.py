@@ -0,0 +1,239 @@
+from glob import glob
+import json
+import os
+import sqlite3
+
+
+class Catalog:
+    """
+    Class for the local SQLite catalog of runs. Propagator saves the metadata of every run to <results_dir>/run.json
+    and registers it in the catalog of global results directory, Catalog.scan indexes run.json files of existing
+    results directories.
+
+    Filters in query are given as keyword arguments: column=value or column__op=value, where op is one of
+    gt, ge, lt, le, ne, like, for example, query(medium='LiF', distribution_type='vortex', m=1, p_0_to_p_vortex__gt=3).
+    Column names in SQLite are case-insensitive, so the power of polynomial M is stored as M_power.
+
+    Runs branched from checkpoints of other runs (see branch_from of Propagator) keep the id of the parent run,
+    step and z of the branch point, so runs sharing the same trunk are found by branches and lineage.
+    """
+
+    # indexed columns of runs table and their sql types, other metadata is kept as json
+    COLUMNS = (('run_id', 'TEXT PRIMARY KEY'),
+               ('results_dir', 'TEXT'),
+               ('prefix', 'TEXT'),
+               ('created', 'TEXT'),
+               ('beam', 'TEXT'),
+               ('medium', 'TEXT'),
+               ('distribution_type', 'TEXT'),
+               ('M_power', 'INTEGER'),
+               ('m', 'INTEGER'),
+               ('lmbda', 'REAL'),
+               ('p_0', 'REAL'),
+               ('p_0_to_p_gauss', 'REAL'),
+               ('p_0_to_p_vortex', 'REAL'),
+               ('r_0', 'REAL'),
+               ('x_0', 'REAL'),
+               ('y_0', 'REAL'),
+               ('n_r', 'INTEGER'),
+               ('n_x', 'INTEGER'),
+               ('n_y', 'INTEGER'),
+               ('radii_in_grid', 'REAL'),
+               ('noise_percent', 'REAL'),
+               ('diffraction', 'TEXT'),
+               ('kerr_effect', 'TEXT'),
+               ('n_z', 'INTEGER'),
+               ('dz_0', 'REAL'),
+               ('const_dz', 'INTEGER'),
+               ('max_intensity_to_stop', 'REAL'),
+               ('wall_time', 'REAL'),
+               ('stop_reason', 'TEXT'),
+               ('n_steps', 'INTEGER'),
+               ('z_final', 'REAL'),
+               ('i_max_peak', 'REAL'),
+               ('i_max_peak_to_i_0', 'REAL'),
+               ('z_collapse', 'REAL'),
+               ('parent_run_id', 'TEXT'),
+               ('branch_n_step', 'INTEGER'),
+               ('branch_z', 'REAL'),
+               ('metadata', 'TEXT'))
+
+    INDEXES = ('medium', 'distribution_type', 'm', 'M_power', 'p_0_to_p_vortex', 'p_0_to_p_gauss', 'beam', 'created',
+               'parent_run_id')
+
+    OPERATORS = {'gt': '>', 'ge': '>=', 'lt': '<', 'le': '<=', 'ne': '!=', 'like': 'LIKE'}
+
+    METADATA_FILENAME = 'run.json'
+
+    def __init__(self, **kwargs):
+        self.__path = kwargs['path']  # path to sqlite database
+        self.__column_names = [name for name, _ in self.COLUMNS]
+
+        self.__connection = sqlite3.connect(self.__path)
+        self.__connection.row_factory = sqlite3.Row
+        self.__create_tables()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def path(self):
+        return self.__path
+
+    def close(self):
+        self.__connection.close()
+
+    def __create_tables(self):
+        columns = ', '.join('%s %s' % (name, sql_type) for name, sql_type in self.COLUMNS)
+        with self.__connection:
+            self.__connection.execute('CREATE TABLE IF NOT EXISTS runs (%s)' % columns)
+            # catalogs created by older versions lack newer columns
+            existing = [row['name'] for row in self.__connection.execute('PRAGMA table_info(runs)')]
+            for name, sql_type in self.COLUMNS:
+                if name not in existing:
+                    self.__connection.execute('ALTER TABLE runs ADD COLUMN %s %s' % (name, sql_type))
+            for column in self.INDEXES:
+                self.__connection.execute('CREATE INDEX IF NOT EXISTS runs_%s ON runs (%s)' % (column, column))
+
+    @staticmethod
+    def make_record(metadata):
+        """
+        Flattens run metadata (see Propagator) to the catalog record
+
+        :param metadata: dict with run metadata
+
+        :return: dict with values of catalog columns
+        """
+
+        record = {'run_id': metadata['run_id'],
+                  'results_dir': metadata['results_dir'],
+                  'prefix': metadata.get('prefix'),
+                  'created': metadata.get('created')}
+        for group in ('beam', 'propagation', 'summary'):
+            record.update(metadata.get(group, {}))
+        record['M_power'] = record.pop('M', None)
+        branch = metadata.get('branch') or {}
+        record['parent_run_id'] = branch.get('parent_run_id')
+        record['branch_n_step'] = branch.get('n_step')
+        record['branch_z'] = branch.get('z')
+        record['metadata'] = json.dumps(metadata)
+
+        return record
+
+    def register(self, metadata):
+        """Adds run to the catalog or updates it if the run is already registered"""
+
+        record = self.make_record(metadata)
+        values = [record.get(name) for name in self.__column_names]
+        with self.__connection:
+            self.__connection.execute('INSERT OR REPLACE INTO runs (%s) VALUES (%s)' %
+                                      (', '.join(self.__column_names), ', '.join('?' * len(values))), values)
+
+    def scan(self, global_results_dir):
+        """
+        Registers all runs from results directories which contain run metadata
+
+        :param global_results_dir: global results directory
+
+        :return: number of registered runs
+        """
+
+        n_runs = 0
+        for path in glob(global_results_dir + '/*/' + self.METADATA_FILENAME):
+            with open(path, 'r') as f:
+                self.register(json.load(f))
+            n_runs += 1
+
+        return n_runs
+
+    def query(self, order_by='created', **filters):
+        """
+        Selects runs matching all filters
+
+        :param order_by: column for sorting
+        :param filters: column=value or column__op=value
+
+        :return: list of dicts with catalog columns (without raw metadata)
+        """
+
+        conditions, values = [], []
+        for key, value in filters.items():
+            column, _, op = key.partition('__')
+            if column not in self.__column_names or (op and op not in self.OPERATORS):
+                raise Exception('Wrong filter "%s"!' % key)
+            if value is None:
+                conditions.append('%s IS NULL' % column)
+            else:
+                conditions.append('%s %s ?' % (column, self.OPERATORS[op] if op else '='))
+                values.append(value)
+
+        if order_by not in self.__column_names:
+            raise Exception('Wrong order_by!')
+
+        sql = 'SELECT * FROM runs'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY %s' % order_by
+
+        rows = self.__connection.execute(sql, values).fetchall()
+
+        return [{name: row[name] for name in self.__column_names if name != 'metadata'} for row in rows]
+
+    def metadata(self, run_id):
+        """Returns full metadata of the run"""
+
+        row = self.__connection.execute('SELECT metadata FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        if row is None:
+            raise Exception('No run %s in catalog!' % run_id)
+
+        return json.loads(row['metadata'])
+
+    def branches(self, run_id):
+        """Returns runs branched directly from checkpoints of the run, ordered by the branch point"""
+        return self.query(order_by='branch_z', parent_run_id=run_id)
+
+    def lineage(self, run_id):
+        """
+        Returns the chain of runs from the root of the trunk to the run
+
+        :param run_id: id of the run
+
+        :return: list of dicts with catalog columns, the run is the last one
+        """
+
+        chain = []
+        while run_id is not None:
+            runs = self.query(run_id=run_id)
+            if not runs:
+                break  # the parent run is not registered
+            chain.append(runs[0])
+            run_id = runs[0]['parent_run_id']
+
+        return chain[::-1]
+
+    def checkpoints(self, run_id):
+        """
+        Lists checkpoints of the run available for branching
+
+        :param run_id: id of the run
+
+        :return: sorted list of (n_step, path) of checkpoint files
+        """
+
+        results_dir = self.metadata(run_id)['results_dir']
+        paths = glob(os.path.join(results_dir, 'checkpoints', '*.npz'))
+
+        return sorted((int(os.path.splitext(os.path.basename(path))[0]), path) for path in paths)
+
+    def remove_missing(self):
+        """Removes runs whose results directories no longer exist"""
+
+        rows = self.__connection.execute('SELECT run_id, results_dir FROM runs').fetchall()
+        missing = [(row['run_id'],) for row in rows if not os.path.exists(row['results_dir'])]
+        with self.__connection:
+            self.__connection.executemany('DELETE FROM runs WHERE run_id = ?', missing)
+
+        return len(missing)
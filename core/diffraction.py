@@ -1,8 +1,11 @@
 from abc import ABCMeta, abstractmethod
-from multiprocessing import cpu_count
-from numpy import exp, conj, zeros, complex64, array
-from numba import jit
-from pyfftw.builders import fft2, ifft2
+from numpy import pi, exp, conj, zeros, array
+from numba import jit, prange
+from pyfftw import FFTW, empty_aligned
+from pyfftw.builders import fft, ifft, fftn, ifftn
+
+from .symmetry import Symmetry
+from .threads import default_threads, auto_threads
 
 
 class DiffractionExecutor(metaclass=ABCMeta):
@@ -24,10 +27,25 @@ class DiffractionExecutor(metaclass=ABCMeta):
     def info(self):
         """DiffractionExecutor type"""
 
+    @property
+    def n_jobs(self):
+        """Number of FFTW threads, None for executors without FFT"""
+        return None
+
     @abstractmethod
     def process_diffraction(self, dz):
         """Process_diffraction"""
 
+    @property
+    def numba_threads(self):
+        """Number of threads of numba parallel kernels of the step, None keeps the setting of the process"""
+        return None
+
+    @property
+    def parameters(self):
+        """Settings which define results of the executor (threads are not included), subclasses extend them"""
+        return {'info': self.info}
+
 
 class SweepDiffractionExecutorR(DiffractionExecutor):
     """
@@ -37,17 +55,20 @@ class SweepDiffractionExecutorR(DiffractionExecutor):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        # sweep coefficients and arrays
+        # sweep coefficients and arrays, scalars are in the computation dtype and arrays in the storage dtype
+        # of the precision policy of the beam, so the sweep does not mix double scalars into single arrays
+        self._precision = self._beam.precision
+        complex_dtype = self._precision.complex_dtype
 
-        self.__c1 = 1.0 / (2.0 * self._beam.dr ** 2)
+        self.__c1 = self._precision.real(1.0 / (2.0 * self._beam.dr ** 2))
         self.__c2 = 1.0 / (4.0 * self._beam.dr)
-        self.__c3 = 2j * self._beam.medium.k_0
+        self.__c3 = self._precision.complex(2j * self._beam.medium.k_0)
 
-        self.__alpha = zeros(shape=(self._beam.n_r,), dtype=complex64)
-        self.__beta = zeros(shape=(self._beam.n_r,), dtype=complex64)
-        self.__gamma = zeros(shape=(self._beam.n_r,), dtype=complex64)
-        self.__vx = zeros(shape=(self._beam.n_r,), dtype=complex64)  # array responsible for accounting topological
-                                                                     # charge
+        self.__alpha = zeros(shape=(self._beam.n_r,), dtype=complex_dtype)
+        self.__beta = zeros(shape=(self._beam.n_r,), dtype=complex_dtype)
+        self.__gamma = zeros(shape=(self._beam.n_r,), dtype=complex_dtype)
+        self.__vx = zeros(shape=(self._beam.n_r,), dtype=complex_dtype)  # array responsible for accounting topological
+                                                                         # charge
 
         for i in range(1, self._beam.n_r - 1):
             self.__alpha[i] = self.__c1 + self.__c2 / self._beam.rs[i]
@@ -55,11 +76,11 @@ class SweepDiffractionExecutorR(DiffractionExecutor):
             self.__vx[i] = (self._beam.m / self._beam.rs[i]) ** 2  # topological charge accounting
 
         self.__kappa_left, self.__mu_left, self.__kappa_right, self.__mu_right = \
-            1.0, 0.0, 0.0, 0.0
+            (self._precision.complex(e) for e in (1.0, 0.0, 0.0, 0.0))
 
-        self.__delta = zeros(shape=(self._beam.n_r,), dtype=complex64)
-        self.__xi = zeros(shape=(self._beam.n_r,), dtype=complex64)
-        self.__eta = zeros(shape=(self._beam.n_r,), dtype=complex64)
+        self.__delta = zeros(shape=(self._beam.n_r,), dtype=complex_dtype)
+        self.__xi = zeros(shape=(self._beam.n_r,), dtype=complex_dtype)
+        self.__eta = zeros(shape=(self._beam.n_r,), dtype=complex_dtype)
 
     @property
     def info(self):
@@ -67,15 +88,15 @@ class SweepDiffractionExecutorR(DiffractionExecutor):
 
     @staticmethod
     @jit(nopython=True)
-    def __fast_process(field, n_r, dz, c1, c3, alpha, beta, gamma, delta, xi, eta, vx,
-                     kappa_left, mu_left, kappa_right, mu_right):
+    def _fast_process(field, n_r, dz, c1, c3, alpha, beta, gamma, delta, xi, eta, vx,
+                     kappa_left, mu_left, kappa_right, mu_right, tiny):
 
         # left boundary condition
         xi[1], eta[1] = kappa_left, mu_left
 
         # forward
         for i in range(1, n_r - 1):
-            beta[i] = 2.0 * c1 + c3 / dz + vx[i]
+            beta[i] = c1 + c1 + c3 / dz + vx[i]
             delta[i] = alpha[i] * field[i + 1] - \
                        (conj(beta[i]) - vx[i]) * field[i] + \
                        gamma[i] * field[i - 1]
@@ -87,41 +108,103 @@ class SweepDiffractionExecutorR(DiffractionExecutor):
         field[n_r - 1] = (mu_right + kappa_right * eta[n_r - 1]) / \
                          (1.0 - kappa_right * xi[n_r - 1])
 
-        # backward
+        # backward, values of the decaying tail below tiny are flushed to zero (see Precision.tiny): otherwise
+        # subnormal numbers appear in single precision within a few steps and slow down all kernels
         for j in range(n_r - 1, 0, -1):
-            field[j - 1] = xi[j] * field[j] + eta[j]
+            w = xi[j] * field[j] + eta[j]
+            if abs(w.real) < tiny and abs(w.imag) < tiny:
+                w = 0.0
+            field[j - 1] = w
 
         return field
 
+    def _sweep_arguments(self):
+        """Sweep coefficients and arrays passed to _fast_process after field, n_r and dz"""
+
+        return (self.__c1, self.__c3, self.__alpha, self.__beta, self.__gamma, self.__delta, self.__xi, self.__eta,
+                self.__vx, self.__kappa_left, self.__mu_left, self.__kappa_right, self.__mu_right,
+                self._precision.tiny)
+
     def process_diffraction(self, dz):
         """
         :param dz: current step along evolutionary coordinate z
 
         :return: None
         """
-        self._beam._field = self.__fast_process(self._beam._field, self._beam.n_r, dz, self.__c1,
-                                                self.__c3, self.__alpha, self.__beta, self.__gamma, self.__delta,
-                                                self.__xi, self.__eta, self.__vx, self.__kappa_left, self.__mu_left,
-                                                self.__kappa_right, self.__mu_right)
+        self._beam._field = self._fast_process(self._beam._field, self._beam.n_r, self._precision.real(dz),
+                                                self.__c1, self.__c3, self.__alpha, self.__beta, self.__gamma,
+                                                self.__delta, self.__xi, self.__eta, self.__vx, self.__kappa_left,
+                                                self.__mu_left, self.__kappa_right, self.__mu_right,
+                                                self._precision.tiny)
 
 
 class FourierDiffractionExecutorXY(DiffractionExecutor):
     """
     Class for modeling the diffraction of a 3-dimensional beam using fast Fourier transform in pyfftw.
-    """
 
-    MAX_NUMBER_OF_CPUS = cpu_count()  # number of threads for parallelization
+    The executor keeps the number of threads of numba parallel kernels of the step: given numba_threads or, if n_jobs
+    is not given, the tuned value of the grid within the budget of Concurrency (see default_threads). It is the setting
+    of the whole process, so it is not set by the executor: Propagator applies it for the run (see NumbaThreads),
+    None keeps the setting of the process, e.g. applied by Concurrency.apply().
+    """
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+        if self._beam.symmetry is not None:
+            raise Exception('Wrong beam: use SymmetricFourierDiffractionExecutorXY for the symmetric beam!')
+
+        # number of FFTW threads: given number, None for the tuned (or physical cores) value of the grid from
+        # the cache of the machine, 'auto' for tuning the grid with ThreadTuner if it is not in the cache
+        self._n_jobs = kwargs.get('n_jobs', None)
+        # number of threads of numba parallel kernels, by default it is taken together with n_jobs from the cache
+        self._numba_threads = kwargs.get('numba_threads', None)
+
+        if self._n_jobs is None or self._n_jobs == 'auto':
+            shape, dtype = (self._beam.n_x, self._beam.n_y), str(self._beam._field.dtype)
+            threads = auto_threads(shape, dtype) if self._n_jobs == 'auto' else default_threads(shape, dtype)
+            self._n_jobs = threads['fftw_threads']
+            if 'numba_threads' not in kwargs:
+                self._numba_threads = threads['numba_threads']
+
+        self._precision = self._beam.precision
+        self._k_xs = array(self._beam.k_xs, dtype=self._precision.real_compute_dtype)
+        self._k_ys = array(self._beam.k_ys, dtype=self._precision.real_compute_dtype)
+        self.__plans = None  # FFTW plans between field and spectrum buffers of the beam workspace
+
     @property
     def info(self):
         return 'fourier_diffraction_executor_xy'
 
+    @property
+    def n_jobs(self):
+        return self._n_jobs
+
+    @property
+    def numba_threads(self):
+        return self._numba_threads
+
+    def __get_plans(self):
+        """
+        Creates FFTW plans once, the field is moved to the aligned buffer of the workspace and is transformed in place
+
+        :return: forward and backward plans
+        """
+        workspace = self._beam.workspace
+        if self.__plans is None or not workspace.is_buffer('field', self._beam._field):
+            field = workspace.adopt('field', self._beam._field)
+            spectrum = workspace.buffer('spectrum', field.shape, field.dtype)
+            self.__plans = (FFTW(field, spectrum, axes=(0, 1), direction='FFTW_FORWARD', flags=('FFTW_ESTIMATE',),
+                                 threads=self._n_jobs),
+                            FFTW(spectrum, field, axes=(0, 1), direction='FFTW_BACKWARD', flags=('FFTW_ESTIMATE',),
+                                 threads=self._n_jobs))
+            self._beam._field = field
+
+        return self.__plans
+
     @staticmethod
-    @jit(nopython=True)
-    def __phase_increment(field_fft, n_x, n_y, k_xs, k_ys, current_lin_phase):
+    @jit(nopython=True, parallel=True)
+    def _phase_increment(field_fft, n_x, n_y, k_xs, k_ys, current_lin_phase):
         """
         :param field_fft: spatial spectrum of the field array
         :param n_x: number of points in spatial grid along x
@@ -132,11 +215,12 @@ class FourierDiffractionExecutorXY(DiffractionExecutor):
 
         :return: spatial spectrum of the field array with linear phase shift along both axes
         """
-        for i in range(n_x):
-            field_fft[i, :] *= exp(current_lin_phase * k_xs[i] ** 2)
-
-        for j in range(n_y):
-            field_fft[:, j] *= exp(current_lin_phase * k_ys[j] ** 2)
+        phases_y = exp(current_lin_phase * k_ys ** 2)
+        for i in prange(n_x):
+            phase_x = exp(current_lin_phase * k_xs[i] ** 2)
+            for j in range(n_y):
+                field_fft[i, j] *= phase_x
+                field_fft[i, j] *= phases_y[j]
 
         #field_fft *= exp(current_lin_phase * (k_xs**2 + k_ys**2))
         #
@@ -150,26 +234,322 @@ class FourierDiffractionExecutorXY(DiffractionExecutor):
 
         return field_fft
 
-    def process_diffraction(self, dz, n_jobs=MAX_NUMBER_OF_CPUS):
+    def process_diffraction(self, dz):
+        """
+        :param dz: current step along evolutionary coordinate z
+
+        :return: None
+        """
+
+        # calculation of current linear phase shift
+        current_lin_phase = self._precision.complex(0.5j * dz / self._beam.medium.k_0)
+
+        fft_obj, ifft_obj = self.__get_plans()
+
+        # forward parallel fast Fourier transform to the spectrum buffer
+        fft_obj()
+
+        # linear phase increment in place
+        self._phase_increment(fft_obj.output_array, self._beam.n_x, self._beam.n_y, self._k_xs, self._k_ys,
+                               current_lin_phase)
+
+        # backward parallel fast Fourier transform to the field buffer
+        ifft_obj()
+
+
+class SymmetricFourierDiffractionExecutorXY(DiffractionExecutor):
+    """
+    Class for modeling the diffraction of a mirror-symmetric 3-dimensional beam, which stores only the quadrant
+    of the field (see Symmetry). Real and imaginary parts of the quadrant are transformed by one real-to-real FFTW plan
+    (DCT-I or DST-I along every axis) into the real and imaginary parts of the spectrum, which is multiplied by the
+    phase factor and is transformed back by the same plan: the transforms are inverse to themselves up to the factor
+    n_x n_y, it is included in the phase factor. Memory and FFT work are about a quarter of the full grid.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__symmetry = self._beam.symmetry  # symmetry of the beam
+        if self.__symmetry is None:
+            raise Exception('Wrong beam: the beam is not symmetric!')
+
+        shape = self._beam._field.shape  # shape of the quadrant
+        self._n_jobs = kwargs.get('n_jobs', None)  # number of FFTW threads, cached or default threads if None
+        if self._n_jobs is None:
+            self._n_jobs = default_threads(shape, str(self._beam._field.dtype))['fftw_threads']
+
+        self._precision = self._beam.precision
+        self.__k_xs = (2.0 * pi / self._beam.x_max * Symmetry.nodes(self._beam.n_x, self.__symmetry.x)).astype(
+            self._precision.real_compute_dtype)
+        self.__k_ys = (2.0 * pi / self._beam.y_max * Symmetry.nodes(self._beam.n_y, self.__symmetry.y)).astype(
+            self._precision.real_compute_dtype)
+        self.__scale = self._precision.real(1.0 / (self._beam.n_x * self._beam.n_y))
+
+        # real and imaginary parts of the quadrant are transformed by one in-place plan
+        self.__parts = empty_aligned((2,) + shape, dtype=self._precision.real_dtype)
+        self.__plan = FFTW(self.__parts, self.__parts, axes=(1, 2), direction=self.__symmetry.kinds,
+                           flags=('FFTW_ESTIMATE',), threads=self._n_jobs)
+
+    @property
+    def info(self):
+        return 'symmetric_fourier_diffraction_executor_xy'
+
+    @property
+    def n_jobs(self):
+        return self._n_jobs
+
+    @staticmethod
+    @jit(nopython=True, parallel=True)
+    def __phase_increment(parts, k_xs, k_ys, current_lin_phase, scale):
+        """
+        :param parts: real and imaginary parts of the spectrum of the quadrant, updated in place
+        :param k_xs: wave vectors of the quadrant along x
+        :param k_ys: wave vectors of the quadrant along y
+        :param current_lin_phase: linear phase shift in spectral space
+        :param scale: normalization factor of the backward transform
+
+        :return: None
+        """
+        phases_y = exp(current_lin_phase * k_ys ** 2)
+        for i in prange(parts.shape[1]):
+            phase_x = scale * exp(current_lin_phase * k_xs[i] ** 2)
+            for j in range(parts.shape[2]):
+                w = (parts[0, i, j] + 1j * parts[1, i, j]) * phase_x * phases_y[j]
+                parts[0, i, j], parts[1, i, j] = w.real, w.imag
+
+    def process_diffraction(self, dz):
         """
         :param dz: current step along evolutionary coordinate z
-        :param n_jobs: number of threads for parallelization
 
         :return: None
         """
 
         # calculation of current linear phase shift
-        current_lin_phase = 0.5j * dz / self._beam.medium.k_0
+        current_lin_phase = self._precision.complex(0.5j * dz / self._beam.medium.k_0)
+
+        field = self._beam._field
+        self.__parts[0], self.__parts[1] = field.real, field.imag
+        self.__plan.execute()
+        self.__phase_increment(self.__parts, self.__k_xs, self.__k_ys, current_lin_phase, self.__scale)
+        self.__plan.execute()
+        field.real, field.imag = self.__parts[0], self.__parts[1]
+
+
+class DistributedFourierDiffractionExecutorXY(FourierDiffractionExecutorXY):
+    """
+    Class for modeling the diffraction of a 3-dimensional beam distributed between processes of SlabPool.
+    The 2-dimensional FFT is processed slab by slab with transpose (see SlabPool).
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__pool = kwargs['pool']  # pool of processes which own slabs of the field
+
+    @property
+    def info(self):
+        return 'distributed_fourier_diffraction_executor_xy'
+
+    @property
+    def n_jobs(self):
+        """Workers of SlabPool transform their slabs in one thread"""
+        return 1
+
+    def process_diffraction(self, dz):
+        """
+        :param dz: current step along evolutionary coordinate z
+
+        :return: None
+        """
+
+        self.__pool.process_diffraction(self._precision.complex(0.5j * dz / self._beam.medium.k_0))
+
+
+class OutOfCoreFourierDiffractionExecutorXY(DistributedFourierDiffractionExecutorXY):
+    """
+    Class for modeling the diffraction of a 3-dimensional beam, which field lives in the memory-mapped file.
+    The 2-dimensional FFT is processed by passes over row and column tiles (see OutOfCorePool).
+    """
+
+    def __init__(self, **kwargs):
+        if kwargs['beam'].memmap_dir is None:
+            raise Exception('Wrong beam: the field is not out of core!')
+        super().__init__(pool=kwargs['beam'].slab_pool, **kwargs)
+
+    @property
+    def info(self):
+        return 'out_of_core_fourier_diffraction_executor_xy'
+
+    @property
+    def n_jobs(self):
+        return self._beam.slab_pool.n_jobs
+
+
+class TemporalDispersion:
+    """
+    Class for accounting group-velocity dispersion of the time-resolved beam. The field is transformed with FFT along
+    the temporal axis (axis 0) in chunks of n_chunk columns of the spatial axis 1, so the scratch memory is limited
+    by the chunk size. FFT plans are created once for every chunk shape.
+
+    If full_dispersion is True, the quadratic approximation is replaced by the full dispersion of the medium
+    D(\omega) = k(\omega_0 + \omega) - k_0 - k_1 \omega evaluated on the frequency grid (see Medium.dispersion).
+
+    LATEX SYNTAX:
+    \frac{\partial A}{\partial z} = \frac{i k_2}{2} \frac{\partial^2 A}{\partial t^2}
+    -->
+    A(\omega, z + dz) = A(\omega, z) \exp \biggl\{ -\frac{i k_2}{2} \omega^2 dz \biggr\}
+    """
+
+    def __init__(self, **kwargs):
+        self.__beam = kwargs['beam']
+        self.__n_chunk = kwargs.get('n_chunk', 64)  # number of columns along axis 1 transformed at once
+        self.__n_jobs = kwargs.get('n_jobs', 1)  # number of threads for parallelization
+        self.__full_dispersion = kwargs.get('full_dispersion', False)  # use full k(w) or only k_2
+
+        self.__precision = self.__beam.precision
+        medium, omegas = self.__beam.medium, array(self.__beam.omegas)
+        if self.__full_dispersion:
+            k = medium.dispersion(medium.omega + omegas)[1]
+            self.__operator = k - medium.k_0 - medium.k_1 * omegas
+        else:
+            self.__operator = 0.5 * medium.k_2 * omegas ** 2
+        self.__plans = {}
+
+    @property
+    def full_dispersion(self):
+        return self.__full_dispersion
+
+    @property
+    def parameters(self):
+        return {'n_chunk': self.__n_chunk, 'full_dispersion': self.__full_dispersion}
+
+    def __get_plans(self, chunk):
+        if chunk.shape not in self.__plans:
+            fft_obj = fft(chunk, axis=0, threads=self.__n_jobs)
+            ifft_obj = ifft(fft_obj.output_array, axis=0, threads=self.__n_jobs)
+            self.__plans[chunk.shape] = fft_obj, ifft_obj
+
+        return self.__plans[chunk.shape]
+
+    def process_dispersion(self, dz):
+        """
+        :param dz: current step along evolutionary coordinate z
+
+        :return: None
+        """
+        field = self.__beam._field
+        phase = exp(-1j * self.__operator * dz).astype(self.__precision.complex_dtype)
+
+        for start in range(0, field.shape[1], self.__n_chunk):
+            chunk = field[:, start:start + self.__n_chunk]
+            fft_obj, ifft_obj = self.__get_plans(chunk)
+            spectrum = fft_obj(chunk)
+            self.__multiply_rows(spectrum.reshape(spectrum.shape[0], -1), phase)
+            field[:, start:start + self.__n_chunk] = ifft_obj(spectrum)
+
+    @staticmethod
+    @jit(nopython=True)
+    def __multiply_rows(spectrum, phase):
+        """Multiplies every row of the spectrum by the phase factor of its frequency in place"""
+        for i in range(spectrum.shape[0]):
+            for j in range(spectrum.shape[1]):
+                spectrum[i, j] *= phase[i]
+
+
+class SweepDiffractionExecutorRT(SweepDiffractionExecutorR):
+    """
+    Class for modeling the diffraction and group-velocity dispersion of a time-resolved 3-dimensional beam in
+    axisymmetric approximation. Diffraction is processed with the sweep slice by slice along t, dispersion is
+    processed with chunked FFT along t.
+    """
 
-        # forward parallel fast Fourier transform
-        fft_obj = fft2(self._beam._field, threads=n_jobs)
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__dispersion = TemporalDispersion(beam=self._beam,
+                                               n_chunk=kwargs.get('n_chunk', 256),
+                                               n_jobs=kwargs.get('n_jobs', 1),
+                                               full_dispersion=kwargs.get('full_dispersion', False))
 
-        # linear phase increment
-        field_fft = self.__phase_increment(fft_obj(), self._beam.n_x, self._beam.n_y, array(self._beam.k_xs),
-                                           array(self._beam.k_ys), current_lin_phase)
+    @property
+    def info(self):
+        return 'sweep_diffraction_executor_rt'
 
-        # backward parallel fast Fourier transform
-        ifft_obj = ifft2(field_fft, threads=n_jobs)
+    @property
+    def parameters(self):
+        return dict(super().parameters, dispersion=self.__dispersion.parameters)
 
-        # field initialization with updated values
-        self._beam._field = ifft_obj()
+    def process_diffraction(self, dz):
+        """
+        :param dz: current step along evolutionary coordinate z
+
+        :return: None
+        """
+        field = self._beam._field
+        for k in range(field.shape[0]):
+            self._process_slice(field[k], dz)
+
+        self.__dispersion.process_dispersion(dz)
+
+    def _process_slice(self, field_slice, dz):
+        """Sweep for one time slice of the field, the slice is updated in place"""
+
+        self._fast_process(field_slice, self._beam.n_r, self._precision.real(dz), *self._sweep_arguments())
+
+
+class FourierDiffractionExecutorXYT(FourierDiffractionExecutorXY):
+    """
+    Class for modeling the diffraction and group-velocity dispersion of a time-resolved 3-dimensional beam using fast
+    Fourier transform in pyfftw. Diffraction is processed with batched 2-dimensional FFT plans over chunks of n_chunk
+    time slices, dispersion is processed with chunked FFT along t.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__n_chunk = kwargs.get('n_chunk', 8)  # number of time slices transformed at once
+
+        self.__plans = {}
+
+        self.__dispersion = TemporalDispersion(beam=self._beam,
+                                               n_chunk=kwargs.get('n_chunk_dispersion', 16),
+                                               n_jobs=self._n_jobs,
+                                               full_dispersion=kwargs.get('full_dispersion', False))
+
+    @property
+    def info(self):
+        return 'fourier_diffraction_executor_xyt'
+
+    @property
+    def parameters(self):
+        return dict(super().parameters, n_chunk=self.__n_chunk, dispersion=self.__dispersion.parameters)
+
+    def __get_plans(self, chunk):
+        if chunk.shape not in self.__plans:
+            fft_obj = fftn(chunk, axes=(1, 2), threads=self._n_jobs)
+            ifft_obj = ifftn(fft_obj.output_array, axes=(1, 2), threads=self._n_jobs)
+            self.__plans[chunk.shape] = fft_obj, ifft_obj
+
+        return self.__plans[chunk.shape]
+
+    def process_diffraction(self, dz):
+        """
+        :param dz: current step along evolutionary coordinate z
+
+        :return: None
+        """
+
+        # calculation of current linear phase shift
+        current_lin_phase = self._precision.complex(0.5j * dz / self._beam.medium.k_0)
+
+        field = self._beam._field
+        for start in range(0, field.shape[0], self.__n_chunk):
+            chunk = field[start:start + self.__n_chunk]
+            fft_obj, ifft_obj = self.__get_plans(chunk)
+            spectrum = fft_obj(chunk)
+            for k in range(spectrum.shape[0]):
+                self._phase_increment(spectrum[k], self._beam.n_x, self._beam.n_y, self._k_xs, self._k_ys,
+                                      current_lin_phase)
+            field[start:start + self.__n_chunk] = ifft_obj(spectrum)
+
+        self.__dispersion.process_dispersion(dz)
@@ -0,0 +1,268 @@
+from multiprocessing import get_context, cpu_count
+from multiprocessing.shared_memory import SharedMemory
+from numpy import ndarray, array, array_split, exp, max as maximum, sum as summ
+from pyfftw.builders import fft, ifft
+
+from .threads import Concurrency, apply_concurrency
+
+
+def _slab_bounds(n, n_slabs):
+    """Boundaries of n_slabs contiguous slabs of n points"""
+
+    bounds, start = [], 0
+    for part in array_split(range(n), n_slabs):
+        bounds.append((start, start + len(part)))
+        start += len(part)
+
+    return bounds
+
+
+def _slab_worker(conn, names, n_x, n_y, rows, cols, k_xs_squared, k_ys_squared, complex_dtype, real_dtype,
+                 accumulator_dtype, concurrency):
+    """
+    Worker process which owns the slab of rows rows[0]:rows[1] of the field (and of the intensity) and the slab
+    of columns cols[0]:cols[1] of the transposed field. Commands are received from the pipe, every command is answered
+    when the worker has finished its part, so the answers of all workers act as a barrier. The worker keeps
+    to its share of the thread budget of the parent process (see Concurrency).
+    """
+
+    apply_concurrency(concurrency)
+
+    blocks = [SharedMemory(name=name) for name in names]
+    field = ndarray((n_x, n_y), dtype=complex_dtype, buffer=blocks[0].buf)
+    transposed = ndarray((n_y, n_x), dtype=complex_dtype, buffer=blocks[1].buf)
+    intensity = ndarray((n_x, n_y), dtype=real_dtype, buffer=blocks[2].buf)
+
+    r_0, r_1 = rows
+    c_0, c_1 = cols
+
+    # FFT plans are created once for slab shapes
+    fft_rows = fft(field[r_0:r_1], axis=1, threads=1)
+    ifft_rows = ifft(fft_rows.output_array, axis=1, threads=1)
+    fft_cols = fft(transposed[c_0:c_1], axis=1, threads=1)
+    ifft_cols = ifft(fft_cols.output_array, axis=1, threads=1)
+
+    try:
+        while True:
+            command, parameter = conn.recv()
+
+            if command == 'stop':
+                break
+
+            elif command == 'rows_forward':
+                # FFT along y of own rows, phase along y and transpose to the column layout
+                spectrum = fft_rows(field[r_0:r_1])
+                spectrum *= exp(parameter * k_ys_squared)
+                transposed[:, r_0:r_1] = spectrum.T
+                conn.send(None)
+
+            elif command == 'columns':
+                # FFT along x of own columns, phase along x and inverse FFT along x
+                spectrum = fft_cols(transposed[c_0:c_1])
+                spectrum *= exp(parameter * k_xs_squared)
+                transposed[c_0:c_1] = ifft_cols(spectrum)
+                conn.send(None)
+
+            elif command == 'rows_backward':
+                # transpose back to own rows and inverse FFT along y
+                field[r_0:r_1] = ifft_rows(transposed[:, r_0:r_1].T)
+                conn.send(None)
+
+            elif command == 'kerr':
+                field[r_0:r_1] *= exp(parameter * intensity[r_0:r_1])
+                conn.send(None)
+
+            elif command == 'intensity':
+                slab, intensity_slab = field[r_0:r_1], intensity[r_0:r_1]
+                intensity_slab[:] = slab.real**2 + slab.imag**2
+                conn.send((float(maximum(intensity_slab)), float(summ(intensity_slab, dtype=accumulator_dtype))))
+
+            else:
+                raise Exception('Wrong command!')
+    finally:
+        del field, transposed, intensity
+        for block in blocks:
+            block.close()
+
+
+class SlabPool:
+    """
+    Class for distributed propagation of the beam with spatial coordinates x and y on one node. The field and the
+    intensity are moved to shared memory and split into slabs of rows between n_workers processes. The 2-dimensional
+    FFT is distributed by transpose: every worker transforms its rows along y and writes them to the transposed
+    buffer, then transforms its columns along x, after which the result is transposed back. Kerr effect and intensity
+    are processed by workers slab by slab, the peak intensity and the power are reduced over slabs.
+
+    Since the arrays are shared, the beam object keeps working in the main process (diagnostics, visualization,
+    snapshots), gather returns the cropped copy of the global array.
+
+    Usage:
+    with SlabPool(beam=beam, n_workers=4) as pool:
+        diffraction = DistributedFourierDiffractionExecutorXY(beam=beam, pool=pool)
+        kerr_effect = DistributedKerrExecutorXY(beam=beam, pool=pool)
+        ...
+    """
+
+    def __init__(self, **kwargs):
+        self.__beam = kwargs['beam']  # beam object
+        if self.__beam.info != 'beam_xy':
+            raise Exception('Wrong beam!')
+
+        self.__n_workers = kwargs.get('n_workers', cpu_count())  # number of processes
+        self.__start_method = kwargs.get('start_method', None)  # start method of processes, default of the platform
+
+        n_x, n_y = self.__beam.n_x, self.__beam.n_y
+        if self.__n_workers < 1 or self.__n_workers > min(n_x, n_y):
+            raise Exception('Wrong n_workers!')
+
+        self.__rows = _slab_bounds(n_x, self.__n_workers)
+        self.__cols = _slab_bounds(n_y, self.__n_workers)
+
+        # shared arrays follow the precision policy of the beam
+        precision = self.__beam.precision
+        complex_dtype, real_dtype = precision.complex_dtype, precision.real_dtype
+        self.__blocks = [SharedMemory(create=True, size=n_x * n_y * complex_dtype.itemsize),
+                         SharedMemory(create=True, size=n_x * n_y * complex_dtype.itemsize),
+                         SharedMemory(create=True, size=n_x * n_y * real_dtype.itemsize)]
+        self.__field = ndarray((n_x, n_y), dtype=complex_dtype, buffer=self.__blocks[0].buf)
+        self.__intensity = ndarray((n_x, n_y), dtype=real_dtype, buffer=self.__blocks[2].buf)
+
+        self.__field[:] = self.__beam._field
+        self.__intensity[:] = self.__beam._intensity
+
+        self.__power = None
+
+        context = get_context(self.__start_method)
+        k_xs_squared = array(self.__beam.k_xs, dtype=precision.real_compute_dtype)**2
+        k_ys_squared = array(self.__beam.k_ys, dtype=precision.real_compute_dtype)**2
+        names = [block.name for block in self.__blocks]
+        concurrency = Concurrency.current().split(self.__n_workers).kwargs
+
+        self.__connections, self.__processes = [], []
+        for rows, cols in zip(self.__rows, self.__cols):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_slab_worker, daemon=True,
+                                      args=(child_conn, names, n_x, n_y, rows, cols, k_xs_squared, k_ys_squared,
+                                            complex_dtype.str, real_dtype.str, precision.real_compute_dtype.str,
+                                            concurrency))
+            process.start()
+            self.__connections.append(parent_conn)
+            self.__processes.append(process)
+
+        # the beam works with shared arrays from now on
+        self.__beam._field = self.__field
+        self.__beam._intensity = self.__intensity
+        self.__beam._slab_pool = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def n_workers(self):
+        return self.__n_workers
+
+    @property
+    def rows(self):
+        return self.__rows
+
+    @property
+    def power(self):
+        """Power of the beam after the last update of intensity, [W]"""
+        return self.__power
+
+    def __broadcast(self, command, parameter=None):
+        """
+        Sends command to all workers and waits for all of them
+
+        :return: list of answers of workers
+        """
+
+        for conn in self.__connections:
+            conn.send((command, parameter))
+
+        return [conn.recv() for conn in self.__connections]
+
+    def process_diffraction(self, current_lin_phase):
+        """
+        Distributed step of diffraction in Fourier space
+
+        :param current_lin_phase: current linear phase shift 0.5j * dz / k_0
+
+        :return: None
+        """
+
+        self.__broadcast('rows_forward', current_lin_phase)
+        self.__broadcast('columns', current_lin_phase)
+        self.__broadcast('rows_backward')
+
+    def process_kerr_effect(self, current_nonlin_phase):
+        """
+        Distributed step of Kerr effect
+
+        :param current_nonlin_phase: current nonlinear phase shift
+
+        :return: None
+        """
+
+        self.__broadcast('kerr', current_nonlin_phase)
+
+    def update_intensity(self):
+        """
+        Updates intensity slab by slab and reduces peak intensity and power over slabs
+
+        :return: peak intensity in units of I_0
+        """
+
+        answers = self.__broadcast('intensity')
+        self.__power = sum(e[1] for e in answers) * self.__beam.dx * self.__beam.dy * self.__beam.i_0
+
+        return max(e[0] for e in answers)
+
+    def gather(self, quantity='intensity', remaining_central_part_coeff=1.0):
+        """
+        Gathers the central part of the global array
+
+        :param quantity: intensity or field
+        :param remaining_central_part_coeff: part of the grid along each axis
+
+        :return: copy of the cropped array
+        """
+
+        if quantity not in ('intensity', 'field'):
+            raise Exception('Wrong quantity!')
+        if remaining_central_part_coeff <= 0 or remaining_central_part_coeff > 1:
+            raise Exception('Wrong remaining_central_part_coeff!')
+
+        arr = self.__intensity if quantity == 'intensity' else self.__field
+        slices = []
+        for n in arr.shape:
+            delta = max(int(remaining_central_part_coeff / 2 * n), 1)
+            slices.append(slice(max(n // 2 - delta, 0), min(n // 2 + delta, n)))
+
+        return arr[tuple(slices)].copy()
+
+    def close(self):
+        """Stops workers, returns private copies of arrays to the beam and releases shared memory"""
+
+        if not self.__processes:
+            return
+
+        for conn in self.__connections:
+            conn.send(('stop', None))
+        for process in self.__processes:
+            process.join()
+        for conn in self.__connections:
+            conn.close()
+        self.__processes, self.__connections = [], []
+
+        self.__beam._field = self.__field.copy()
+        self.__beam._intensity = self.__intensity.copy()
+        self.__beam._slab_pool = None
+
+        del self.__field, self.__intensity
+        for block in self.__blocks:
+            block.close()
+            block.unlink()
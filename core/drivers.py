@@ -0,0 +1,206 @@
+from numba import jit
+from numpy import array, zeros, int64, float64, inf
+
+from .beam.beam import Beam
+from .beam.beam_r import BeamR
+from .diffraction import SweepDiffractionExecutorR
+from .kerr_effect import KerrExecutor
+
+
+# kernels of the step are called from the compiled loop of the driver
+_sweep = SweepDiffractionExecutorR._fast_process
+_phase_increment = KerrExecutor._phase_increment_in_place
+_phase_increment_parallel = KerrExecutor._phase_increment_in_place_parallel
+_update_intensity = Beam._update_intensity
+_update_intensity_parallel = Beam._update_intensity_parallel
+_calculate_diagnostics = BeamR._calculate_diagnostics
+
+
+class CompiledDriverR:
+    """
+    Class for the compiled multi-step driver of the beam with radial coordinate r. A step of BeamR is a few
+    microseconds of numba work, so the step by step loop of Propagator (timing wrappers, property accessors and five
+    dispatches of kernels) costs more than the step itself. The driver advances up to n_steps steps of sweep
+    diffraction, Kerr effect, intensity update, dz update and flush of the states row (with diagnostics) inside one
+    nopython call, and returns to Python only when
+
+        - an observer is due by its cadence in steps or in z,
+        - the quantity of a threshold event on peak intensity ('i_max' or 'i_max / i_0') crosses its threshold,
+          so events and the built-in stop are processed by Propagator at the same step as in the step by step loop,
+        - n_steps are done.
+
+    The arithmetic of the step is the same as of the executors, so the track and the field are the same as
+    without the driver. Other events need reduced quantities at every step and are not supported.
+
+    Usage:
+    Propagator(beam=beam, diffraction=SweepDiffractionExecutorR(beam=beam), kerr_effect=KerrExecutorR(beam=beam),
+               compiled_steps=1024, ...)
+    """
+
+    WATCHED_QUANTITIES = ('i_max', 'i_max / i_0')  # quantities of events which are checked in the compiled loop
+
+    # diagnostics calculated in the compiled loop, they are flushed to their columns of the states table
+    DIAGNOSTICS_KEYS = ('power', 'radius', 'r_peak', 'i_axis', 'energy_error')
+
+    def __init__(self, **kwargs):
+        self.__beam = kwargs['beam']  # beam object
+        self.__diffraction = kwargs['diffraction']  # diffraction object
+        self.__kerr_effect = kwargs['kerr_effect']  # kerr effect object
+        if self.__beam.info != 'beam_r' or self.__diffraction.info != 'sweep_diffraction_executor_r' or \
+                self.__kerr_effect.info != 'kerr_executor_r':
+            raise Exception('Wrong beam or executors for the compiled driver!')
+
+        self.__nonlin_phase_max = kwargs['nonlin_phase_max']  # limit of adaptive dz of Propagator, [rad]
+        self.__diagnostics_columns = self.columns(kwargs['states_columns'], kwargs.get('diagnostics_keys', []))
+
+        precision = self.__beam.precision
+        self.__tiny = precision.tiny
+        self.__rs = array(self.__beam.rs, dtype=precision.real_compute_dtype)  # grid nodes for diagnostics
+        self.__zero = precision.real(0)
+        self.__parallel = self.__beam.n_r >= self.__beam.PARALLEL_MIN_SIZE
+
+        # scratch scalars: dz of the sweep and the nonlinear phase shift are cast to the computation dtypes as
+        # in the executors
+        self.__dz = zeros(shape=(1,), dtype=precision.real_compute_dtype)
+        self.__nonlin_phase = zeros(shape=(1,), dtype=precision.complex_compute_dtype)
+
+    @property
+    def info(self):
+        return 'compiled_driver_r'
+
+    @staticmethod
+    def columns(states_columns, diagnostics_keys):
+        """
+        :param states_columns: columns of the states table of Propagator
+        :param diagnostics_keys: keys of diagnostics, they are the last columns of the table in the same order
+
+        :return: array of columns of DIAGNOSTICS_KEYS in the states table, -1 for diagnostics which are not recorded
+        """
+
+        if any(key not in CompiledDriverR.DIAGNOSTICS_KEYS for key in diagnostics_keys):
+            raise Exception('Wrong diagnostics for the compiled driver!')
+
+        offset = len(states_columns) - len(diagnostics_keys)
+        return array([offset + diagnostics_keys.index(key) if key in diagnostics_keys else -1
+                      for key in CompiledDriverR.DIAGNOSTICS_KEYS], dtype=int64)
+
+    @staticmethod
+    def watch(events):
+        """
+        :param events: events of Propagator
+
+        :return: arrays of kinds of quantities (index in WATCHED_QUANTITIES), thresholds and directions (+1 above,
+        -1 below) of events which can still fire
+        """
+
+        kinds, thresholds, directions = [], [], []
+        for event in events:
+            if event.info != 'threshold_event' or event.quantity not in CompiledDriverR.WATCHED_QUANTITIES:
+                raise Exception('Wrong event "%s" for the compiled driver!' % event.name)
+            if event.active:
+                kinds.append(CompiledDriverR.WATCHED_QUANTITIES.index(event.quantity))
+                thresholds.append(event.threshold)
+                directions.append(1 if event.direction == 'above' else -1)
+
+        return array(kinds, dtype=int64), array(thresholds, dtype=float64), array(directions, dtype=int64)
+
+    @staticmethod
+    @jit(nopython=True)
+    def _advance(field, intensity, states_arr, n_step, n_steps, z, dz, z_stop, const_dz, n_r, sweep_arguments,
+                 dz_scratch, nonlin_phase_const, nonlin_phase_scratch, parallel, maxima, tiny, i_0, k_0, n_0, n_2,
+                 nonlin_phase_max, diagnostics, diagnostics_columns, rs, dr, zero, power_0, kinds, thresholds,
+                 directions):
+        """
+        Advances the beam by up to n_steps steps and flushes states rows n_step + 1, ...
+
+        :param n_step: number of the last done step
+        :param n_steps: maximum number of steps
+        :param z_stop: the loop is left after the step which reaches z_stop
+        :param sweep_arguments: coefficients and arrays of the sweep (see SweepDiffractionExecutorR)
+        :param diagnostics: flush diagnostics of the beam and energy error (relative to power_0) or not
+        :param diagnostics_columns: columns of DIAGNOSTICS_KEYS in the states table, -1 if they are not recorded
+        :param kinds: watched quantities of events (0 for i_max, 1 for i_max / i_0)
+        :param thresholds: thresholds of events
+        :param directions: directions of events (+1 above, -1 below)
+
+        :return: number of the last done step, z, dz and peak intensity in units of I_0
+        """
+
+        i_max_rel = 0.0
+        for _ in range(n_steps):
+            # diffraction
+            dz_scratch[0] = dz
+            _sweep(field, n_r, dz_scratch[0], *sweep_arguments)
+
+            # kerr effect
+            nonlin_phase_scratch[0] = nonlin_phase_const * dz
+            if parallel:
+                _phase_increment_parallel(field, intensity, nonlin_phase_scratch[0])
+            else:
+                _phase_increment(field, intensity, nonlin_phase_scratch[0])
+
+            z += dz
+
+            # intensity and dz
+            if parallel:
+                i_max_rel = _update_intensity_parallel(field, intensity, maxima, tiny)
+            else:
+                i_max_rel = _update_intensity(field, intensity, tiny)
+            i_max = i_max_rel * i_0
+            if not const_dz:
+                nonlin_phase = k_0 * n_2 * i_max * dz / n_0
+                if nonlin_phase > nonlin_phase_max:
+                    dz *= 0.8 * nonlin_phase_max / nonlin_phase
+
+            # states row
+            n_step += 1
+            states_arr[n_step, 0] = z
+            states_arr[n_step, 1] = dz
+            states_arr[n_step, 2] = i_max / i_0
+            states_arr[n_step, 3] = i_max
+            if diagnostics:
+                power, radius, r_peak, i_axis = _calculate_diagnostics(intensity, rs, dr, zero)
+                values = (power * i_0, radius, r_peak, i_axis * i_0, power * i_0 / power_0 - 1.0)
+                for k in range(diagnostics_columns.shape[0]):
+                    if diagnostics_columns[k] >= 0:
+                        states_arr[n_step, diagnostics_columns[k]] = values[k]
+
+            # return to Python at the cadence in z or if an event may fire
+            if z >= z_stop:
+                break
+            fire = False
+            for k in range(kinds.shape[0]):
+                value = i_max if kinds[k] == 0 else i_max / i_0
+                if directions[k] > 0 and value > thresholds[k] or directions[k] < 0 and value < thresholds[k]:
+                    fire = True
+            if fire:
+                break
+
+        return n_step, z, dz, i_max_rel
+
+    def advance(self, states_arr, n_step, n_steps, z, dz, const_dz, z_stop=inf, events=(), power_0=None):
+        """
+        :param states_arr: states table of Propagator, it must have rows up to n_step + n_steps
+        :param n_step: number of the last done step
+        :param n_steps: maximum number of steps
+        :param z: evolutionary coordinate z
+        :param dz: current step along z
+        :param const_dz: use constant step along z or not
+        :param z_stop: the driver returns after the step which reaches z_stop
+        :param events: events of Propagator, the driver returns after the step at which one of them may fire
+        :param power_0: initial power for energy error, [W], diagnostics are not flushed if None
+
+        :return: number of the last done step, z and dz
+        """
+
+        beam, medium = self.__beam, self.__beam.medium
+        kinds, thresholds, directions = self.watch(events)
+        n_step, z, dz, i_max_rel = self._advance(
+            beam._field, beam._intensity, states_arr, n_step, n_steps, z, dz, z_stop, const_dz, beam.n_r,
+            self.__diffraction._sweep_arguments(), self.__dz, self.__kerr_effect.nonlin_phase_const,
+            self.__nonlin_phase, self.__parallel, beam._chunk_maxima(), self.__tiny, beam.i_0, medium.k_0,
+            medium.n_0, medium.n_2, self.__nonlin_phase_max, power_0 is not None, self.__diagnostics_columns,
+            self.__rs, beam.dr, self.__zero, power_0 or 1.0, kinds, thresholds, directions)
+        beam._i_max = i_max_rel * beam.i_0
+
+        return n_step, z, dz
@@ -0,0 +1,202 @@
+from abc import ABCMeta, abstractmethod
+from collections import deque
+
+
+class Event(metaclass=ABCMeta):
+    """
+    Abstract class for event object.
+    The event is evaluated by Propagator at every step on cheap reduced quantities of the beam (see
+    Propagator.REDUCED_QUANTITIES). When the event fires, Propagator performs its action:
+    'stop'       ->  calculations are stopped,
+    'cadence'    ->  frequency of plotting beam is changed to plot_beam_every,
+    'checkpoint' ->  field is saved to the checkpoints directory.
+    All fired events are recorded in the track.
+    """
+
+    ACTIONS = ('stop', 'cadence', 'checkpoint')
+
+    def __init__(self, **kwargs):
+        self._quantity = kwargs['quantity']  # name of reduced quantity to be checked
+        self._action = kwargs.get('action', 'stop')  # action performed when the event fires
+        if self._action not in self.ACTIONS:
+            raise Exception('Wrong action!')
+
+        self._name = kwargs.get('name', self.info)  # name of event in track
+        self._once = kwargs.get('once', True)  # event can fire only once or at every step where condition is true
+
+        self._plot_beam_every = kwargs.get('plot_beam_every', None)  # new frequency of plotting beam
+        if self._action == 'cadence' and not self._plot_beam_every:
+            raise Exception('Event with cadence action needs plot_beam_every!')
+
+        self._fired = False  # state of the run, it is cleared by reset
+
+    @abstractmethod
+    def info(self):
+        """Event type"""
+
+    @abstractmethod
+    def _condition(self, value):
+        """Returns True if the event must fire for the current value of quantity"""
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def quantity(self):
+        return self._quantity
+
+    @property
+    def action(self):
+        return self._action
+
+    @property
+    def plot_beam_every(self):
+        return self._plot_beam_every
+
+    @property
+    def active(self):
+        """False if the event has fired once and can not fire any more"""
+        return not (self._once and self._fired)
+
+    @property
+    def parameters(self):
+        """Parameters which define the event, subclasses extend them"""
+        return {'event': self.info,
+                'name': self._name,
+                'quantity': self._quantity,
+                'action': self._action,
+                'once': self._once,
+                'plot_beam_every': self._plot_beam_every}
+
+    def reset(self):
+        """Clears the state of the run, Propagator calls it at the start of every run, so the event can be reused"""
+        self._fired = False
+
+    def check(self, state):
+        """
+        :param state: dict with reduced quantities for the current step
+
+        :return: True if the event fires
+        """
+        if self._once and self._fired:
+            return False
+
+        if self._quantity not in state:
+            raise Exception('Wrong quantity "%s" in event!' % self._quantity)
+
+        if self._condition(state[self._quantity]):
+            self._fired = True
+            return True
+
+        return False
+
+
+class ThresholdEvent(Event):
+    """
+    Fires when the quantity is beyond the threshold (above it if direction='above' and below it if direction='below').
+    The quantity is compared with the threshold at every step, there is no detection of the crossing from the previous
+    value, so the event also fires at the first step if the initial value is already beyond the threshold.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__threshold = kwargs['threshold']
+        self.__direction = kwargs.get('direction', 'above')
+        if self.__direction not in ('above', 'below'):
+            raise Exception('Wrong direction!')
+
+    @property
+    def info(self):
+        return 'threshold_event'
+
+    @property
+    def threshold(self):
+        return self.__threshold
+
+    @property
+    def direction(self):
+        return self.__direction
+
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'threshold': self.__threshold, 'direction': self.__direction})
+        return parameters
+
+    def _condition(self, value):
+        if self.__direction == 'above':
+            return value > self.__threshold
+        else:
+            return value < self.__threshold
+
+
+class RelativeChangeEvent(Event):
+    """
+    Fires when the quantity deviates from its value at the first check by more than rel_change
+    (for example, power loss through boundaries or numerical energy drift)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__rel_change = kwargs['rel_change']
+        self.__initial_value = None
+
+    @property
+    def info(self):
+        return 'relative_change_event'
+
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'rel_change': self.__rel_change})
+        return parameters
+
+    def reset(self):
+        super().reset()
+        self.__initial_value = None
+
+    def _condition(self, value):
+        if self.__initial_value is None:
+            self.__initial_value = value
+            return False
+
+        return abs(value / self.__initial_value - 1.0) > self.__rel_change
+
+
+class StabilizationEvent(Event):
+    """
+    Fires when the quantity has not changed by more than rel_tol during the last n_steps steps
+    (for example, ring breakup is over and the number of filaments is stabilized)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__n_steps = kwargs['n_steps']
+        self.__rel_tol = kwargs['rel_tol']
+        self.__values = deque(maxlen=self.__n_steps + 1)
+
+    @property
+    def info(self):
+        return 'stabilization_event'
+
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'n_steps': self.__n_steps, 'rel_tol': self.__rel_tol})
+        return parameters
+
+    def reset(self):
+        super().reset()
+        self.__values.clear()
+
+    def _condition(self, value):
+        self.__values.append(value)
+        if len(self.__values) <= self.__n_steps:
+            return False
+
+        v_min, v_max = min(self.__values), max(self.__values)
+        return v_max - v_min <= self.__rel_tol * max(abs(v_max), abs(v_min))
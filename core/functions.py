@@ -1,4 +1,4 @@
-from numpy import sqrt, transpose, zeros, float64, complex64, pi
+from numpy import sqrt, transpose, zeros, pi
 from scipy.special import gamma
 from numba import jit
 from glob import glob
@@ -40,6 +40,7 @@ def parse_args():
     parser.add_argument('--global_results_dir_name')
     parser.add_argument('--prefix')
     parser.add_argument('--insert_datetime', default=True)
+    parser.add_argument('--precision', default='mixed', choices=['single', 'mixed', 'double'])
 
     return parser.parse_args()
 
@@ -49,11 +50,23 @@ def xlsx_to_df(path_to_xlsx, normalize_z_to=10**2, normalize_i_to=10**17):
 
     df = pd.read_excel(path_to_xlsx)
 
+    return normalize_track_df(df, normalize_z_to, normalize_i_to)
+
+
+def normalize_track_df(df, normalize_z_to=10**2, normalize_i_to=10**17):
+    """
+    Normalizes z, dz, i_max and i_axis (if diagnostics are recorded) columns of track dataframe in the same way
+    as xlsx_to_df
+    """
+
     df['z, m'] *= normalize_z_to
     df['dz, m'] *= normalize_z_to
     df['i_max, W / m^2'] /= normalize_i_to
+    if 'i_axis, W / m^2' in df:
+        df['i_axis, W / m^2'] /= normalize_i_to
 
-    df = df.rename(index=str, columns={'z, m': 'z_normalized', 'dz, m': 'dz_normalized', 'i_max, W / m^2': 'i_max_normalized'})
+    df = df.rename(index=str, columns={'z, m': 'z_normalized', 'dz, m': 'dz_normalized', 'i_max, W / m^2': 'i_max_normalized',
+                                       'i_axis, W / m^2': 'i_axis_normalized'})
 
     return df
 
@@ -109,32 +122,62 @@ def linear_approximation_real(x, x1, y1, x2, y2):
 
 @jit(nopython=True)
 def r_to_xy_real(r_slice):
-    """Converts 1D array with data along radius-vector r to 2D array with axially symmetric data (x,y)"""
+    """
+    Converts 1D array with data along radius-vector r to 2D array with axially symmetric data (x,y) of the same dtype
+    """
+
+    n_r = len(r_slice)
+    arr = zeros(shape=(2 * n_r, 2 * n_r), dtype=r_slice.dtype)
+    r_to_xy_real_in_place(r_slice, arr)
+    return arr
+
+
+@jit(nopython=True)
+def r_to_xy_real_in_place(r_slice, arr):
+    """
+    Converts 1D array with data along radius-vector r to preallocated 2D array arr (2 n_r x 2 n_r) with axially
+    symmetric data (x,y)
+    """
 
     n_r = len(r_slice)
     n_x, n_y = 2 * n_r, 2 * n_r
-    arr = zeros(shape=(n_x, n_y), dtype=float64)
     for i in range(n_x):
         for j in range(n_y):
             r = sqrt((i - n_x / 2.) ** 2 + (j - n_y / 2.) ** 2)
             if int(r) < n_r - 1:
                 arr[i, j] = linear_approximation_real(r, int(r), r_slice[int(r)], int(r) + 1, r_slice[int(r) + 1])
-    return arr
+            else:
+                arr[i, j] = 0
 
 
 @jit(nopython=True)
 def r_to_xy_complex(r_slice):
-    """Converts 1D array with data along radius-vector r to 2D array with axially symmetric data (x,y)"""
+    """
+    Converts 1D array with data along radius-vector r to 2D array with axially symmetric data (x,y) of the same dtype
+    """
+
+    n_r = len(r_slice)
+    arr = zeros(shape=(2 * n_r, 2 * n_r), dtype=r_slice.dtype)
+    r_to_xy_complex_in_place(r_slice, arr)
+    return arr
+
+
+@jit(nopython=True)
+def r_to_xy_complex_in_place(r_slice, arr):
+    """
+    Converts 1D array with data along radius-vector r to preallocated 2D array arr (2 n_r x 2 n_r) with axially
+    symmetric data (x,y)
+    """
 
     n_r = len(r_slice)
     n_x, n_y = 2 * n_r, 2 * n_r
-    arr = zeros(shape=(n_x, n_y), dtype=complex64)
     for i in range(n_x):
         for j in range(n_y):
             r = sqrt((i - n_x / 2.) ** 2 + (j - n_y / 2.) ** 2)
             if int(r) < n_r - 1:
                 arr[i, j] = linear_approximation_complex(r, int(r), r_slice[int(r)], int(r) + 1, r_slice[int(r) + 1])
-    return arr
+            else:
+                arr[i, j] = 0
 
 
 def make_paths(global_root_dir, global_results_dir_name, prefix, insert_datetime=True):
@@ -191,7 +234,7 @@ def make_animation(root_dir, name, images_dir='images', fps=10):
     """Makes gif-animation from series of pictures"""
 
     images_for_animation = []
-    for file in glob(root_dir + '/' + images_dir + '/*'):
+    for file in sorted(glob(root_dir + '/' + images_dir + '/*')):
         images_for_animation.append(imageio.imread(file))
     imageio.mimsave(root_dir + '/' + name + '.gif', images_for_animation, fps=fps)
 
@@ -200,7 +243,7 @@ def make_video(root_dir, name, images_dir='images', fps=10):
     """Makes video from series of pictures"""
 
     images_for_video = []
-    for file in glob(root_dir + '/' + images_dir + '/*'):
+    for file in sorted(glob(root_dir + '/' + images_dir + '/*')):
         images_for_video.append(cv2.imread(file))
 
     height, width, leyers = images_for_video[0].shape
@@ -211,7 +254,6 @@ def make_video(root_dir, name, images_dir='images', fps=10):
     for img in images_for_video:
         video.write(cv2.resize(img, (width, height)))
 
-    cv2.destroyAllWindows()
     video.release()
 
 
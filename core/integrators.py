@@ -0,0 +1,170 @@
+from abc import ABCMeta, abstractmethod
+from numba import jit
+
+
+class Integrator(metaclass=ABCMeta):
+    """
+    Abstract class for integrator object.
+    The integrator makes one step of the propagation along z using the diffraction object for the linear part
+    of the equation and the Kerr effect object for the nonlinear part. If Propagator gets no integrator,
+    the step is made with Lie splitting: diffraction, then Kerr effect.
+
+    The adaptive step along z (const_dz=False in Propagator) is limited by the maximum Kerr phase incursion
+    of the step, the limit depends on the order of the integrator (see NONLIN_PHASE_MAX).
+    """
+
+    NONLIN_PHASE_MAX = 0.05  # default maximum Kerr phase incursion of the step of adaptive dz, [rad]
+
+    def __init__(self, **kwargs):
+        self._beam = kwargs['beam']  # beam object
+        self._diffraction = kwargs['diffraction']  # diffraction object
+        self._kerr_effect = kwargs['kerr_effect']  # kerr effect object
+        self._nonlin_phase_max = kwargs.get('nonlin_phase_max', self.NONLIN_PHASE_MAX)  # limit of adaptive dz, [rad]
+
+    @abstractmethod
+    def info(self):
+        """Integrator type"""
+
+    @property
+    def diffraction(self):
+        return self._diffraction
+
+    @property
+    def kerr_effect(self):
+        return self._kerr_effect
+
+    @property
+    def nonlin_phase_max(self):
+        return self._nonlin_phase_max
+
+    @property
+    def parameters(self):
+        """Settings which define results of the integrator, subclasses extend them"""
+        return {'info': self.info, 'nonlin_phase_max': self._nonlin_phase_max}
+
+    @abstractmethod
+    def process_step(self, dz):
+        """Process one step along evolutionary coordinate z"""
+
+
+class RK4IPIntegrator(Integrator):
+    """
+    Class for the fourth-order Runge-Kutta method in the interaction picture (RK4IP) for the equation
+    dA/dz = L A + N(A), where L is the diffraction (and dispersion) operator of the diffraction object and
+    N(A) = c |A|^2 A is the Kerr effect with c = -i r_kerr / (2 z_diff).
+
+    The linear half-steps exp(h/2 L) are made by the diffraction object on the field of the beam, so any
+    diffraction executor can be reused (Fourier executors are exact for L and the integrator is of the fourth
+    order, Crank-Nicolson sweep limits the order by the second one). Intermediate arrays are kept
+    in the workspace of the beam.
+
+    The error of the step depends on its Kerr phase incursion as its fifth power instead of the square for Lie
+    splitting, so the adaptive step is limited by the 3 times larger phase (the error of the collapsing beam is
+    about the error of Lie splitting with the default limit).
+
+    LATEX SYNTAX:
+    A_I = e^{\frac{h}{2}L} A, \quad k_1 = e^{\frac{h}{2}L} h N(A), \quad k_2 = h N(A_I + k_1 / 2),
+    k_3 = h N(A_I + k_2 / 2), \quad k_4 = h N(e^{\frac{h}{2}L}(A_I + k_3)),
+    A(z + h) = e^{\frac{h}{2}L} \biggl[ A_I + \frac{k_1}{6} + \frac{k_2}{3} + \frac{k_3}{3} \biggr] + \frac{k_4}{6}
+    """
+
+    NONLIN_PHASE_MAX = 0.15
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        if self._diffraction is None or self._kerr_effect is None:
+            raise Exception('RK4IP integrator needs diffraction and kerr_effect!')
+
+    @property
+    def info(self):
+        return 'rk4ip_integrator'
+
+    @staticmethod
+    @jit(nopython=True)
+    def __nonlinear(field, out, hc):
+        """out = h c |A|^2 A, out may be the same array as field"""
+        for i in range(field.shape[0]):
+            a = field[i]
+            out[i] = hc * (a.real**2 + a.imag**2) * a
+
+    @staticmethod
+    @jit(nopython=True)
+    def __first_stage(a_i, tmp, acc):
+        """tmp contains k_1: acc = A_I + k_1 / 6, tmp = A_I + k_1 / 2"""
+        for i in range(a_i.shape[0]):
+            k = tmp[i]
+            acc[i] = a_i[i] + k / 6
+            tmp[i] = a_i[i] + 0.5 * k
+
+    @staticmethod
+    @jit(nopython=True)
+    def __stage(a_i, tmp, acc, hc, weight_acc, weight_next):
+        """tmp contains the argument of N: k = h N(tmp), acc += weight_acc k, tmp = A_I + weight_next k"""
+        for i in range(a_i.shape[0]):
+            a = tmp[i]
+            k = hc * (a.real**2 + a.imag**2) * a
+            acc[i] += weight_acc * k
+            tmp[i] = a_i[i] + weight_next * k
+
+    @staticmethod
+    @jit(nopython=True)
+    def __final_stage(acc, k_4):
+        """acc contains the propagated sum: A = acc + k_4 / 6"""
+        for i in range(acc.shape[0]):
+            acc[i] += k_4[i] / 6
+
+    def __set_field(self, arr):
+        """Copies flat arr to the field of the beam (the field may be not contiguous, so reshape(-1) may be a copy)"""
+        field = self._beam._field
+        field[...] = arr.reshape(field.shape)
+
+    def __linear_half_step(self, arr, dz):
+        """
+        Applies exp(dz/2 L) to arr in place with the diffraction object, the field of the beam is used as register
+
+        :return: None
+        """
+        self.__set_field(arr)
+        self._diffraction.process_diffraction(0.5 * dz)
+        arr[:] = self._beam._field.reshape(-1)
+
+    def process_step(self, dz):
+        """
+        :param dz: current step along evolutionary coordinate z
+
+        :return: None
+        """
+
+        workspace = self._beam.workspace
+        shape, dtype = self._beam._field.shape, self._beam._field.dtype
+        a_i = workspace.buffer('rk4ip_a_i', shape, dtype).reshape(-1)
+        acc = workspace.buffer('rk4ip_acc', shape, dtype).reshape(-1)
+        tmp = workspace.buffer('rk4ip_tmp', shape, dtype).reshape(-1)
+
+        precision = self._beam.precision
+        hc = precision.complex(self._kerr_effect.nonlin_phase_const * dz)
+        third, half, one = precision.real(1 / 3), precision.real(0.5), precision.real(1.0)
+
+        # k_1 = exp(h/2 L) h N(A)
+        self.__nonlinear(self._beam._field.reshape(-1), tmp, hc)
+
+        # A_I = exp(h/2 L) A
+        self._diffraction.process_diffraction(0.5 * dz)
+        a_i[:] = self._beam._field.reshape(-1)
+
+        self.__linear_half_step(tmp, dz)
+
+        # k_1, k_2 and k_3
+        self.__first_stage(a_i, tmp, acc)
+        self.__stage(a_i, tmp, acc, hc, third, half)
+        self.__stage(a_i, tmp, acc, hc, third, one)
+
+        # k_4 = h N(exp(h/2 L)(A_I + k_3))
+        self.__linear_half_step(tmp, dz)
+        self.__nonlinear(tmp, tmp, hc)
+
+        # A(z + h) = exp(h/2 L)(A_I + k_1/6 + k_2/3 + k_3/3) + k_4/6
+        self.__linear_half_step(acc, dz)
+        self.__final_stage(acc, tmp)
+        self.__set_field(acc)
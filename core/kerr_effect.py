@@ -1,6 +1,6 @@
 from abc import ABCMeta, abstractmethod
-from numba import jit
-from numpy import exp, multiply
+from numba import jit, prange
+from numpy import exp, ascontiguousarray
 
 
 class KerrExecutor(metaclass=ABCMeta):
@@ -12,23 +12,41 @@ class KerrExecutor(metaclass=ABCMeta):
 
     def __init__(self, **kwargs):
         self.__beam = kwargs['beam']
+        self.__precision = self.__beam.precision  # precision policy of the beam
         self.__nonlin_phase_const = -0.5j * self.__beam.r_kerr / self.__beam.z_diff  # nonlinear Kerr phase shift const
 
     @abstractmethod
     def info(self):
         """KerrExecutor type"""
 
+    @property
+    def nonlin_phase_const(self):
+        return self.__nonlin_phase_const
+
+    @property
+    def parameters(self):
+        """Settings which define results of the executor, subclasses extend them"""
+        return {'info': self.info}
+
     @staticmethod
     @jit(nopython=True)
-    def phase_increment(field, intensity, current_nonlin_phase):
+    def _phase_increment_in_place(field, intensity, current_nonlin_phase):
         """
-        :param field: array for complex light field
-        :param intensity: array for float intensity of the field
+        :param field: flat array for complex light field, updated in place
+        :param intensity: flat array for float intensity of the field
         :param current_nonlin_phase: current nonlinear phase shift
 
-        :return: field with nonlinear incremented phase shift
+        :return: None
         """
-        return multiply(field, exp(current_nonlin_phase * intensity))
+        for i in range(field.shape[0]):
+            field[i] *= exp(current_nonlin_phase * intensity[i])
+
+    @staticmethod
+    @jit(nopython=True, parallel=True)
+    def _phase_increment_in_place_parallel(field, intensity, current_nonlin_phase):
+        """Parallel version of _phase_increment_in_place"""
+        for i in prange(field.shape[0]):
+            field[i] *= exp(current_nonlin_phase * intensity[i])
 
     def process_kerr_effect(self, dz):
         """
@@ -36,8 +54,15 @@ class KerrExecutor(metaclass=ABCMeta):
 
         :return: None
         """
-        self.__beam._field = self.phase_increment(self.__beam._field, self.__beam.intensity,
-                                                  self.__nonlin_phase_const * dz)
+        if not self.__beam._field.flags.c_contiguous:
+            self.__beam._field = ascontiguousarray(self.__beam._field)
+
+        field, intensity = self.__beam._field.reshape(-1), self.__beam.intensity.reshape(-1)
+        current_nonlin_phase = self.__precision.complex(self.__nonlin_phase_const * dz)
+        if field.shape[0] >= self.__beam.PARALLEL_MIN_SIZE:
+            self._phase_increment_in_place_parallel(field, intensity, current_nonlin_phase)
+        else:
+            self._phase_increment_in_place(field, intensity, current_nonlin_phase)
 
 
 class KerrExecutorR(KerrExecutor):
@@ -64,3 +89,72 @@ class KerrExecutorXY(KerrExecutor):
     @property
     def info(self):
         return 'kerr_executor_xy'
+
+
+class DistributedKerrExecutorXY(KerrExecutorXY):
+    """
+    Class for modeling the Kerr effect to which a 3-dimensional beam distributed between processes of SlabPool
+    is exposed
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__pool = kwargs['pool']  # pool of processes which own slabs of the field
+        self.__nonlin_phase_const = -0.5j * kwargs['beam'].r_kerr / kwargs['beam'].z_diff
+        self.__precision = kwargs['beam'].precision
+
+    @property
+    def info(self):
+        return 'distributed_kerr_executor_xy'
+
+    def process_kerr_effect(self, dz):
+        """
+        :param dz: current step along evolutionary coordinate z
+
+        :return: None
+        """
+        self.__pool.process_kerr_effect(self.__precision.complex(self.__nonlin_phase_const * dz))
+
+
+class OutOfCoreKerrExecutorXY(DistributedKerrExecutorXY):
+    """
+    Class for modeling the Kerr effect to which a 3-dimensional beam, which field lives in the memory-mapped file,
+    is exposed tile by tile (see OutOfCorePool)
+    """
+
+    def __init__(self, **kwargs):
+        if kwargs['beam'].memmap_dir is None:
+            raise Exception('Wrong beam: the field is not out of core!')
+        super().__init__(pool=kwargs['beam'].slab_pool, **kwargs)
+
+    @property
+    def info(self):
+        return 'out_of_core_kerr_executor_xy'
+
+
+class KerrExecutorRT(KerrExecutor):
+    """
+    Class for modeling the Kerr effect to which a time-resolved 3-dimensional beam in axisymmetric approximation
+    is exposed
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    @property
+    def info(self):
+        return 'kerr_executor_rt'
+
+
+class KerrExecutorXYT(KerrExecutor):
+    """
+    Class for modeling the Kerr effect to which a time-resolved 3-dimensional beam is exposed
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    @property
+    def info(self):
+        return 'kerr_executor_xyt'
@@ -2,6 +2,7 @@ from collections import OrderedDict
 from time import time
 from datetime import timedelta
 from xlsxwriter import Workbook
+from numpy import savez, array, isnan
 
 from .functions import compile_to_pdf
 
@@ -17,6 +18,7 @@ class Logger:
         self.__kerr_effect = kwargs['kerr_effect']  # kerr effect object
 
         self.__track_filename = self.__path + '/propagation.xlsx'  # full path of propagation file
+        self.__track_binary_filename = self.__path + '/propagation.npz'  # full path of binary propagation file
 
         self.__functions = OrderedDict()  # dict for calculations of functions operation time
 
@@ -24,11 +26,16 @@ class Logger:
     def track_filename(self):
         return self.__track_filename
 
-    def measure_time(self, function, args):
+    @property
+    def track_binary_filename(self):
+        return self.__track_binary_filename
+
+    def measure_time(self, function, args, name=None):
         """
 
         :param function: function object, the execution time of which must be measured
         :param args: arguments of that function
+        :param name: name of function in the log of times, function.__name__ by default
 
         :return: function result
         """
@@ -36,7 +43,7 @@ class Logger:
         res = function(*args)
         t_end = time()
         duration = t_end - t_start
-        function_name = function.__name__
+        function_name = name or function.__name__
         if function_name in self.__functions.keys():
             self.__functions[function_name] += duration
         else:
@@ -98,6 +105,10 @@ class Logger:
 \\begin{tabular}{M{5cm}M{5cm}M{5cm}}
 '''
 
+        # time-resolved beams share the spatial part of the description with spatial beams
+        time_resolved = beam.info in ('beam_rt', 'beam_xyt')
+        spatial_info = {'beam_rt': 'beam_r', 'beam_xyt': 'beam_xy'}.get(beam.info, beam.info)
+
 ##########################
 # EQUATION
 ##########################
@@ -116,20 +127,25 @@ class Logger:
         kerr_r_str = '\\frac{2 k_0^2}{n_0} n_2 I(r,z) A(r,z)'
         kerr_xy_str = '\\frac{2 k_0^2}{n_0} n_2 I(x,y,z) A(x,y,z)'
 
+        if time_resolved:
+            dispersion_str = ' - k_0 k_2 \\frac{\partial^2 A}{\partial t^2}'
+            diffraction_r_str += dispersion_str
+            diffraction_xy_str += dispersion_str
+
         equation = []
-        if beam.info == 'beam_x':
+        if spatial_info == 'beam_x':
             equation.append(left_x_str)
             if self.__diffraction is not None:
                 equation.append(diffraction_x_str)
             if self.__kerr_effect is not None:
                 equation.append(kerr_x_str)
-        elif beam.info == 'beam_r':
+        elif spatial_info == 'beam_r':
             equation.append(left_r_str)
             if self.__diffraction is not None:
                 equation.append(diffraction_r_str)
             if self.__kerr_effect is not None:
                 equation.append(kerr_r_str)
-        elif beam.info == 'beam_xy':
+        elif spatial_info == 'beam_xy':
             equation.append(left_xy_str)
             if self.__diffraction is not None:
                 equation.append(diffraction_xy_str)
@@ -159,13 +175,16 @@ class Logger:
 ##########################
 
         initial_condition_str = None
-        if beam.info == 'beam_x':
+        if spatial_info == 'beam_x':
             initial_condition_str = 'A(x,0) = A_0 \\biggl( \\frac{x}{x_0} \\biggr)^M \exp \\biggl\{ -\\frac{x^2}{2x_0^2} \\biggr\}'
-        elif beam.info == 'beam_r':
+        elif spatial_info == 'beam_r':
             initial_condition_str = 'A(r,0) = A_0 \\biggl( \\frac{r}{r_0} \\biggr)^M \exp \\biggl\{ -\\frac{r^2}{2r_0^2} \\biggr\}'
-        elif beam.info == 'beam_xy':
+        elif spatial_info == 'beam_xy':
             initial_condition_str = 'A(x,y,0) = \\biggl(1 + C \\xi(x,y)\\biggr)A_0 \\biggl(\\frac{x^2}{x_0^2}+\\frac{y^2}{y_0^2}\\biggr)^{M/2}\exp\\biggl\{-\\frac1{2}\\biggl(\\frac{x^2}{x_0^2}+\\frac{y^2}{y_0^2}\\biggr)\\biggr\}\exp\\biggl\{i m \\varphi(x,y)\\biggr\}'
 
+        if time_resolved:
+            initial_condition_str += ' \exp \\biggl\{ -\\frac{t^2}{2t_0^2} \\biggr\}'
+
         tex_file_data += \
 '''\multicolumn{3}{M{15cm}}{\\textbf{INITIAL CONDITION}} \\tabularnewline
 \\midrule[2pt]
@@ -222,23 +241,23 @@ distribution & %s & -- \\tabularnewline
 \hline
 ''' % (beam.M)
 
-        if beam.info in ('beam_r', 'beam_xy'):
+        if spatial_info in ('beam_r', 'beam_xy'):
             tex_file_data += \
 '''$m$ & %d & -- \\tabularnewline
 \hline
 ''' % (beam.m)
 
-        if beam.info == 'beam_x':
+        if spatial_info == 'beam_x':
             tex_file_data += \
 '''$x_0$ & %d & $\mu$m \\tabularnewline
 \hline
 ''' % (round(beam.x_0 * 10 ** 6))
-        elif beam.info == 'beam_r':
+        elif spatial_info == 'beam_r':
             tex_file_data += \
 '''$r_0$ & %d & $\mu$m \\tabularnewline
 \hline
 ''' % (round(beam.r_0 * 10**6))
-        elif beam.info == 'beam_xy':
+        elif spatial_info == 'beam_xy':
             tex_file_data += \
 '''$x_0$ & %d & $\mu$m \\tabularnewline
 \hline
@@ -254,7 +273,7 @@ $z_{diff}$ & %2.4f & cm \\tabularnewline
 \hline
 ''' % (beam.lmbda * 10**9, beam.z_diff * 10**2)
 
-        if beam.info in ('beam_r', 'beam_xy'):
+        if spatial_info in ('beam_r', 'beam_xy'):
             if beam.distribution_type == 'gauss' or beam.distribution_type == 'ring':
                 tex_file_data += \
 '''$P_0 / P_G$ & %.2f & -- \\tabularnewline
@@ -267,7 +286,7 @@ $z_{diff}$ & %2.4f & cm \\tabularnewline
 \hline
 ''' % (beam.p_0_to_p_vortex)
 
-            if beam.info in ('beam_r', 'beam_xy'):
+            if spatial_info in ('beam_r', 'beam_xy'):
                 tex_file_data += \
 '''$P_0$ & %.2f & MW \\tabularnewline
 \hline
@@ -279,7 +298,7 @@ $z_{diff}$ & %2.4f & cm \\tabularnewline
 $R_{kerr}$ & %.2f & -- \\tabularnewline
 ''' % (beam.i_0 * 10**-16, beam.r_kerr)
 
-        if beam.info == 'beam_xy':
+        if spatial_info == 'beam_xy':
             tex_file_data += \
 '''\hline
 C & %.2f & -- \\tabularnewline
@@ -307,7 +326,7 @@ $r_{corr}$ & %d & $\mu$m \\tabularnewline
 \\midrule[2pt]
 '''
 
-        if beam.info == 'beam_x':
+        if spatial_info == 'beam_x':
             tex_file_data += \
 '''$x_{max}$ & % d & $\mu$m \\tabularnewline
 \hline
@@ -315,7 +334,7 @@ $n_x$ & %d & -- \\tabularnewline
 \hline
 $h_x$ & %.2f & $\mu$m \\tabularnewline
 ''' % (round(beam.x_max * 10 ** 6), beam.n_x, round(beam.dx * 10 ** 6))
-        elif beam.info == 'beam_r':
+        elif spatial_info == 'beam_r':
             tex_file_data += \
 '''$r_{max}$ & % d & $\mu$m \\tabularnewline
 \hline
@@ -323,7 +342,7 @@ $n_r$ & %d & -- \\tabularnewline
 \hline
 $h_r$ & %.2f & $\mu$m \\tabularnewline
 ''' % (round(beam.r_max * 10**6), beam.n_r, round(beam.dr * 10**6))
-        elif beam.info == 'beam_xy':
+        elif spatial_info == 'beam_xy':
             tex_file_data += \
 '''$x_{max}$ & %d & $\mu$m \\tabularnewline
 \hline
@@ -341,6 +360,18 @@ $h_y$ & %.2f & $\mu$m \\tabularnewline
        round(beam.dx * 10 ** 6),
        round(beam.dy * 10 ** 6))
 
+        if time_resolved:
+            tex_file_data += \
+'''\hline
+$t_0$ & %.2f & fs \\tabularnewline
+\hline
+$t_{max}$ & %.2f & fs \\tabularnewline
+\hline
+$n_t$ & %d & -- \\tabularnewline
+\hline
+$h_t$ & %.2f & fs \\tabularnewline
+''' % (beam.t_0 * 10**15, beam.t_max * 10**15, beam.n_t, beam.dt * 10**15)
+
         tex_file_data += \
 '''\\midrule[2pt]'''
 
@@ -399,16 +430,20 @@ $I_{stop}$ & %.2f & TW/cm$^2$ \\tabularnewline
                                                                         states_arr[n_step, 3])
         print(output_string)
 
-    def log_track(self, states_arr, states_columns):
+    def log_track(self, states_arr, states_columns, events=None):
         """
-        Saves to the xlsx-document the information from states_arr with columns from states_columns
+        Saves to the xlsx-document and to the binary npz-file the information from states_arr with columns
+        from states_columns
 
         :param states_arr: array with data about propagation
         :param states_columns: columns for states array
+        :param events: list of fired events as tuples (n_step, z, name, action), saved to the separate worksheet
 
         :return: None
         """
 
+        savez(self.__track_binary_filename, states=states_arr, columns=array(states_columns))
+
         workbook = Workbook(self.__track_filename)
 
         worksheet = workbook.add_worksheet()
@@ -420,11 +455,27 @@ $I_{stop}$ & %.2f & TW/cm$^2$ \\tabularnewline
             worksheet.set_column(0, col, 30)
             worksheet.write(0, col, states_columns[col], bold)
 
+        # rows of the trunk of the branch may be unknown (NaN, see Propagator), their cells are left empty
         for row in range(states_arr.shape[0]):
             for col in range(states_arr.shape[1]):
-                if col != 3:
+                if isnan(states_arr[row, col]):
+                    continue
+                if col < 3:
                     worksheet.write(row + 1, col, states_arr[row, col], format_precise_general)
                 else:
                     worksheet.write(row + 1, col, states_arr[row, col], format_precise_intensity)
 
+        if events:
+            events_worksheet = workbook.add_worksheet('events')
+            events_columns = ['n_step', 'z, m', 'event', 'action']
+            for col in range(len(events_columns)):
+                events_worksheet.set_column(0, col, 30)
+                events_worksheet.write(0, col, events_columns[col], bold)
+
+            for row, (n_step, z, name, action) in enumerate(events):
+                events_worksheet.write(row + 1, 0, n_step)
+                events_worksheet.write(row + 1, 1, z, format_precise_general)
+                events_worksheet.write(row + 1, 2, name)
+                events_worksheet.write(row + 1, 3, action)
+
         workbook.close()
@@ -32,6 +32,14 @@ class Manager:
         self.__beam_dir_name = 'beam_and_spectrum'
         self.__beam_dir = self.results_dir + '/' + self.__beam_dir_name
 
+        self.__checkpoints_dir_name = 'checkpoints'
+        self.__checkpoints_dir = self.results_dir + '/' + self.__checkpoints_dir_name
+
+        self.__snapshots_filename = self.results_dir + '/snapshots.vsnap'
+
+        self.__run_metadata_filename = self.results_dir + '/run.json'
+        self.__catalog_filename = self.__global_results_dir + '/catalog.sqlite'
+
     @property
     def beam_dir_name(self):
         return self.__beam_dir_name
@@ -61,6 +69,9 @@ class Manager:
     def __create_beam_dir(self):
         self.create_dir(self.__beam_dir)
 
+    def create_checkpoints_dir(self):
+        self.create_dir(self.__checkpoints_dir)
+
     def create_dirs(self):
         """Creates all nessesary directories"""
 
@@ -76,3 +87,27 @@ class Manager:
     @property
     def track_dir(self):
         return self.__track_dir
+
+    @property
+    def checkpoints_dir(self):
+        return self.__checkpoints_dir
+
+    @property
+    def snapshots_filename(self):
+        return self.__snapshots_filename
+
+    @property
+    def run_metadata_filename(self):
+        return self.__run_metadata_filename
+
+    @property
+    def catalog_filename(self):
+        return self.__catalog_filename
+
+    @property
+    def global_results_dir(self):
+        return self.__global_results_dir
+
+    @property
+    def prefix(self):
+        return self.__prefix
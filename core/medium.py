@@ -1,40 +1,93 @@
-from numpy import sqrt, pi
+from collections import OrderedDict
+from hashlib import sha1
+
+from numpy import sqrt, pi, array, asarray, atleast_1d, float64, isfinite, newaxis, errstate, sum as np_sum
+
+
+# Sellmeier coefficients C_i, resonance wavelengths lambda_i, [m], and nonlinear refractive index n_2, [m^2/W],
+# of materials, new materials are added with register_material
+# it is assumed that n_2 is independent of wavelength!
+MATERIALS = {
+    'SiO2': {'C': (0.6961663000, 0.4079426000, 0.8974794000),
+             'lambdas': (0.0684043000 * 10**-6, 0.1162414000 * 10**-6, 9.8961610000 * 10**-6),
+             'n_2': 3.4 * 10**-20},
+    'CaF2': {'C': (0.5675888000, 0.4710914000, 3.8484723000),
+             'lambdas': (0.0502636050 * 10**-6, 0.1003909000 * 10**-6, 34.649040000 * 10**-6),
+             'n_2': 1.92 * 10**-20},
+    'LiF': {'C': (0.9254900000, 6.9674700000),
+            'lambdas': (0.0737600000 * 10**-6, 32.790000000 * 10**-6),
+            'n_2': 1.0 * 10**-20},
+}
+
+
+def register_material(name, C, lambdas, n_2, overwrite=False):
+    """
+    Adds material with the Sellmeier formula n^2 = 1 + \sum_i C_i \lambda^2 / (\lambda^2 - \lambda_i^2) to the registry
+
+    :param name: name of material
+    :param C: Sellmeier coefficients
+    :param lambdas: resonance wavelengths, [m]
+    :param n_2: nonlinear refractive index by intensity, [m^2/W]
+    :param overwrite: replace already registered material or not
+
+    :return: None
+    """
+
+    if name in MATERIALS and not overwrite:
+        raise Exception('Material %s is already registered!' % name)
+    if len(C) != len(lambdas) or not len(C):
+        raise Exception('Wrong Sellmeier coefficients!')
+
+    MATERIALS[name] = {'C': tuple(C), 'lambdas': tuple(lambdas), 'n_2': n_2}
+    Medium.clear_cache(name)
 
 
 class Medium:
     """
     Сlass that describes the object of the medium in which the beam propagates
+
+    Dispersion of the medium is evaluated from the Sellmeier formula of the registered material (see MATERIALS)
+    vectorised over arrays of frequencies. Results for frequency grids are cached per (material, grid), so spectral
+    and temporal operators and sweeps over wavelength do not recalculate them.
     """
+
+    CACHE_SIZE = 64  # maximal number of cached frequency grids
+
+    __cache = OrderedDict()
+
     def __init__(self, **kwargs):
         self.__m_constants = kwargs['m_constants']  # mathematical constants
         self.__c = self.__m_constants.c  # light speed in vacuum
         self.__lmbda = kwargs['lmbda']  # wavelength
         self.__name = kwargs['name']  # name of medium
 
-        self.__n_0 = None  # linear refractive index
-        self.__k_0 = None  # wave vector
-        self.__k_1 = None  # dk/dw, s/m
-        self.__k_2 = None  # d^2 k / dw^2, s^2/m
-        self.__n_2 = None  # nonlinear refractive index by intensity, m^2/W
-
-        # initalize medium parameters
-        # it is assumed that n_2 is independent of wavelength!
-        if self.__name == 'SiO2':
-            self.__initialize_dispersion_parameters_SiO2()
-            self.__n_2 = 3.4 * 10**-20
-        elif self.__name == 'CaF2':
-            self.__initialize_dispersion_parameters_CaF2()
-            self.__n_2 = 1.92 * 10**-20
-        elif self.__name == 'LiF':
-            self.__initialize_dispersion_parameters_LiF()
-            self.__n_2 = 1.0 * 10 ** -20
-        else:
+        if self.__name not in MATERIALS:
             raise Exception('Wrong name!')
+        material = MATERIALS[self.__name]  # constants of the material when the medium is created
+        self.__C, self.__lambdas = material['C'], material['lambdas']  # Sellmeier coefficients and wavelengths, [m]
+
+        self.__omega = 2 * pi * self.__c / self.__lmbda  # beam frequency, [rad/s]
+
+        n, k, k_1, k_2 = self.dispersion(array([self.__omega]))
+        self.__n_0 = float(n[0])  # linear refractive index
+        self.__k_0 = float(k[0])  # wave vector
+        self.__k_1 = float(k_1[0])  # dk/dw, s/m
+        self.__k_2 = float(k_2[0])  # d^2 k / dw^2, s^2/m
+        self.__n_2 = material['n_2']  # nonlinear refractive index by intensity, m^2/W
 
     @property
     def info(self):
         return self.__name
 
+    @property
+    def parameters(self):
+        """Constants of the material which define the medium, the name does not change if it is registered again"""
+        return {'name': self.__name, 'C': list(self.__C), 'lambdas': list(self.__lambdas), 'n_2': self.__n_2}
+
+    @property
+    def omega(self):
+        return self.__omega
+
     @property
     def n_0(self):
         return self.__n_0
@@ -55,125 +108,83 @@ class Medium:
     def n_2(self):
         return self.__n_2
 
-    @staticmethod
-    def __calculate_n(omega, C_1, C_2, C_3, omega_1, omega_2, omega_3):
-        """
-        Linear refractive index is calculated from the Sellmeier formula
-        (//: https://refractiveindex.info/?shelf=glass&book=fused_silica&page=Malitson)
-
-        :param omega: beam frequency, \omega = 2 \pi c / \lambda
-        :param C_1: parameter in Sellmeier formula
-        :param C_2: parameter in Sellmeier formula
-        :param C_3: parameter in Sellmeier formula
-        :param omega_1: resonance frequency
-        :param omega_2: resonance frequency
-        :param omega_3: resonance frequency
-        :return:
-        """
-        return sqrt(1 +
-                    C_1 / (1 - (omega / omega_1) ** 2) +
-                    C_2 / (1 - (omega / omega_2) ** 2) +
-                    C_3 / (1 - (omega / omega_3) ** 2))
-
-    def __calculate_k_0(self, omega, C_1, C_2, C_3, omega_1, omega_2, omega_3, c):
-        """
-        Calculates wave vector
-        k_0 = \omega * n(\omega) / c
-        """
+    @classmethod
+    def clear_cache(cls, name=None):
+        """Removes cached dispersion of the material (of all materials if name is None)"""
 
-        return omega / c * self.__calculate_n(omega, C_1, C_2, C_3, omega_1, omega_2, omega_3)
+        for key in [e for e in cls.__cache if name is None or e[0] == name]:
+            del cls.__cache[key]
 
     @staticmethod
-    def __calculate_k_1(omega, C_1, C_2, C_3, omega_1, omega_2, omega_3, c):
-        """
-        Calculates k_1 = dk / dw |_w=\omega using the analytical expression of the first derivative
-        of the Sellmeier formula
+    def __calculate_dispersion(omegas, C, omegas_res, c):
         """
+        Calculates n, k, dk/dw and d^2k/dw^2 from the Sellmeier formula written for u = n^2:
+        u = 1 + \sum_i C_i / (1 - \omega^2 / \omega_i^2),
+        n' = u' / (2 n),  n'' = u'' / (2 n) - u'^2 / (4 n^3),
+        k = \omega n / c,  k_1 = (n + \omega n') / c,  k_2 = (2 n' + \omega n'') / c
 
-        return omega * (C_1 * omega / (omega_1 ** 2 * (-omega ** 2 / omega_1 ** 2 + 1) ** 2) +
-               C_2 * omega / (omega_2 ** 2 * (-omega ** 2 / omega_2 ** 2 + 1) ** 2) +
-               C_3 * omega / (omega_3 ** 2 * (-omega ** 2 / omega_3 ** 2 + 1) ** 2)) / \
-               (c * sqrt(C_1 / (-omega ** 2 / omega_1 ** 2 + 1) + C_2 / (-omega ** 2 / omega_2 ** 2 + 1) +
-               C_3 / (-omega ** 2 / omega_3 ** 2 + 1) + 1)) + sqrt(C_1 / (-omega ** 2 / omega_1 ** 2 + 1) +
-               C_2 / (-omega ** 2 / omega_2 ** 2 + 1) + C_3 / (-omega ** 2 / omega_3 ** 2 + 1) + 1) / c
+        :param omegas: array of frequencies, [rad/s]
+        :param C: array of Sellmeier coefficients
+        :param omegas_res: array of resonance frequencies, [rad/s]
+        :param c: light speed in vacuum
 
-    @staticmethod
-    def __calculate_k_2(omega, C_1, C_2, C_3, omega_1, omega_2, omega_3, c):
-        """
-        Calculates k_2 = d^2k / dw^2 |_w=\omega using the analytical expression of the second derivative
-        of the Sellmeier formula
+        :return: n, k, k_1, k_2
         """
 
-        return omega * (-C_1 * omega / (omega_1 ** 2 * (-omega ** 2 / omega_1 ** 2 + 1) ** 2) - C_2 * omega / (
-               omega_2 ** 2 * (-omega ** 2 / omega_2 ** 2 + 1) ** 2) - C_3 * omega / (omega_3 ** 2 * (-omega ** 2 /
-               omega_3 ** 2 + 1) ** 2)) * (C_1 * omega / (omega_1 ** 2 * (-omega ** 2 / omega_1 ** 2 + 1) ** 2) +
-               C_2 * omega / (omega_2 ** 2 * (-omega ** 2 / omega_2 ** 2 + 1) ** 2) + C_3 * omega / (omega_3 ** 2 *
-               (-omega ** 2 / omega_3 ** 2 + 1) ** 2)) / (c * (C_1 / (-omega ** 2 / omega_1 ** 2 + 1) + C_2 /
-               (-omega ** 2 / omega_2 ** 2 + 1) + C_3 / (-omega ** 2 / omega_3 ** 2 + 1) + 1) ** (3 / 2)) + \
-               omega * (4 * C_1 * omega ** 2 / (omega_1 ** 4 * (-omega ** 2 / omega_1 ** 2 + 1) ** 3) + C_1 /
-               (omega_1 ** 2 * (-omega ** 2 / omega_1 ** 2 + 1) ** 2) + 4 * C_2 * omega ** 2 / (omega_2 ** 4 *
-               (-omega ** 2 / omega_2 ** 2 + 1) ** 3) + C_2 / (omega_2 ** 2 * (-omega ** 2 / omega_2 ** 2 + 1) ** 2) +
-               4 * C_3 * omega ** 2 / (omega_3 ** 4 * (-omega ** 2 / omega_3 ** 2 + 1) ** 3) + C_3 / (omega_3 ** 2 *
-               (-omega ** 2 / omega_3 ** 2 + 1) ** 2)) / (c * sqrt(C_1 / (-omega ** 2 / omega_1 ** 2 + 1) + C_2 /
-               (-omega ** 2 / omega_2 ** 2 + 1) + C_3 / (-omega ** 2 / omega_3 ** 2 + 1) + 1)) + 2 * (C_1 * omega /
-               (omega_1 ** 2 * (-omega ** 2 / omega_1 ** 2 + 1) ** 2) + C_2 * omega / (omega_2 ** 2 * (-omega ** 2 /
-               omega_2 ** 2 + 1) ** 2) + C_3 * omega / (omega_3 ** 2 * (-omega ** 2 / omega_3 ** 2 + 1) ** 2)) / (c *
-               sqrt(C_1 / (-omega ** 2 / omega_1 ** 2 + 1) + C_2 / (-omega ** 2 / omega_2 ** 2 + 1) + C_3 /
-               (-omega ** 2 / omega_3 ** 2 + 1) + 1))
-
-    def __initialize_dispersion_parameters(self, lambda_1, lambda_2, lambda_3, C_1, C_2, C_3):
-        """
-        Calculates all dispersion parameters in class
-        """
+        w = omegas[:, newaxis]
+        d = 1 - (w / omegas_res)**2
+
+        u = 1 + np_sum(C / d, axis=1)
+        du = np_sum(2 * C * w / (omegas_res**2 * d**2), axis=1)
+        d2u = np_sum(2 * C / (omegas_res**2 * d**2) + 8 * C * w**2 / (omegas_res**4 * d**3), axis=1)
 
-        omega_1, omega_2, omega_3 = 2. * pi * self.__c / lambda_1, \
-                                    2. * pi * self.__c / lambda_2, \
-                                    2. * pi * self.__c / lambda_3
-        omega = 2 * pi * self.__c / self.__lmbda
+        n = sqrt(u)
+        dn = du / (2 * n)
+        d2n = d2u / (2 * n) - du**2 / (4 * n**3)
 
-        self.__n_0 = self.__calculate_n(omega, C_1, C_2, C_3, omega_1, omega_2, omega_3)
-        self.__k_0 = self.__calculate_k_0(omega, C_1, C_2, C_3, omega_1, omega_2, omega_3, self.__c)
-        self.__k_1 = self.__calculate_k_1(omega, C_1, C_2, C_3, omega_1, omega_2, omega_3, self.__c)
-        self.__k_2 = self.__calculate_k_2(omega, C_1, C_2, C_3, omega_1, omega_2, omega_3, self.__c)
+        return n, omegas * n / c, (n + omegas * dn) / c, (2 * dn + omegas * d2n) / c
 
-    def __initialize_dispersion_parameters_SiO2(self):
+    def dispersion(self, omegas):
         """
-        Initializes dispersion parameters for SiO2
+        Evaluates dispersion of the medium on the grid of frequencies
+
+        :param omegas: array of (positive) frequencies, [rad/s]
+
+        :return: read-only arrays n, k, k_1, k_2 of the same shape as omegas
         """
 
-        C_1 = 0.6961663000
-        C_2 = 0.4079426000
-        C_3 = 0.8974794000
-        lambda_1 = 0.0684043000 * 10 ** -6
-        lambda_2 = 0.1162414000 * 10 ** -6
-        lambda_3 = 9.8961610000 * 10 ** -6
+        omegas = atleast_1d(asarray(omegas, dtype=float64))
+        key = (self.__name, omegas.shape, sha1(omegas.tobytes()).hexdigest())
 
-        self.__initialize_dispersion_parameters(lambda_1, lambda_2, lambda_3, C_1, C_2, C_3)
+        if key in self.__cache:
+            self.__cache.move_to_end(key)
+            return self.__cache[key]
 
-    def __initialize_dispersion_parameters_CaF2(self):
-        """
-        Initializes dispersion parameters for CaF2
-        """
+        material = MATERIALS[self.__name]
+        C = array(material['C'], dtype=float64)
+        omegas_res = 2 * pi * self.__c / array(material['lambdas'], dtype=float64)
 
-        C_1 = 0.5675888000
-        C_2 = 0.4710914000
-        C_3 = 3.8484723000
-        lambda_1 = 0.0502636050 * 10 ** -6
-        lambda_2 = 0.1003909000 * 10 ** -6
-        lambda_3 = 34.649040000 * 10 ** -6
+        with errstate(invalid='ignore', divide='ignore'):
+            result = tuple(e.reshape(omegas.shape) for e in
+                           self.__calculate_dispersion(omegas.ravel(), C, omegas_res, self.__c))
+        if not isfinite(result[0]).all():
+            raise Exception('Frequency grid of %s is out of transparency range!' % self.__name)
+        for arr in result:
+            arr.flags.writeable = False
 
-        self.__initialize_dispersion_parameters(lambda_1, lambda_2, lambda_3, C_1, C_2, C_3)
+        self.__cache[key] = result
+        if len(self.__cache) > self.CACHE_SIZE:
+            self.__cache.popitem(last=False)
 
-    def __initialize_dispersion_parameters_LiF(self):
-        """
-        Initializes dispersion parameters for LiF
+        return result
+
+    def dispersion_by_lmbda(self, lmbdas):
         """
+        Evaluates dispersion of the medium on the grid of wavelengths
 
-        C_1 = 0.9254900000
-        C_2 = 6.9674700000
-        C_3 = 0.0000000000
-        lambda_1 = 0.0737600000 * 10 ** -6
-        lambda_2 = 32.790000000 * 10 ** -6
-        lambda_3 = 10**-10
+        :param lmbdas: array of wavelengths, [m]
+
+        :return: read-only arrays n, k, k_1, k_2 of the same shape as lmbdas
+        """
 
-        self.__initialize_dispersion_parameters(lambda_1, lambda_2, lambda_3, C_1, C_2, C_3)
+        return self.dispersion(2 * pi * self.__c / asarray(lmbdas, dtype=float64))
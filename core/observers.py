@@ -0,0 +1,434 @@
+from abc import ABCMeta, abstractmethod
+from datetime import timedelta
+from math import floor
+from time import perf_counter
+import json
+import sys
+
+from numpy import ndarray, savez, array
+from tqdm import tqdm
+
+
+def read_only(arr):
+    """:return: view of the array which can not be written"""
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+
+class BeamView:
+    """
+    Read-only proxy of the beam passed to observers: attributes are taken from the beam, arrays (field, intensity,
+    grids) are returned as views which can not be written, so an observer can not change the propagation. Only
+    the methods which read the beam can be called, their arrays are returned as read-only views too, other methods
+    (e.g. update_intensity) raise.
+    """
+
+    READ_METHODS = ('full_field', 'full_intensity', 'reduced_quantities', '_field_to_intensity')
+
+    def __init__(self, beam):
+        self.__beam = beam
+
+    def __getattr__(self, name):
+        value = getattr(self.__beam, name)
+        if isinstance(value, ndarray):
+            return read_only(value)
+        if callable(value):
+            if name not in self.READ_METHODS:
+                raise Exception('Wrong method: %s of the beam can not be called by observers!' % name)
+            return self.__read_method(value)
+
+        return value
+
+    @staticmethod
+    def __read_method(method):
+        """:return: function which calls the method and returns its arrays as read-only views"""
+
+        def call(*args, **kwargs):
+            result = method(*args, **kwargs)
+            return read_only(result) if isinstance(result, ndarray) else result
+
+        return call
+
+
+class StepView:
+    """
+    State of the propagation after the step, yielded by Propagator.iter_steps and passed to observers
+    """
+
+    def __init__(self, **kwargs):
+        self.__n_step = kwargs['n_step']  # number of step along evolutionary coordinate z
+        self.__z = kwargs['z']  # evolutionary coordinate z, [m]
+        self.__dz = kwargs['dz']  # next step along z, [m]
+        self.__state = kwargs['state']  # dict with reduced quantities of the step
+        self.__beam = BeamView(kwargs['beam'])  # read-only view of the beam
+        self.__states = kwargs['states']  # filled rows of the states table
+        self.__states_columns = kwargs['states_columns']  # columns of the states table
+        self.__stop = kwargs.get('stop', False)  # True if the calculations stop after this step
+
+    @property
+    def n_step(self):
+        return self.__n_step
+
+    @property
+    def z(self):
+        return self.__z
+
+    @property
+    def dz(self):
+        return self.__dz
+
+    @property
+    def state(self):
+        return dict(self.__state)
+
+    @property
+    def beam(self):
+        return self.__beam
+
+    @property
+    def field(self):
+        return self.__beam.field
+
+    @property
+    def intensity(self):
+        return self.__beam.intensity
+
+    @property
+    def states(self):
+        return read_only(self.__states)
+
+    @property
+    def states_columns(self):
+        return list(self.__states_columns)
+
+    @property
+    def stop(self):
+        return self.__stop
+
+
+class Observer(metaclass=ABCMeta):
+    """
+    Abstract class for observer object.
+    Observers are registered in Propagator and are notified after the steps at which they are due: every `every`
+    steps and (or) every time z passes the next multiple of `every_z`. Without cadence the observer is due
+    at every step. Observers get StepView with read-only views of the beam, start is called before the first step
+    and finish after the last one.
+
+    Parameters of observers which write artifacts of the run are a part of the configuration of the run (see
+    Propagator.configuration), reporting observers (REPORTING = True) do not change results and are not.
+    """
+
+    REPORTING = False  # observer only reports the progress and writes no artifacts of the run
+
+    def __init__(self, **kwargs):
+        self._every = kwargs.get('every', None)  # cadence in steps
+        self._every_z = kwargs.get('every_z', None)  # cadence in z, [m]
+        if self._every is not None and self._every <= 0 or self._every_z is not None and self._every_z <= 0:
+            raise Exception('Wrong cadence!')
+
+        self._name = kwargs.get('name', self.info)  # name of observer in the log of times
+        self.__next_z = 0.0  # next z at which the observer is due
+
+    @abstractmethod
+    def info(self):
+        """Observer type"""
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def every(self):
+        return self._every
+
+    @every.setter
+    def every(self, every):
+        self._every = every
+
+    @property
+    def every_z(self):
+        return self._every_z
+
+    @property
+    def parameters(self):
+        """Parameters which define artifacts of the observer, subclasses extend them"""
+        return {'observer': self.info, 'every': self._every, 'every_z': self._every_z}
+
+    def is_due(self, n_step, z):
+        """
+        :param n_step: number of step along evolutionary coordinate z
+        :param z: evolutionary coordinate z
+
+        :return: True if the observer must be notified at this step
+        """
+        if self._every is None and self._every_z is None:
+            return True
+
+        due = self._every is not None and not n_step % self._every
+        if self._every_z is not None and z >= self.__next_z:
+            self.__next_z = (floor(z / self._every_z) + 1) * self._every_z
+            due = True
+
+        return due
+
+    def next_due(self, n_step):
+        """
+        :param n_step: number of the current step
+
+        :return: the next step at which the observer is due by its cadence in steps, None if it has only the cadence
+        in z (see next_z), compiled drivers return to Python not later than this step
+        """
+        if self._every is None:
+            return None if self._every_z is not None else n_step + 1
+
+        return (n_step // self._every + 1) * self._every
+
+    @property
+    def next_z(self):
+        """z at which the observer is due next time by its cadence in z, None without it"""
+        return self.__next_z if self._every_z is not None else None
+
+    def start(self, propagator):
+        """Called by propagator before the first step"""
+
+    @abstractmethod
+    def notify(self, view):
+        """
+        :param view: StepView of the current step
+
+        :return: None
+        """
+
+    def finish(self, propagator):
+        """Called by propagator after the last step"""
+
+
+class CallbackObserver(Observer):
+    """Calls function(view) at the cadence, e.g. for user diagnostics"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__function = kwargs['function']  # function of StepView
+
+    @property
+    def info(self):
+        return 'callback_observer'
+
+    def notify(self, view):
+        self.__function(view)
+
+
+class PrintObserver(Observer):
+    """Prints the current state of the propagation"""
+
+    REPORTING = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__logger = None
+
+    @property
+    def info(self):
+        return 'print_current_state'
+
+    def start(self, propagator):
+        self.__logger = propagator.logger
+
+    def notify(self, view):
+        self.__logger.print_current_state(view.n_step, view.states, view.states_columns)
+
+
+class PlotObserver(Observer):
+    """Plots the beam with the visualizer to the beam directory of the run"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__visualizer = kwargs['visualizer']  # visualizer object
+
+    @property
+    def info(self):
+        return 'plot_pair'
+
+    @property
+    def visualizer(self):
+        return self.__visualizer
+
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'visualizer': self.__visualizer.parameters})
+        return parameters
+
+    def start(self, propagator):
+        self.__visualizer.get_path_to_save(propagator.manager.beam_dir)
+
+    def notify(self, view):
+        self.__visualizer.plot_pair(view.beam, view.z, view.n_step)
+
+
+class SnapshotObserver(Observer):
+    """Saves field snapshots to the archive of the run with the snapshot writer"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__snapshot_writer = kwargs['snapshot_writer']  # snapshot writer object
+        self.__path = kwargs.get('path', None)  # path to archive, snapshots file of the run by default
+
+    @property
+    def info(self):
+        return 'write_snapshot'
+
+    @property
+    def parameters(self):
+        parameters = super().parameters
+        parameters.update({'snapshot_writer': self.__snapshot_writer.parameters})
+        return parameters
+
+    def start(self, propagator):
+        self.__snapshot_writer.open(self.__path or propagator.manager.snapshots_filename)
+
+    def notify(self, view):
+        self.__snapshot_writer.write(view.beam, view.z, view.n_step)
+
+    def finish(self, propagator):
+        self.__snapshot_writer.close()
+
+
+class CheckpointObserver(Observer):
+    """Saves field and current position along z to the checkpoints directory of the run"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__manager = None
+
+    @property
+    def info(self):
+        return 'save_checkpoint'
+
+    def start(self, propagator):
+        self.__manager = propagator.manager
+
+    def notify(self, view):
+        self.__manager.create_checkpoints_dir()
+        savez(self.__manager.checkpoints_dir + '/%04d.npz' % view.n_step, field=view.field, z=view.z, dz=view.dz,
+              n_step=view.n_step, states=view.states, columns=array(view.states_columns),
+              run_id=self.__manager.results_dir_name)
+
+
+class ProgressObserver(Observer):
+    """
+    Reports progress of the propagation not more often than once per interval seconds: steps/s, z / z_target, dz,
+    peak intensity and ETA estimated from the measured cost of recent steps. In interactive mode (terminal) it is
+    a tqdm progress bar, otherwise a structured json line is written at every update and a one-line summary
+    at the end of the run. The observer is due at every step, but the step costs only a clock check.
+    """
+
+    REPORTING = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.__interval = kwargs.get('interval', 1.0)  # minimal time between updates, [s]
+        self.__z_target = kwargs.get('z_target', None)  # final z, n_z * dz_0 for constant step by default, [m]
+        self.__file = kwargs.get('file', None)  # output stream, sys.stderr by default
+        self.__interactive = kwargs.get('interactive', None)  # progress bar or json lines, terminal check by default
+
+        self.__n_z, self.__run_id, self.__bar = None, None, None
+        self.__t_start, self.__t_last, self.__n_last = None, None, 0
+        self.__n_step, self.__z, self.__i_max_peak = 0, 0.0, 0.0
+        self.__steps_per_second = 0.0
+
+    @property
+    def info(self):
+        return 'progress'
+
+    def next_due(self, n_step):
+        """Updates are throttled by time, so the observer is notified whenever compiled drivers return to Python"""
+        return None
+
+    def start(self, propagator):
+        self.__file = self.__file or sys.stderr
+        if self.__interactive is None:
+            self.__interactive = hasattr(self.__file, 'isatty') and self.__file.isatty()
+        if self.__z_target is None and propagator.const_dz:
+            self.__z_target = propagator.n_z * propagator.dz_0
+
+        self.__n_z = propagator.n_z
+        self.__run_id = propagator.manager.results_dir_name
+        self.__t_start = self.__t_last = perf_counter()
+        self.__n_last = 0
+
+        if self.__interactive:
+            self.__bar = tqdm(total=self.__n_z, file=self.__file, unit='step', dynamic_ncols=True,
+                              bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}{postfix}]')
+
+    def __eta(self, z, dz):
+        """:return: estimated remaining time from the rate of recent steps, [s]"""
+
+        remaining = self.__n_z - self.__n_step
+        if self.__z_target is not None and dz > 0:
+            remaining = min(remaining, max((self.__z_target - z) / dz, 0.0))
+
+        return remaining / self.__steps_per_second if self.__steps_per_second > 0 else None
+
+    def __record(self, view):
+        z_fraction = view.z / self.__z_target if self.__z_target else None
+        return {'run_id': self.__run_id,
+                'n_step': view.n_step,
+                'n_z': self.__n_z,
+                'z': view.z,
+                'z_to_z_target': z_fraction,
+                'dz': view.dz,
+                'i_max': view.state['i_max'],
+                'steps_per_second': self.__steps_per_second,
+                'eta': self.__eta(view.z, view.dz)}
+
+    def notify(self, view):
+        self.__n_step, self.__z = view.n_step, view.z
+        self.__i_max_peak = max(self.__i_max_peak, view.state['i_max'])
+
+        t = perf_counter()
+        if t - self.__t_last < self.__interval and not view.stop and view.n_step != self.__n_z:
+            return
+
+        if view.n_step > self.__n_last:
+            self.__steps_per_second = (view.n_step - self.__n_last) / (t - self.__t_last)
+        self.__t_last, self.__n_last = t, view.n_step
+
+        record = self.__record(view)
+        if self.__interactive:
+            eta = record['eta']
+            self.__bar.set_postfix_str('%.1f steps/s, z/z_target = %s, dz = %.2e m, i_max = %.3e W/m^2, eta %s' % (
+                record['steps_per_second'],
+                '%.3f' % record['z_to_z_target'] if record['z_to_z_target'] is not None else '--',
+                record['dz'], record['i_max'], str(timedelta(seconds=int(eta))) if eta is not None else '--'),
+                refresh=False)
+            self.__bar.update(view.n_step - self.__bar.n)
+        else:
+            self.__file.write(json.dumps(dict(record, event='progress')) + '\n')
+            self.__file.flush()
+
+    def finish(self, propagator):
+        wall_time = perf_counter() - self.__t_start
+
+        if self.__interactive:
+            self.__bar.close()
+            return
+
+        summary = {'event': 'summary',
+                   'run_id': self.__run_id,
+                   'stop_reason': propagator.stop_reason,
+                   'n_steps': self.__n_step,
+                   'z': self.__z,
+                   'z_to_z_target': self.__z / self.__z_target if self.__z_target else None,
+                   'i_max_peak': self.__i_max_peak,
+                   'wall_time': wall_time,
+                   'steps_per_second': self.__n_step / wall_time if wall_time > 0 else None}
+        self.__file.write(json.dumps(summary) + '\n')
+        self.__file.flush()
@@ -0,0 +1,331 @@
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, path
+from numpy import array, exp, sum as summ
+from numpy.lib.format import open_memmap
+from pyfftw import FFTW, empty_aligned
+
+from .kerr_effect import KerrExecutor
+from .threads import default_threads
+
+
+class TileStream:
+    """
+    Class for a pass over tiles of memory-mapped arrays with I/O overlapped with computations. Tiles are loaded into
+    N_SLOTS slots of preallocated buffers by one background thread, which loads the next tile and stores the previous
+    one while the current tile is processed. Since the thread executes loads and stores in the order of submission,
+    the slot of the tile k + 1 is free when the tile k has been loaded: its previous tile k - 2 has been stored.
+    Copies between the page cache and buffers, FFTW and numpy kernels release GIL, so reading and writing pages
+    of the files overlaps with the computations.
+    """
+
+    N_SLOTS = 3  # load of the next tile, processing of the current tile and store of the previous one
+
+    def __init__(self, **kwargs):
+        self.__prefetch = kwargs.get('prefetch', True)  # overlap I/O with computations in the background thread
+        self.__io = ThreadPoolExecutor(max_workers=1) if self.__prefetch else None
+
+    @property
+    def prefetch(self):
+        return self.__prefetch
+
+    def run(self, tiles, load, process, store=None):
+        """
+        :param tiles: list of tiles, e.g. bounds (start, stop) of rows
+        :param load: function (tile, slot) copying the tile from files to buffers of the slot
+        :param process: function (tile, slot) processing buffers of the slot in place
+        :param store: function (tile, slot) copying buffers of the slot back to files or None for read-only passes
+
+        :return: None
+        """
+
+        if not self.__prefetch:
+            for tile in tiles:
+                load(tile, 0)
+                process(tile, 0)
+                if store is not None:
+                    store(tile, 0)
+            return
+
+        stores, loading = [], self.__io.submit(load, tiles[0], 0) if tiles else None
+        for k, tile in enumerate(tiles):
+            slot = k % self.N_SLOTS
+            loading.result()
+            if k + 1 < len(tiles):
+                loading = self.__io.submit(load, tiles[k + 1], (k + 1) % self.N_SLOTS)
+            process(tile, slot)
+            if store is not None:
+                stores.append(self.__io.submit(store, tile, slot))
+
+        for storing in stores:
+            storing.result()
+
+    def close(self):
+        if self.__io is not None:
+            self.__io.shutdown(wait=True)
+            self.__io = None
+
+
+class OutOfCorePool:
+    """
+    Class for out-of-core propagation of the beam with spatial coordinates x and y, when the field, its spectrum
+    and scratch buffers do not fit in memory. The field and the intensity live in memory-mapped .npy files
+    in the directory, only N_SLOTS tiles of n_tile rows (or columns) are kept in memory.
+
+    The 2-dimensional FFT of diffraction is split into three passes over the file:
+        rows      ->  FFT along y of row tiles and the phase factor along y
+        columns   ->  FFT along x of column tiles, the phase factor along x and inverse FFT along x
+        rows      ->  inverse FFT along y of row tiles
+    Column tiles are transposed on load, so all FFTs are in place along the contiguous axis of aligned buffers.
+    Kerr effect and intensity are processed tile by tile, the peak intensity and the power are reduced over tiles.
+    I/O of every pass is overlapped with computations by TileStream.
+
+    The pool has the interface of SlabPool and is created by BeamXY with memmap_dir, see
+    OutOfCoreFourierDiffractionExecutorXY and OutOfCoreKerrExecutorXY.
+    """
+
+    TILE_BYTES = 2**26  # default memory of a complex tile, [bytes]
+
+    def __init__(self, **kwargs):
+        self.__beam = kwargs['beam']  # beam object
+        if self.__beam.info != 'beam_xy':
+            raise Exception('Wrong beam!')
+
+        self.__directory = kwargs['directory']  # directory of memory-mapped files
+        n_x, n_y = self.__beam.n_x, self.__beam.n_y
+        precision = self.__beam.precision
+        self.__precision = precision
+
+        # number of rows of row tiles and of columns of column tiles
+        n_tile = kwargs.get('n_tile', None) or self.TILE_BYTES // (max(n_x, n_y) * precision.complex_dtype.itemsize)
+        self.__n_tile = max(1, min(n_tile, n_x, n_y))
+
+        self.__n_jobs = kwargs.get('n_jobs', None)  # FFTW threads, cached or default threads of the tile if None
+        if self.__n_jobs is None:
+            self.__n_jobs = default_threads((self.__n_tile, max(n_x, n_y)),
+                                            str(precision.complex_dtype))['fftw_threads']
+
+        makedirs(self.__directory, exist_ok=True)
+        self.__field = open_memmap(path.join(self.__directory, 'field.npy'), mode='w+',
+                                   dtype=precision.complex_dtype, shape=(n_x, n_y))
+        self.__intensity = open_memmap(path.join(self.__directory, 'intensity.npy'), mode='w+',
+                                       dtype=precision.real_dtype, shape=(n_x, n_y))
+
+        self.__rows = [(start, min(start + self.__n_tile, n_x)) for start in range(0, n_x, self.__n_tile)]
+        self.__cols = [(start, min(start + self.__n_tile, n_y)) for start in range(0, n_y, self.__n_tile)]
+
+        self.__k_xs_squared = array(self.__beam.k_xs, dtype=precision.real_compute_dtype)**2
+        self.__k_ys_squared = array(self.__beam.k_ys, dtype=precision.real_compute_dtype)**2
+
+        # flat aligned buffers of slots, tiles are their contiguous views
+        n_slot = self.__n_tile * max(n_x, n_y)
+        self.__field_slots = [empty_aligned(n_slot, dtype=precision.complex_dtype)
+                              for _ in range(TileStream.N_SLOTS)]
+        self.__intensity_slots = [empty_aligned(n_slot, dtype=precision.real_dtype)
+                                  for _ in range(TileStream.N_SLOTS)]
+        self.__plans = {}
+
+        self.__stream = TileStream(prefetch=kwargs.get('prefetch', True))
+        self.__power = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def directory(self):
+        return self.__directory
+
+    @property
+    def n_jobs(self):
+        return self.__n_jobs
+
+    @property
+    def n_tile(self):
+        return self.__n_tile
+
+    @property
+    def rows(self):
+        return self.__rows
+
+    @property
+    def cols(self):
+        return self.__cols
+
+    @property
+    def field(self):
+        return self.__field
+
+    @property
+    def intensity(self):
+        return self.__intensity
+
+    @property
+    def prefetch(self):
+        return self.__stream.prefetch
+
+    @property
+    def power(self):
+        """Power of the beam after the last update of intensity, [W]"""
+        return self.__power
+
+    def __tile(self, slots, slot, shape):
+        """:return: contiguous view of the buffer of the slot with the shape of the tile"""
+        return slots[slot][:shape[0] * shape[1]].reshape(shape)
+
+    def __get_plans(self, slot, shape):
+        """
+        Creates in-place FFTW plans along axis 1 once for every slot and tile shape
+
+        :return: forward and backward plans
+        """
+        if (slot, shape) not in self.__plans:
+            tile = self.__tile(self.__field_slots, slot, shape)
+            self.__plans[(slot, shape)] = (FFTW(tile, tile, axes=(1,), direction='FFTW_FORWARD',
+                                                flags=('FFTW_ESTIMATE',), threads=self.__n_jobs),
+                                           FFTW(tile, tile, axes=(1,), direction='FFTW_BACKWARD',
+                                                flags=('FFTW_ESTIMATE',), threads=self.__n_jobs))
+
+        return self.__plans[(slot, shape)]
+
+    def __row_shape(self, rows):
+        return rows[1] - rows[0], self.__field.shape[1]
+
+    def __col_shape(self, cols):
+        return cols[1] - cols[0], self.__field.shape[0]
+
+    def __load_rows(self, rows, slot):
+        self.__tile(self.__field_slots, slot, self.__row_shape(rows))[:] = self.__field[rows[0]:rows[1]]
+
+    def __store_rows(self, rows, slot):
+        self.__field[rows[0]:rows[1]] = self.__tile(self.__field_slots, slot, self.__row_shape(rows))
+
+    def __load_cols(self, cols, slot):
+        self.__tile(self.__field_slots, slot, self.__col_shape(cols))[:] = self.__field[:, cols[0]:cols[1]].T
+
+    def __store_cols(self, cols, slot):
+        self.__field[:, cols[0]:cols[1]] = self.__tile(self.__field_slots, slot, self.__col_shape(cols)).T
+
+    def __load_rows_with_intensity(self, rows, slot):
+        self.__load_rows(rows, slot)
+        self.__tile(self.__intensity_slots, slot, self.__row_shape(rows))[:] = self.__intensity[rows[0]:rows[1]]
+
+    def __store_intensity(self, rows, slot):
+        self.__intensity[rows[0]:rows[1]] = self.__tile(self.__intensity_slots, slot, self.__row_shape(rows))
+
+    def process_diffraction(self, current_lin_phase):
+        """
+        Out-of-core step of diffraction in Fourier space
+
+        :param current_lin_phase: current linear phase shift 0.5j * dz / k_0
+
+        :return: None
+        """
+        complex_dtype = self.__precision.complex_dtype
+        phases_x = exp(current_lin_phase * self.__k_xs_squared).astype(complex_dtype)
+        phases_y = exp(current_lin_phase * self.__k_ys_squared).astype(complex_dtype)
+
+        def rows_forward(rows, slot):
+            shape = self.__row_shape(rows)
+            fft_obj, _ = self.__get_plans(slot, shape)
+            fft_obj()
+            self.__tile(self.__field_slots, slot, shape)[:] *= phases_y
+
+        def columns(cols, slot):
+            shape = self.__col_shape(cols)
+            fft_obj, ifft_obj = self.__get_plans(slot, shape)
+            fft_obj()
+            self.__tile(self.__field_slots, slot, shape)[:] *= phases_x
+            ifft_obj()
+
+        def rows_backward(rows, slot):
+            self.__get_plans(slot, self.__row_shape(rows))[1]()
+
+        self.__stream.run(self.__rows, self.__load_rows, rows_forward, self.__store_rows)
+        self.__stream.run(self.__cols, self.__load_cols, columns, self.__store_cols)
+        self.__stream.run(self.__rows, self.__load_rows, rows_backward, self.__store_rows)
+
+    def process_kerr_effect(self, current_nonlin_phase):
+        """
+        Out-of-core step of Kerr effect
+
+        :param current_nonlin_phase: current nonlinear phase shift
+
+        :return: None
+        """
+
+        def kerr(rows, slot):
+            shape = self.__row_shape(rows)
+            field = self.__tile(self.__field_slots, slot, shape).reshape(-1)
+            intensity = self.__tile(self.__intensity_slots, slot, shape).reshape(-1)
+            if field.shape[0] >= self.__beam.PARALLEL_MIN_SIZE:
+                KerrExecutor._phase_increment_in_place_parallel(field, intensity, current_nonlin_phase)
+            else:
+                KerrExecutor._phase_increment_in_place(field, intensity, current_nonlin_phase)
+
+        self.__stream.run(self.__rows, self.__load_rows_with_intensity, kerr, self.__store_rows)
+
+    def update_intensity(self):
+        """
+        Updates intensity tile by tile and reduces peak intensity and power over tiles
+
+        :return: peak intensity in units of I_0
+        """
+        maxima, sums = [], []
+        tiny, accumulator_dtype = self.__precision.tiny, self.__precision.real_compute_dtype
+
+        def intensity(rows, slot):
+            shape = self.__row_shape(rows)
+            field = self.__tile(self.__field_slots, slot, shape).reshape(-1)
+            intensity_tile = self.__tile(self.__intensity_slots, slot, shape).reshape(-1)
+            if field.shape[0] >= self.__beam.PARALLEL_MIN_SIZE:
+                maxima.append(self.__beam._update_intensity_parallel(field, intensity_tile,
+                                                                     self.__beam._chunk_maxima('tile_maxima'), tiny))
+            else:
+                maxima.append(self.__beam._update_intensity(field, intensity_tile, tiny))
+            sums.append(summ(intensity_tile, dtype=accumulator_dtype))
+
+        self.__stream.run(self.__rows, self.__load_rows, intensity, self.__store_intensity)
+        self.__power = float(sum(sums)) * self.__beam.dx * self.__beam.dy * self.__beam.i_0
+
+        return float(max(maxima))
+
+    def gather(self, quantity='intensity', remaining_central_part_coeff=1.0):
+        """
+        Gathers the central part of the global array, only its pages are read from the file
+
+        :param quantity: intensity or field
+        :param remaining_central_part_coeff: part of the grid along each axis
+
+        :return: copy of the cropped array
+        """
+
+        if quantity not in ('intensity', 'field'):
+            raise Exception('Wrong quantity!')
+        if remaining_central_part_coeff <= 0 or remaining_central_part_coeff > 1:
+            raise Exception('Wrong remaining_central_part_coeff!')
+
+        arr = self.__intensity if quantity == 'intensity' else self.__field
+        slices = []
+        for n in arr.shape:
+            delta = max(int(remaining_central_part_coeff / 2 * n), 1)
+            slices.append(slice(max(n // 2 - delta, 0), min(n // 2 + delta, n)))
+
+        return array(arr[tuple(slices)])
+
+    def flush(self):
+        """Writes modified pages of the field and the intensity to the files"""
+
+        self.__field.flush()
+        self.__intensity.flush()
+
+    def close(self):
+        """Stops the I/O thread and flushes the files, the beam keeps memory-mapped arrays"""
+
+        self.__stream.close()
+        self.flush()
+        self.__plans = {}
+        self.__field_slots, self.__intensity_slots = [], []
+        if self.__beam._slab_pool is self:
+            self.__beam._slab_pool = None
@@ -0,0 +1,103 @@
+from numpy import dtype as np_dtype, finfo, sqrt, abs as np_abs
+
+
+PRECISIONS = {
+    # name: (complex storage, real storage, complex computations, real computations and accumulations)
+    'single': ('complex64', 'float32', 'complex64', 'float32'),
+    'mixed': ('complex64', 'float32', 'complex128', 'float64'),
+    'double': ('complex128', 'float64', 'complex128', 'float64'),
+}
+
+
+class Precision:
+    """
+    Class for the precision policy of the calculations, it is owned by the beam and is followed by executors, spectra
+    and visualization.
+
+    Arrays of fields, intensities and spectra are stored in the storage dtypes. Scalar coefficients of the kernels
+    (phase shifts, sweep coefficients), phase factors and reductions (power, radius, peak) are computed
+    in the computation dtypes:
+        single  ->  everything in complex64 / float32, half memory and bandwidth of double for production runs
+        mixed   ->  complex64 / float32 arrays with double coefficients and accumulations (default)
+        double  ->  everything in complex128 / float64 for validation
+    """
+
+    def __init__(self, **kwargs):
+        self.__name = kwargs.get('name', 'mixed')  # single, mixed or double
+        if self.__name not in PRECISIONS:
+            raise Exception('Wrong precision!')
+
+        self.__complex_dtype, self.__real_dtype, self.__complex_compute_dtype, self.__real_compute_dtype = \
+            (np_dtype(e) for e in PRECISIONS[self.__name])
+        self.__tiny = self.__real_dtype.type(sqrt(finfo(self.__real_dtype).tiny))
+
+    @staticmethod
+    def make(precision):
+        """
+        :param precision: Precision object, its name or None for the default one
+
+        :return: Precision object
+        """
+        if isinstance(precision, Precision):
+            return precision
+
+        return Precision(name=precision or 'mixed')
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def complex_dtype(self):
+        """dtype of complex arrays (fields, spectra)"""
+        return self.__complex_dtype
+
+    @property
+    def real_dtype(self):
+        """dtype of real arrays (intensities, phases)"""
+        return self.__real_dtype
+
+    @property
+    def complex_compute_dtype(self):
+        """dtype of complex coefficients and phase factors"""
+        return self.__complex_compute_dtype
+
+    @property
+    def real_compute_dtype(self):
+        """dtype of real coefficients, grids of wave vectors and accumulations"""
+        return self.__real_compute_dtype
+
+    @property
+    def tiny(self):
+        """
+        Square root of the smallest normal number of the real storage dtype (1e-19 for float32). Kernels flush
+        values below it to zero, so neither the values nor their squares are subnormal: arithmetic with subnormal
+        numbers is several times slower and tails of the field reach them in single precision.
+        """
+        return self.__tiny
+
+    @property
+    def bytes_per_point(self):
+        """Memory of the field and the intensity per grid point, [bytes]"""
+        return self.__complex_dtype.itemsize + self.__real_dtype.itemsize
+
+    def complex(self, value):
+        """:return: complex scalar in the computation dtype, numba kernels are specialised for it"""
+        return self.__complex_compute_dtype.type(value)
+
+    def real(self, value):
+        """:return: real scalar in the computation dtype, numba kernels are specialised for it"""
+        return self.__real_compute_dtype.type(value)
+
+    def flush_tails(self, arr):
+        """
+        Sets real and imaginary parts of the array below tiny to zero in place, e.g. tails of initial distributions
+
+        :return: None
+        """
+        parts = (arr.real, arr.imag) if arr.dtype.kind == 'c' else (arr,)
+        for part in parts:
+            part[np_abs(part) < self.__tiny] = 0
+
+    def __repr__(self):
+        return 'Precision(name=%r)' % self.__name
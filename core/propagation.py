@@ -1,9 +1,18 @@
-from numpy import zeros
+from numpy import zeros, sqrt, savez, load, array, nanargmax, isnan, concatenate, full, nan
 from numba import jit
 from datetime import datetime
+from time import time
+import json
+import os
 
+from .catalog import Catalog
+from .drivers import CompiledDriverR
+from .events import ThresholdEvent
 from .logger import Logger
 from .manager import Manager
+from .observers import StepView, PrintObserver, PlotObserver, SnapshotObserver, ProgressObserver
+from .threads import Concurrency, NumbaThreads
+from .workspace import AllocationMonitor
 from .functions import make_animation, make_video
 
 
@@ -13,10 +22,21 @@ class Propagator:
     classes and is one of the key ones in the program.
     """
 
+    # reduced quantities of the beam which are calculated if diagnostics are recorded or some event needs them
+    REDUCED_QUANTITIES = ('power', 'energy', 'radius', 'x_c', 'y_c', 'r_peak', 'x_peak', 'y_peak', 't_peak', 'i_axis',
+                          'centroid_drift', 'energy_error')
+
+    STATES_CHUNK = 1024  # number of rows by which the states table grows
+
+    NONLIN_PHASE_MAX = 0.05  # maximum Kerr phase incursion of the step of adaptive dz with Lie splitting, [rad]
+
     def __init__(self, **kwargs):
         self.__beam = kwargs['beam']  # beam object
-        self.__diffraction = kwargs.get('diffraction', None)  # diffraction object
-        self.__kerr_effect = kwargs.get('kerr_effect', None)  # kerr effect object
+        self.__integrator = kwargs.get('integrator', None)  # integrator object, Lie splitting if None
+        self.__diffraction = kwargs.get('diffraction', self.__integrator.diffraction if self.__integrator
+                                        else None)  # diffraction object
+        self.__kerr_effect = kwargs.get('kerr_effect', self.__integrator.kerr_effect if self.__integrator
+                                        else None)  # kerr effect object
 
         self.__args = kwargs['args']  # command line arguments
         self.__manager = Manager(args=self.__args)
@@ -27,24 +47,102 @@ class Propagator:
         self.__n_z = kwargs['n_z']  # maximum number of grid steps along evolutionary coordinate z
         self.__const_dz = kwargs['const_dz']  # use constant step along z or not
 
-        self.__print_current_state_every = kwargs.get('print_current_state_every', None)  # frequency of current state print
-
-        self.__plot_beam_every = kwargs.get('plot_beam_every', None)  # frequency of plotting beam
         self.__flag_print_track = kwargs.get('print_track', True)  # print track function or not
-
-        # settings for function which plots beam
-        if self.__plot_beam_every:
-            self.__visualizer = kwargs['visualizer']
-            self.__visualizer.get_path_to_save(self.__manager.beam_dir)
+        self.__visualizer = kwargs.get('visualizer', None)  # visualizer object for plotting beam and track
+
+        # observers notified at their own cadence in steps or in z (printing, plotting, snapshots, checkpoints, ...),
+        # print_current_state_every, plot_beam_every and save_snapshot_every are shortcuts for built-in observers
+        self.__observers = []
+        self.__plot_observer = None
+        if kwargs.get('print_current_state_every', None):
+            self.add_observer(PrintObserver(every=kwargs['print_current_state_every']))
+        if kwargs.get('plot_beam_every', None):
+            self.__plot_observer = PlotObserver(every=kwargs['plot_beam_every'], visualizer=kwargs['visualizer'])
+            self.add_observer(self.__plot_observer)
+        if kwargs.get('save_snapshot_every', None):
+            self.add_observer(SnapshotObserver(every=kwargs['save_snapshot_every'],
+                                               snapshot_writer=kwargs['snapshot_writer']))
+        for observer in kwargs.get('observers', []):
+            self.add_observer(observer)
+
+        # throttled progress reporting: True or dict with arguments of ProgressObserver
+        progress = kwargs.get('progress', False)
+        if progress:
+            self.add_observer(ProgressObserver(**(progress if isinstance(progress, dict) else {})))
 
         self.__z = 0.0  # initial value of z
         self.__dz = kwargs['dz_0']  # initial step along z
+        self.__dz_0 = self.__dz
+
+        # maximum Kerr phase incursion of the step of adaptive dz, integrators of higher order allow larger steps
+        self.__nonlin_phase_max = kwargs.get('nonlin_phase_max', self.__integrator.nonlin_phase_max
+                                             if self.__integrator else self.NONLIN_PHASE_MAX)
+
+        self.__flag_register_run = kwargs.get('register_run', True)  # register run in the catalog or not
 
         self.__max_intensity_to_stop = kwargs.get('max_intensity_to_stop', 10**17)  # peak intensity in beam
                                                                                     # at which the calculations stop
 
+        # events evaluated at every step, the first one is the built-in stop by peak intensity
+        self.__events = [ThresholdEvent(name='max_intensity_to_stop',
+                                        quantity='i_max',
+                                        threshold=self.__max_intensity_to_stop,
+                                        action='stop')] + list(kwargs.get('events', []))
+        for event in self.__events:
+            if event.action == 'cadence' and self.__plot_observer is None:
+                raise Exception('Event with cadence action needs plot_beam_every!')
+        self.__fired_events = []  # list of fired events (n_step, z, name, action)
+        self.__stop_reason = 'n_z'  # name of event which stopped the calculations
+
+        # record per-step diagnostics of the beam (power, radius, centroid, ...) in the track or not, they add columns
+        # to the track and a pass over the grid to every step, so they are recorded only on demand
+        self.__flag_diagnostics = kwargs.get('diagnostics', False)
+        self.__need_reduced_quantities = self.__flag_diagnostics or \
+            any(event.quantity in self.REDUCED_QUANTITIES for event in self.__events)
+        self.__initial_reduced_quantities = None
+
+        # count large allocations of diffraction, Kerr effect and intensity update in the steady-state loop or not
+        self.__allocation_monitor = None
+        if kwargs.get('monitor_allocations', False):
+            threshold = kwargs.get('allocation_threshold', self.__beam._field.nbytes // 4)  # [bytes]
+            self.__allocation_monitor = AllocationMonitor(threshold=threshold)
+
         self.__states_columns = ['z, m', 'dz, m', 'i_max / i_0', 'i_max, W / m^2']  # columns for propagation file
-        self.__states_arr = zeros(shape=(self.__n_z + 1, 4))  # array for states data
+        self.__diagnostics_keys = []
+        if self.__flag_diagnostics:
+            self.__diagnostics_keys = self.__beam.diagnostics_keys + ['energy_error']
+            self.__states_columns += self.__beam.diagnostics_columns + ['energy_error']
+        # array for states data, it grows by STATES_CHUNK rows, n_states rows are filled
+        self.__states_arr = zeros(shape=(min(self.__n_z + 1, self.STATES_CHUNK), len(self.__states_columns)))
+        self.__n_states = 0
+        self.__state = None  # reduced quantities of the last step
+
+        # maximum number of steps advanced by one call of the compiled driver between returns to Python at cadences
+        # of observers and events (see CompiledDriverR), None for the step by step loop
+        self.__compiled_steps = kwargs.get('compiled_steps', None)
+        self.__driver = None
+        if self.__compiled_steps:
+            if self.__integrator is not None:
+                raise Exception('Wrong integrator for the compiled driver!')
+            self.__driver = CompiledDriverR(beam=self.__beam, diffraction=self.__diffraction,
+                                            kerr_effect=self.__kerr_effect, states_columns=self.__states_columns,
+                                            diagnostics_keys=self.__diagnostics_keys,
+                                            nonlin_phase_max=self.__nonlin_phase_max)
+            self.__driver.watch(self.__events)  # events are checked here, not at the first call
+
+        # the run may branch from the checkpoint of a previous run (the trunk): the field, z, dz and the track up to
+        # the checkpoint are taken from it, downstream settings (n_z, events, observers, ...) are given as usual
+        self.__branch_from = kwargs.get('branch_from', None)  # path to the checkpoint npz-file
+        self.__branch = None  # provenance of the branch, it is recorded in the run metadata and in the catalog
+        self.__n_step_0 = 0  # number of the first step of the run
+        if self.__branch_from is not None:
+            self.__load_checkpoint(self.__branch_from)
+
+        # content-addressed cache of results: the run with the same configuration is not recomputed (see ResultCache)
+        self.__cache = kwargs.get('cache', None)
+        self.__cache_key, self.__cache_hit = None, False  # the key is taken when the run starts (see iter_steps)
+        if self.__cache is not None and self.__beam.parameters.get('noise_percent'):
+            raise Exception('Wrong cache: runs with noise are not reproducible!')
 
     @property
     def beam(self):
@@ -62,22 +160,95 @@ class Propagator:
     def z(self):
         return self.__z
 
+    @property
+    def n_z(self):
+        return self.__n_z
+
+    @property
+    def dz_0(self):
+        return self.__dz_0
+
+    @property
+    def const_dz(self):
+        return self.__const_dz
+
+    @property
+    def fired_events(self):
+        return self.__fired_events
+
+    @property
+    def allocation_monitor(self):
+        return self.__allocation_monitor
+
+    @property
+    def stop_reason(self):
+        return self.__stop_reason
+
+    @property
+    def branch(self):
+        """Provenance of the run branched from the checkpoint of the trunk or None"""
+        return self.__branch
+
+    @property
+    def cache_key(self):
+        """Key of the run in the cache: the key of the started run or of the current configuration"""
+        if self.__cache is None:
+            return None
+
+        return self.__cache_key or self.__cache.key(self.configuration)
+
+    @property
+    def cache_hit(self):
+        """True if the results of the run have been loaded from the cache"""
+        return self.__cache_hit
+
+    @property
+    def configuration(self):
+        """Full configuration which defines results of the run, its hash is the key of the run in the cache"""
+        return {'beam': self.__beam.parameters,
+                'medium': self.__beam.medium.parameters,
+                'propagation': {'diffraction': self.__diffraction.parameters if self.__diffraction else None,
+                                'kerr_effect': self.__kerr_effect.parameters if self.__kerr_effect else None,
+                                'integrator': self.__integrator.parameters if self.__integrator else 'lie_splitting',
+                                'n_z': self.__n_z,
+                                'dz_0': self.__dz_0,
+                                'const_dz': self.__const_dz,
+                                'nonlin_phase_max': self.__nonlin_phase_max,
+                                'max_intensity_to_stop': self.__max_intensity_to_stop,
+                                'diagnostics': self.__flag_diagnostics},
+                'events': [event.parameters for event in self.__events],
+                'branch': {key: self.__branch[key] for key in ('parent_run_id', 'n_step', 'z')}
+                if self.__branch is not None else None,
+                'observers': [observer.parameters for observer in self.__observers if not observer.REPORTING]}
+
+    @property
+    def observers(self):
+        return self.__observers
+
+    def add_observer(self, observer):
+        """Registers observer which is notified at its cadence"""
+        self.__observers.append(observer)
+
     @staticmethod
     @jit(nopython=True)
-    def __flush_current_state(states_arr, n_step, z, dz, i_max, i_0):
+    def __flush_current_state(states_arr, n_step, z, dz, i_max, i_0, diagnostics):
         """Flush current state data to states_arr"""
 
         states_arr[n_step][0] = z
         states_arr[n_step][1] = dz
         states_arr[n_step][2] = i_max / i_0
         states_arr[n_step][3] = i_max
+        for i in range(diagnostics.shape[0]):
+            states_arr[n_step][4 + i] = diagnostics[i]
 
     @staticmethod
     @jit(nopython=True)
-    def __update_dz(k_0, n_0, n_2, i_max, dz, nonlin_phase_max=0.05):
+    def __update_dz(k_0, n_0, n_2, i_max, dz, nonlin_phase_max):
         """
         Reduces the step along the evolutionary coordinate z by calculating the maximum Kerr phase incursion
 
+        :param nonlin_phase_max: maximum Kerr phase incursion of the step
+
         :return: updated dz
         """
 
@@ -87,6 +258,201 @@ class Propagator:
 
         return dz
 
+    def __make_state(self, n_step):
+        """
+        Collects reduced quantities of the current step for diagnostics and events checking
+
+        :param n_step: number of step along evolutionary coordinate z
+
+        :return: dict with reduced quantities
+        """
+
+        state = {'n_step': n_step, 'z': self.__z, 'dz': self.__dz, 'i_max': self.__beam.i_max,
+                 'i_max / i_0': self.__beam.i_max / self.__beam.i_0}
+
+        if self.__need_reduced_quantities:
+            state.update(self.__beam.reduced_quantities())
+            if self.__initial_reduced_quantities is None:
+                self.__initial_reduced_quantities = dict(state)
+            initial = self.__initial_reduced_quantities
+            state['centroid_drift'] = sqrt((state['x_c'] - initial['x_c'])**2 + (state['y_c'] - initial['y_c'])**2)
+            conserved = 'energy' if 'energy' in state else 'power'  # time-resolved beams conserve energy
+            state['energy_error'] = state[conserved] / initial[conserved] - 1.0
+
+        return state
+
+    def __save_checkpoint(self, n_step):
+        """Saves field and current position along z to the checkpoints directory"""
+
+        self.__manager.create_checkpoints_dir()
+        savez(self.__manager.checkpoints_dir + '/%04d.npz' % n_step, field=self.__beam._field, z=self.__z,
+              dz=self.__dz, n_step=n_step, states=self.__states_arr[:n_step + 1],
+              columns=array(self.__states_columns), run_id=self.__manager.results_dir_name)
+
+    def __load_checkpoint(self, path):
+        """
+        Takes the field, z, dz and the track of the trunk up to the checkpoint, the step of the checkpoint
+        is the first step of the run
+
+        :param path: path to the checkpoint npz-file (see CheckpointObserver and checkpoint events)
+
+        :return: None
+        """
+
+        with load(path) as checkpoint:
+            if checkpoint['field'].shape != self.__beam._field.shape:
+                raise Exception('Wrong checkpoint: the grid of the beam is different!')
+
+            self.__beam._field[...] = checkpoint['field']
+            self.__z, self.__n_step_0 = float(checkpoint['z']), int(checkpoint['n_step'])
+            if not self.__const_dz:
+                self.__dz = float(checkpoint['dz'])  # adaptive step continues from the trunk
+
+            # track of the trunk, its columns must be the same, older checkpoints have no track
+            parent_results_dir = os.path.dirname(os.path.dirname(os.path.abspath(path)))
+            parent_run_id = str(checkpoint['run_id']) if 'run_id' in checkpoint.files else \
+                os.path.basename(parent_results_dir)
+            states = checkpoint['states'] if 'states' in checkpoint.files and \
+                list(checkpoint['columns']) == self.__states_columns else None
+
+        if self.__n_step_0 > self.__n_z:
+            raise Exception('Wrong n_z: the checkpoint is beyond it!')
+        self.__beam.update_intensity()
+
+        while self.__n_step_0 >= self.__states_arr.shape[0]:
+            self.__grow_states_arr(self.__n_step_0)
+        if states is None:
+            self.__states_arr[:self.__n_step_0] = full((self.__n_step_0, len(self.__states_columns)), nan)
+        else:
+            self.__states_arr[:self.__n_step_0 + 1] = states[:self.__n_step_0 + 1]
+
+            # energy error and centroid drift are measured from the initial state of the trunk
+            if self.__flag_diagnostics:
+                initial = {'x_c': 0.0, 'y_c': 0.0}
+                initial.update(zip(self.__diagnostics_keys, states[0, 4:]))
+                self.__initial_reduced_quantities = initial
+
+        self.__branch = {'parent_run_id': parent_run_id,
+                         'parent_results_dir': parent_results_dir,
+                         'checkpoint': os.path.abspath(path),
+                         'n_step': self.__n_step_0,
+                         'z': self.__z}
+
+    def __process_events(self, n_step, state):
+        """
+        Checks all events and performs actions of fired ones
+
+        :param n_step: number of step along evolutionary coordinate z
+        :param state: dict with reduced quantities of the current step
+
+        :return: True if calculations must be stopped
+        """
+
+        stop = False
+        for event in self.__events:
+            if event.check(state):
+                self.__fired_events.append((n_step, self.__z, event.name, event.action))
+                if event.action == 'stop':
+                    if not stop:
+                        self.__stop_reason = event.name
+                    stop = True
+                elif event.action == 'cadence':
+                    self.__plot_observer.every = event.plot_beam_every
+                elif event.action == 'checkpoint':
+                    self.__save_checkpoint(n_step)
+
+        return stop
+
+    def __make_run_metadata(self, created, wall_time):
+        """
+        Collects parameters, summary metrics and artifacts paths of the run for the catalog
+
+        :param created: datetime of the run beginning
+        :param wall_time: duration of the run, [s]
+
+        :return: dict with run metadata
+        """
+
+        # rows of the trunk before the checkpoint are NaN if the checkpoint has no track (see __load_checkpoint)
+        i_max_track = self.__states_arr[:, self.__states_columns.index('i_max, W / m^2')]
+        row_peak = int(nanargmax(i_max_track)) if not isnan(i_max_track).all() else None
+        i_max_peak = float(i_max_track[row_peak]) if row_peak is not None else None
+
+        artifacts = {}
+        for name, path in (('track', self.__logger.track_filename),
+                           ('parameters', self.__manager.results_dir + '/parameters.pdf'),
+                           ('track_plot', self.__manager.track_dir + '/i_max(z).png'),
+                           ('frames', self.__manager.beam_dir),
+                           ('animation', self.__manager.results_dir + '/' + self.__manager.beam_dir_name + '.gif'),
+                           ('video', self.__manager.results_dir + '/' + self.__manager.beam_dir_name + '.avi'),
+                           ('snapshots', self.__manager.snapshots_filename),
+                           ('checkpoints', self.__manager.checkpoints_dir),
+                           ('times', self.__manager.results_dir + '/times.log')):
+            if os.path.exists(path) and (not os.path.isdir(path) or os.listdir(path)):
+                artifacts[name] = os.path.abspath(path)
+
+        return {'run_id': self.__manager.results_dir_name,
+                'results_dir': os.path.abspath(self.__manager.results_dir),
+                'prefix': self.__manager.prefix,
+                'created': created.isoformat(),
+                'beam': self.__beam.parameters,
+                'propagation': {'diffraction': self.__diffraction.info if self.__diffraction else None,
+                                'kerr_effect': self.__kerr_effect.info if self.__kerr_effect else None,
+                                'integrator': self.__integrator.info if self.__integrator else 'lie_splitting',
+                                'n_z': self.__n_z,
+                                'dz_0': self.__dz_0,
+                                'const_dz': self.__const_dz,
+                                'nonlin_phase_max': self.__nonlin_phase_max,
+                                'max_intensity_to_stop': self.__max_intensity_to_stop,
+                                'compiled_steps': self.__compiled_steps},
+                'summary': {'wall_time': wall_time,
+                            'stop_reason': self.__stop_reason,
+                            'n_steps': self.__states_arr.shape[0] - 1,
+                            'z_final': self.__z,
+                            'i_max_peak': i_max_peak,
+                            'i_max_peak_to_i_0': i_max_peak / self.__beam.i_0 if i_max_peak is not None else None,
+                            'z_collapse': float(self.__states_arr[row_peak, 0])
+                            if self.__stop_reason == 'max_intensity_to_stop' and row_peak is not None else None,
+                            'allocations': self.__allocation_monitor.summary()
+                            if self.__allocation_monitor is not None else None},
+                'events': [{'n_step': n_step, 'z': z, 'name': name, 'action': action}
+                           for n_step, z, name, action in self.__fired_events],
+                'cache': {'key': self.__cache_key, 'hit': self.__cache_hit} if self.__cache is not None else None,
+                'branch': self.__branch,
+                'concurrency': dict(Concurrency.current().report(),
+                                    diffraction_fftw_threads=self.__diffraction.n_jobs if self.__diffraction else None),
+                'artifacts': artifacts}
+
+    def __register_run(self, created, wall_time):
+        """Saves run metadata to the results directory and registers the run in the catalog"""
+
+        metadata = self.__make_run_metadata(created, wall_time)
+        with open(self.__manager.run_metadata_filename, 'w') as f:
+            json.dump(metadata, f, indent=4, default=float)
+
+        with Catalog(path=self.__manager.catalog_filename) as catalog:
+            catalog.register(metadata)
+
+    def __measure_step_function(self, func, args, n_step):
+        """
+        Measures time of the function of the step and, after the first step which creates buffers and plans,
+        counts its large allocations
+
+        :return: result of the function
+        """
+
+        if self.__allocation_monitor is not None and n_step > 1:
+            return self.__allocation_monitor.measure(self.__logger.measure_time, func, args, name=func.__qualname__)
+
+        return self.__logger.measure_time(func, args)
+
+    def __grow_states_arr(self, n_step):
+        """Adds STATES_CHUNK rows (no more than needed for n_z steps) to states_arr if the row n_step does not fit"""
+
+        if n_step >= self.__states_arr.shape[0]:
+            n_rows = min(self.STATES_CHUNK, self.__n_z + 1 - self.__states_arr.shape[0])
+            self.__states_arr = concatenate((self.__states_arr, zeros(shape=(n_rows, self.__states_arr.shape[1]))))
+
     def __crop_states_arr(self):
         """
         If the calculations end before reaching the value n_z, crops the remainder of the states_arr
@@ -94,82 +460,247 @@ class Propagator:
         :return: cropped states_arr
         """
 
-        row_max = 0
-        for i in range(self.__states_arr.shape[0] - 1, 0, -1):
-            if self.__states_arr[i][0] != 0 and \
-                    self.__states_arr[i][1] != 0 and \
-                    self.__states_arr[i][2] != 0 and \
-                    self.__states_arr[i][3] != 0:
-                row_max = i + 1
-                break
+        self.__states_arr = self.__states_arr[:self.__n_states, :]
 
-        self.__states_arr = self.__states_arr[:row_max, :]
+    def __start(self):
+        """
+        Initial preparations: directories, parameters, observers
 
-    def propagate(self):
+        :return: datetime and time of the run beginning
         """
-        The main function of class Propagator. Realizes the propagation process of the beam.
+
+        created, t_start = datetime.now(), time()
+        self.__manager.create_dirs()
+        self.__logger.save_initial_parameters(self.__beam, self.__n_z, self.__dz, self.__max_intensity_to_stop)
+
+        # tuned numba threads of the step are applied for the run only, the setting of the process is restored at finish
+        self.__numba_threads = NumbaThreads(n_threads=self.__diffraction.numba_threads if self.__diffraction else None)
+        self.__numba_threads.__enter__()
+
+        # events keep the state of the run (fired, initial value, history), objects may be reused by other runs
+        for event in self.__events:
+            event.reset()
+
+        for observer in self.__observers:
+            observer.start(self)
+
+        if self.__allocation_monitor is not None:
+            self.__allocation_monitor.start()
+
+        return created, t_start
+
+    def __finish(self, created, t_start):
+        """
+        Logs track, plots, animations and times of the run and registers it in the catalog
+
+        :param created: datetime of the run beginning
+        :param t_start: time of the run beginning
 
         :return: None
         """
 
-        # initial preparations
+        for observer in self.__observers:
+            observer.finish(self)
+
+        if self.__allocation_monitor is not None:
+            self.__allocation_monitor.stop()
+
+        self.__numba_threads.__exit__(None, None, None)
+
+        # cropped states arr and log track
+        self.__logger.measure_time(self.__crop_states_arr, [])
+        self.__logger.measure_time(self.__logger.log_track, [self.__states_arr, self.__states_columns,
+                                                             self.__fired_events])
+
+        # print track
+        if self.__flag_print_track and self.__visualizer is not None:
+            parameter_index = self.__states_columns.index('i_max / i_0')
+            self.__logger.measure_time(self.__visualizer.plot_track, [self.__states_arr, parameter_index,
+                                                                      self.__manager.track_dir])
+
+        if self.__plot_observer is not None:
+            make_animation(self.__manager.results_dir, self.__manager.beam_dir_name, self.__manager.beam_dir_name)
+            make_video(self.__manager.results_dir, self.__manager.beam_dir_name, self.__manager.beam_dir_name)
+
+        # log time of all functions
+        self.__logger.log_times()
+
+        # save run metadata and register run in the catalog
+        if self.__flag_register_run:
+            self.__register_run(created, time() - t_start)
+
+        # store finished runs in the cache
+        if self.__cache is not None and self.__stop_reason != 'consumer':
+            self.__logger.measure_time(self.__store_in_cache, [created, time() - t_start])
+
+    def __store_in_cache(self, created, wall_time):
+        """Stores the states table, the final field, the final state and artifacts of the run in the cache"""
+
+        entry = {'configuration': self.configuration,
+                 'stop_reason': self.__stop_reason,
+                 'z': self.__z,
+                 'dz': self.__dz,
+                 'state': self.__state,
+                 'events': self.__fired_events,
+                 'metadata': self.__make_run_metadata(created, wall_time)}
+        arrays = {'states': self.__states_arr, 'field': self.__beam._field}
+        run_metadata_name = os.path.basename(self.__manager.run_metadata_filename)  # run.json is written by every run
+        self.__cache.store_run(self.__cache_key, entry, arrays, self.__manager.results_dir,
+                               exclude=(run_metadata_name,))
+
+    def __load_from_cache(self):
+        """
+        Restores the states table, the final field, the fired events and artifacts of the stored run with the same key
+        and registers the run as computed
+
+        :return: StepView of the final state
+        """
+
+        created, t_start = datetime.now(), time()
         self.__manager.create_dirs()
-        self.__logger.save_initial_parameters(self.__beam, self.__n_z, self.__dz, self.__max_intensity_to_stop)
 
-        # main cycle
-        for n_step in range(int(self.__n_z) + 1):
-            if n_step:
+        entry, arrays = self.__cache.load_run(self.__cache_key)
+        self.__cache.restore_artifacts(self.__cache_key, self.__manager.results_dir)
+
+        self.__states_arr, self.__n_states = arrays['states'], arrays['states'].shape[0]
+        self.__beam._field[...] = arrays['field']
+        self.__beam.update_intensity()
+        self.__z, self.__dz, self.__stop_reason = entry['z'], entry['dz'], entry['stop_reason']
+        self.__fired_events = [tuple(e) for e in entry['events']]
+        self.__state = entry['state']
+        self.__cache_hit = True
+
+        if self.__flag_register_run:
+            self.__register_run(created, time() - t_start)
+
+        return self.__make_view(self.__n_states - 1, self.__state, stop=True)
 
-                # diffraction
-                if self.__diffraction:
-                    self.__logger.measure_time(self.__diffraction.process_diffraction, [self.__dz])
+    def iter_steps(self):
+        """
+        Pull-based propagation: the generator makes steps along z and yields StepView (read-only views of the beam
+        and the states table) after every step including the initial state (with the compiled driver after the steps
+        at which it returns to Python, see CompiledDriverR). When the generator is exhausted or
+        closed by the consumer (stop reason 'consumer'), the run is finished as by propagate. On a hit of the cache
+        the only view is the final state of the stored run.
+
+        :return: generator of StepView
+        """
 
-                # kerr effect
-                if self.__kerr_effect:
-                    self.__logger.measure_time(self.__kerr_effect.process_kerr_effect, [self.__dz])
+        # observers may be added after the construction, so the key is taken here
+        if self.__cache is not None:
+            self.__cache_key = self.__cache.key(self.configuration)
+            if self.__cache.has_run(self.__cache_key):
+                yield self.__load_from_cache()
+                return
+
+        created, t_start = self.__start()
+
+        stop = False
+        try:
+            n_step = self.__n_step_0
+            while True:
+                # calculate diagnostics and flush current state
+                state = self.__logger.measure_time(self.__make_state, [n_step])
+                self.__state = state
+                diagnostics = array([state[key] for key in self.__diagnostics_keys], dtype=float)
+                self.__grow_states_arr(n_step)
+                self.__logger.measure_time(self.__flush_current_state, [self.__states_arr, n_step, self.__z,
+                                                                        self.__dz, self.__beam.i_max, self.beam.i_0,
+                                                                        diagnostics])
+                self.__n_states = n_step + 1
+
+                # notify observers which are due at this step
+                view = None
+                for observer in self.__observers:
+                    if observer.is_due(n_step, self.__z):
+                        view = view or self.__make_view(n_step, state)
+                        self.__logger.measure_time(observer.notify, [view], name=observer.name)
+
+                # check events and if calculations must be stopped
+                stop = self.__logger.measure_time(self.__process_events, [n_step, state])
+
+                yield self.__make_view(n_step, state, stop)
+
+                if stop or n_step >= int(self.__n_z):
+                    break
+
+                if self.__driver:
+                    # steps up to the next cadence of observers or events in one compiled call
+                    n_step = self.__advance_compiled(n_step)
+                    continue
+
+                n_step += 1
+                if self.__integrator:
+                    # step of integrator
+                    self.__measure_step_function(self.__integrator.process_step, [self.__dz], n_step)
+                else:
+                    # diffraction
+                    if self.__diffraction:
+                        self.__measure_step_function(self.__diffraction.process_diffraction, [self.__dz], n_step)
+
+                    # kerr effect
+                    if self.__kerr_effect:
+                        self.__measure_step_function(self.__kerr_effect.process_kerr_effect, [self.__dz], n_step)
 
                 # increase evolutionary coordinate z by current step
                 self.__z += self.__dz
 
                 # update intensity and step along z (if needed)
-                self.__logger.measure_time(self.__beam.update_intensity, [])
+                self.__measure_step_function(self.__beam.update_intensity, [], n_step)
                 if not self.__const_dz:
                     self.__dz = self.__logger.measure_time(self.__update_dz, [self.__beam.medium.k_0,
                                                                               self.__beam.medium.n_0,
                                                                               self.__beam.medium.n_2,
                                                                               self.__beam.i_max,
-                                                                              self.__dz])
+                                                                              self.__dz,
+                                                                              self.__nonlin_phase_max])
 
-            # flush current state
-            self.__logger.measure_time(self.__flush_current_state, [self.__states_arr, n_step, self.__z, self.__dz,
-                                                                    self.__beam.i_max, self.beam.i_0])
+        except GeneratorExit:
+            if not stop:
+                self.__stop_reason = 'consumer'
+            self.__finish(created, t_start)
+            raise
 
-            # print current state
-            if self.__print_current_state_every:
-                if not n_step % self.__print_current_state_every:
-                    self.__logger.measure_time(self.__logger.print_current_state, [n_step, self.__states_arr,
-                                                                                   self.__states_columns])
+        self.__finish(created, t_start)
 
-            # plot beam
-            if self.__plot_beam_every and not (n_step % self.__plot_beam_every):
-                self.__logger.measure_time(self.__visualizer.plot_pair, [self.__beam, self.__z, n_step])
+    def __advance_compiled(self, n_step):
+        """
+        Advances the beam by the compiled driver up to the next step at which an observer is due, an event may fire
+        or n_z is reached, but not more than compiled_steps steps
 
-            # check if calculations must be stopped
-            if self.__beam.i_max > self.__max_intensity_to_stop:
-                break
+        :param n_step: number of the last done step
 
-        # cropped states arr and log track
-        self.__logger.measure_time(self.__crop_states_arr, [])
-        self.__logger.measure_time(self.__logger.log_track, [self.__states_arr, self.__states_columns])
+        :return: number of the last done step
+        """
 
-        # print track
-        if self.__flag_print_track:
-            parameter_index = self.__states_columns.index('i_max / i_0')
-            self.__logger.measure_time(self.__visualizer.plot_track, [self.__states_arr, parameter_index,
-                                                                      self.__manager.track_dir])
+        n_steps = min(self.__compiled_steps, int(self.__n_z) - n_step)
+        z_stop = float('inf')
+        for observer in self.__observers:
+            next_step, next_z = observer.next_due(n_step), observer.next_z
+            if next_step is not None:
+                n_steps = min(n_steps, next_step - n_step)
+            if next_z is not None:
+                z_stop = min(z_stop, next_z)
 
-        make_animation(self.__manager.results_dir, self.__manager.beam_dir_name, self.__manager.beam_dir_name)
-        make_video(self.__manager.results_dir, self.__manager.beam_dir_name, self.__manager.beam_dir_name)
+        while n_step + n_steps >= self.__states_arr.shape[0]:
+            self.__grow_states_arr(n_step + n_steps)
 
-        # log time of all functions
-        self.__logger.log_times()
+        power_0 = self.__initial_reduced_quantities['power'] if self.__flag_diagnostics else None
+        n_step, self.__z, self.__dz = self.__logger.measure_time(self.__driver.advance, [
+            self.__states_arr, n_step, n_steps, self.__z, self.__dz, self.__const_dz, z_stop, self.__events, power_0])
+
+        return n_step
+
+    def __make_view(self, n_step, state, stop=False):
+        return StepView(n_step=n_step, z=self.__z, dz=self.__dz, state=state, beam=self.__beam,
+                        states=self.__states_arr[:n_step + 1], states_columns=self.__states_columns, stop=stop)
+
+    def propagate(self):
+        """
+        The main function of class Propagator. Realizes the propagation process of the beam.
+
+        :return: None
+        """
+
+        for _ in self.iter_steps():
+            pass
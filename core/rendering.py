@@ -0,0 +1,146 @@
+from multiprocessing import Pool, cpu_count
+import os
+
+from .beam.beam import Beam
+from .functions import make_animation, make_video
+from .precision import Precision
+from .snapshot import SnapshotReader
+from .threads import Concurrency
+from .visualization import VisualizerR, VisualizerXY
+
+
+class SnapshotBeam:
+    """
+    Class that restores from the snapshot archive all beam attributes needed by visualizers and spectra, so frames
+    can be rendered without the propagator and physical calculations.
+    """
+
+    _field_to_intensity = staticmethod(Beam._field_to_intensity)
+
+    def __init__(self, **kwargs):
+        self.__header = kwargs['header']  # header of snapshot archive
+        # archives of older versions have no precision
+        self.__precision = Precision.make(self.__header.get('precision'))
+
+        self._field = None
+        self._intensity = None
+
+    def load(self, reader, step):
+        """Loads field and intensity of the snapshot for step"""
+
+        self._field = reader.read('field', step=step)
+        self._intensity = self._field_to_intensity(self._field)
+
+    def full_field(self):
+        """Snapshots of symmetric beams store the full grid (see SnapshotWriter), so the field is returned as is"""
+        return self._field
+
+    def full_intensity(self):
+        return self._intensity
+
+    @property
+    def info(self):
+        return self.__header['beam']
+
+    @property
+    def m(self):
+        return self.__header['m']
+
+    @property
+    def precision(self):
+        return self.__precision
+
+    @property
+    def i_0(self):
+        return self.__header['i_0']
+
+    @property
+    def n_r(self):
+        return self.__header['n_r']
+
+    @property
+    def dr(self):
+        return self.__header['dr']
+
+    @property
+    def r_max(self):
+        return self.__header['n_r'] * self.__header['dr']
+
+    @property
+    def n_x(self):
+        return self.__header['n_x']
+
+    @property
+    def n_y(self):
+        return self.__header['n_y']
+
+
+def _render_steps(args):
+    """Renders frames for part of steps in a separate process"""
+
+    path, visualizer_kwargs, path_to_save, steps = args
+
+    with SnapshotReader(path=path) as reader:
+        beam = SnapshotBeam(header=reader.header)
+        visualizer_class = VisualizerR if beam.info == 'beam_r' else VisualizerXY
+        visualizer = visualizer_class(beam=beam, **visualizer_kwargs)
+        visualizer.get_path_to_save(path_to_save)
+
+        for step in steps:
+            beam.load(reader, step)
+            visualizer.plot_pair(beam, reader.z(step), step)
+
+    return len(steps)
+
+
+class SnapshotRenderer:
+    """
+    Class for offline rendering of frames, spectra and videos from the snapshot archive of a run with new visualizer
+    settings (crop coefficients, logarithmic scale, panels, colormaps). Frames are rendered in parallel processes.
+    """
+
+    def __init__(self, **kwargs):
+        self.__results_dir = kwargs['results_dir']  # results directory of the run
+        self.__path = kwargs.get('path', self.__results_dir + '/snapshots.vsnap')  # path to snapshot archive
+        self.__dir_name = kwargs.get('dir_name', 'rendered')  # name of directory for rendered frames
+
+        self.__visualizer_kwargs = kwargs['visualizer_kwargs']  # settings of VisualizerR / VisualizerXY
+        self.__n_jobs = kwargs.get('n_jobs', cpu_count())  # number of processes
+        self.__steps = kwargs.get('steps', None)  # rendered steps, all steps by default
+
+        self.__make_animation = kwargs.get('make_animation', True)  # make gif-animation or not
+        self.__make_video = kwargs.get('make_video', True)  # make video or not
+
+    @property
+    def path_to_save(self):
+        return self.__results_dir + '/' + self.__dir_name
+
+    def render(self):
+        """
+        Renders frames of all (or selected) steps and makes animation and video
+
+        :return: number of rendered frames
+        """
+
+        with SnapshotReader(path=self.__path) as reader:
+            steps = reader.steps if self.__steps is None else [e for e in reader.steps if e in self.__steps]
+
+        if not os.path.exists(self.path_to_save):
+            os.makedirs(self.path_to_save)
+
+        n_jobs = max(min(self.__n_jobs, len(steps)), 1)
+        tasks = [(self.__path, self.__visualizer_kwargs, self.path_to_save, steps[i::n_jobs]) for i in range(n_jobs)]
+
+        if n_jobs == 1:
+            n_frames = sum(map(_render_steps, tasks))
+        else:
+            with Pool(n_jobs, *Concurrency.current().initializer(n_jobs)) as pool:
+                n_frames = sum(pool.map(_render_steps, tasks))
+
+        if n_frames:
+            if self.__make_animation:
+                make_animation(self.__results_dir, self.__dir_name, self.__dir_name)
+            if self.__make_video:
+                make_video(self.__results_dir, self.__dir_name, self.__dir_name)
+
+        return n_frames
@@ -0,0 +1,411 @@
+from numpy import frombuffer, ascontiguousarray, concatenate, sqrt, exp, angle, pi, rint, mod, prod, float16, float32, \
+    uint8, uint16, complex64, dtype as np_dtype, max as maximum
+import bz2
+import json
+import lzma
+import struct
+import zlib
+
+
+class SnapshotWriter:
+    """
+    Class for saving field snapshots at selected steps to a single archive file.
+
+    Every snapshot is optionally cropped to a central window, decimated and quantised (intensity is saved as float16
+    normalized to its maximum, phase is saved as unsigned integers with phase_bits bits), after which every array is
+    compressed with a stdlib codec by chunks of rows along the first axis of the grid (about chunk_size elements each).
+    The archive is a sequence of records with own headers followed by an index, so a snapshot is read by step or z
+    without loading the whole file, and the chunks of the record header allow to read a region of the snapshot
+    without decompression of the whole array (see SnapshotReader).
+
+    Snapshots of time-resolved beams (BeamRT, BeamXYT) are not supported.
+
+    Archive layout:
+    MAGIC | header record | snapshot records ... | index (compressed json) | index offset | MAGIC
+    """
+
+    MAGIC = b'VSNAP001'
+    RECORD = b'CHNK'
+    CODECS = {'zlib': (zlib.compress, zlib.decompress),
+              'bz2': (bz2.compress, bz2.decompress),
+              'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.decompress)}
+
+    CHUNK_SIZE = 2**16  # default number of elements in a compressed chunk
+
+    def __init__(self, **kwargs):
+        self.__beam = kwargs['beam']  # beam object
+        if self.__beam.info not in ('beam_r', 'beam_xy'):
+            raise Exception('Wrong beam: snapshots of time-resolved beams are not supported!')
+
+        self.__quantities = kwargs.get('quantities', ('intensity', 'phase'))  # saved arrays: intensity, phase, field
+        for quantity in self.__quantities:
+            if quantity not in ('intensity', 'phase', 'field'):
+                raise Exception('Wrong quantity!')
+
+        self.__remaining_central_part_coeff = kwargs.get('remaining_central_part_coeff', 1.0)  # crop coefficient
+        if self.__remaining_central_part_coeff <= 0 or self.__remaining_central_part_coeff > 1:
+            raise Exception('Wrong remaining_central_part_coeff!')
+        self.__decimation = kwargs.get('decimation', 1)  # every decimation-th point along each axis is saved
+
+        self.__intensity_dtype = kwargs.get('intensity_dtype', 'float16')  # float16 or float32
+        if self.__intensity_dtype not in ('float16', 'float32'):
+            raise Exception('Wrong intensity_dtype!')
+        self.__phase_bits = kwargs.get('phase_bits', 8)  # 8, 16 or None for float32 phase
+        if self.__phase_bits not in (8, 16, None):
+            raise Exception('Wrong phase_bits!')
+
+        self.__codec = kwargs.get('codec', 'zlib')  # stdlib compression codec
+        if self.__codec not in self.CODECS:
+            raise Exception('Wrong codec!')
+        self.__level = kwargs.get('level', 6)  # compression level
+        self.__chunk_size = kwargs.get('chunk_size', self.CHUNK_SIZE)  # number of elements in a compressed chunk
+        if self.__chunk_size < 1:
+            raise Exception('Wrong chunk_size!')
+
+        self.__file = None
+        self.__path = None
+        self.__index = []
+
+        self.__slices = self.__make_slices()
+
+    @property
+    def path(self):
+        return self.__path
+
+    @property
+    def parameters(self):
+        """Settings which define the contents of the archive"""
+        return {'quantities': list(self.__quantities),
+                'remaining_central_part_coeff': self.__remaining_central_part_coeff,
+                'decimation': self.__decimation,
+                'intensity_dtype': self.__intensity_dtype,
+                'phase_bits': self.__phase_bits,
+                'codec': self.__codec,
+                'level': self.__level,
+                'chunk_size': self.__chunk_size}
+
+    def __make_slices(self):
+        """
+        Calculates slices of the retained central window with decimation
+
+        :return: tuple of slices along each axis
+        """
+
+        coeff, step = self.__remaining_central_part_coeff, self.__decimation
+        if self.__beam.info == 'beam_r':
+            n_r = self.__beam.n_r
+            return slice(0, max(int(coeff * n_r), 1), step),
+
+        slices = []
+        for n in (self.__beam.n_x, self.__beam.n_y):
+            delta = max(int(coeff / 2 * n), 1)
+            slices.append(slice(max(n // 2 - delta, 0), min(n // 2 + delta, n), step))
+
+        return tuple(slices)
+
+    def __make_header(self):
+        """Grid and beam parameters needed to interpret snapshots without the beam object"""
+
+        header = {'beam': self.__beam.info,
+                  'medium': self.__beam.medium.info,
+                  'lmbda': self.__beam.lmbda,
+                  'M': self.__beam.M,
+                  'm': self.__beam.m,
+                  'i_0': self.__beam.i_0,
+                  'z_diff': self.__beam.z_diff,
+                  'precision': self.__beam.precision.name,
+                  'quantities': list(self.__quantities),
+                  'intensity_dtype': self.__intensity_dtype,
+                  'phase_bits': self.__phase_bits,
+                  'codec': self.__codec,
+                  'chunk_size': self.__chunk_size,
+                  'decimation': self.__decimation,
+                  'remaining_central_part_coeff': self.__remaining_central_part_coeff}
+
+        if self.__beam.info == 'beam_r':
+            s = self.__slices[0]
+            header.update({'n_r': len(range(*s.indices(self.__beam.n_r))),
+                           'dr': self.__beam.dr * self.__decimation,
+                           'r_0': self.__beam.r_0})
+        else:
+            s_x, s_y = self.__slices
+            header.update({'n_x': len(range(*s_x.indices(self.__beam.n_x))),
+                           'n_y': len(range(*s_y.indices(self.__beam.n_y))),
+                           'dx': self.__beam.dx * self.__decimation,
+                           'dy': self.__beam.dy * self.__decimation,
+                           'x_left': self.__beam.xs[s_x.start],
+                           'y_left': self.__beam.ys[s_y.start],
+                           'x_0': self.__beam.x_0,
+                           'y_0': self.__beam.y_0})
+
+        return header
+
+    def __write_record(self, meta, data=b''):
+        """
+        Writes record with its own header to the archive
+
+        :return: offset of the record
+        """
+
+        meta_bytes = json.dumps(meta).encode()
+        offset = self.__file.tell()
+        self.__file.write(struct.pack('<4sIQ', self.RECORD, len(meta_bytes), len(data)))
+        self.__file.write(meta_bytes)
+        self.__file.write(data)
+
+        return offset
+
+    def __compress(self, arr):
+        """
+        Compresses the array by chunks of rows along the first axis
+
+        :return: list of compressed chunks and number of rows in a chunk
+        """
+
+        compress = self.CODECS[self.__codec][0]
+        chunk_rows = max(self.__chunk_size // int(prod(arr.shape[1:])), 1)
+        chunks = [compress(ascontiguousarray(arr[i:i + chunk_rows]).tobytes(), self.__level)
+                  for i in range(0, arr.shape[0], chunk_rows)]
+
+        return chunks, chunk_rows
+
+    def open(self, path):
+        """Creates archive file and writes header"""
+
+        self.__path = path
+        self.__file = open(path, 'wb')
+        self.__file.write(self.MAGIC)
+        self.__write_record({'kind': 'header', 'header': self.__make_header()})
+        self.__index = []
+
+    def write(self, beam, z, step):
+        """
+        Saves snapshot of the beam
+
+        :param beam: beam object
+        :param z: current evolutionary coordinate z
+        :param step: number of step along evolutionary coordinate z
+
+        :return: None
+        """
+
+        field = beam.full_field()[self.__slices]
+
+        arrays = {}
+        meta = {'kind': 'snapshot', 'step': int(step), 'z': float(z), 'shape': list(field.shape), 'arrays': {}}
+
+        if 'intensity' in self.__quantities:
+            intensity = beam._field_to_intensity(field)
+            scale = float(maximum(intensity)) or 1.0
+            arrays['intensity'] = (intensity / scale).astype(float16 if self.__intensity_dtype == 'float16'
+                                                             else float32)
+            meta['intensity_scale'] = scale
+
+        if 'phase' in self.__quantities:
+            phase = angle(field)
+            if self.__phase_bits is None:
+                arrays['phase'] = phase.astype(float32)
+            else:
+                levels = 2**self.__phase_bits
+                arrays['phase'] = mod(rint((phase + pi) / (2 * pi) * levels), levels).astype(
+                    uint8 if self.__phase_bits == 8 else uint16)
+
+        if 'field' in self.__quantities:
+            arrays['field'] = field.astype(complex64)
+
+        data, start = [], 0
+        for name, arr in arrays.items():
+            chunks, chunk_rows = self.__compress(arr)
+            lengths = [len(chunk) for chunk in chunks]
+            meta['arrays'][name] = {'dtype': arr.dtype.str, 'start': start, 'chunk_rows': chunk_rows,
+                                    'lengths': lengths}
+            data += chunks
+            start += sum(lengths)
+
+        offset = self.__write_record(meta, b''.join(data))
+        self.__index.append({'step': int(step), 'z': float(z), 'offset': offset})
+
+    def close(self):
+        """Writes index and footer and closes the archive"""
+
+        if self.__file is None:
+            return
+
+        index_offset = self.__file.tell()
+        index_bytes = zlib.compress(json.dumps(self.__index).encode())
+        self.__file.write(index_bytes)
+        self.__file.write(struct.pack('<QQ', index_offset, len(index_bytes)))
+        self.__file.write(self.MAGIC)
+        self.__file.close()
+        self.__file = None
+
+
+class SnapshotReader:
+    """
+    Class for random access to snapshots saved with SnapshotWriter. If the archive was not closed properly
+    (for example, calculations were interrupted), the index is rebuilt by scanning record headers.
+    """
+
+    def __init__(self, **kwargs):
+        self.__path = kwargs['path']  # path to archive
+        self.__file = open(self.__path, 'rb')
+
+        if self.__file.read(len(SnapshotWriter.MAGIC)) != SnapshotWriter.MAGIC:
+            raise Exception('Wrong snapshot archive!')
+
+        self.__header = self.__read_meta(len(SnapshotWriter.MAGIC))[0]['header']
+        self.__decompress = SnapshotWriter.CODECS[self.__header['codec']][1]
+
+        self.__index = self.__read_index()
+        self.__steps = [e['step'] for e in self.__index]
+        self.__zs = [e['z'] for e in self.__index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.__index)
+
+    @property
+    def header(self):
+        return self.__header
+
+    @property
+    def steps(self):
+        return self.__steps
+
+    @property
+    def zs(self):
+        return self.__zs
+
+    def close(self):
+        self.__file.close()
+
+    def __read_meta(self, offset):
+        """
+        :param offset: offset of the record
+
+        :return: record meta, offset of the record data and length of the data
+        """
+
+        self.__file.seek(offset)
+        head = self.__file.read(struct.calcsize('<4sIQ'))
+        if len(head) < struct.calcsize('<4sIQ'):
+            return None, None, None
+        tag, meta_length, data_length = struct.unpack('<4sIQ', head)
+        if tag != SnapshotWriter.RECORD:
+            return None, None, None
+        meta = json.loads(self.__file.read(meta_length).decode())
+
+        return meta, self.__file.tell(), data_length
+
+    def __read_index(self):
+        footer_size = struct.calcsize('<QQ') + len(SnapshotWriter.MAGIC)
+        self.__file.seek(0, 2)
+        file_size = self.__file.tell()
+
+        if file_size >= footer_size:
+            self.__file.seek(file_size - footer_size)
+            footer = self.__file.read(footer_size)
+            if footer[-len(SnapshotWriter.MAGIC):] == SnapshotWriter.MAGIC:
+                index_offset, index_length = struct.unpack('<QQ', footer[:struct.calcsize('<QQ')])
+                self.__file.seek(index_offset)
+                return json.loads(zlib.decompress(self.__file.read(index_length)).decode())
+
+        # the archive was not closed, rebuild index by scanning records
+        index = []
+        offset = len(SnapshotWriter.MAGIC)
+        while True:
+            meta, data_offset, data_length = self.__read_meta(offset)
+            if meta is None or data_offset + data_length > file_size:
+                break
+            if meta['kind'] == 'snapshot':
+                index.append({'step': meta['step'], 'z': meta['z'], 'offset': offset})
+            offset = data_offset + data_length
+
+        return index
+
+    def __position(self, step, z):
+        if step is not None:
+            if step not in self.__steps:
+                raise Exception('No snapshot for step %d!' % step)
+            return self.__steps.index(step)
+        elif z is not None:
+            return min(range(len(self.__zs)), key=lambda i: abs(self.__zs[i] - z))
+        else:
+            raise Exception('Step or z must be specified!')
+
+    def __read_array(self, info, shape, data_offset, region):
+        """
+        Decompresses the chunks of the array which overlap the region
+
+        :param info: description of the array in the record meta
+        :param shape: shape of the array
+        :param data_offset: offset of the record data
+        :param region: tuple of slices of the array or None for the whole array
+
+        :return: array of the region
+        """
+
+        lengths = info.get('lengths', [info.get('length')])  # archives of older versions have one chunk
+        chunk_rows = info.get('chunk_rows', shape[0])
+
+        region = tuple(region) if region is not None else (slice(None),)
+        rows = range(*region[0].indices(shape[0]))
+        if not rows or rows.step < 0:
+            raise Exception('Wrong region!')
+        first, last = rows.start // chunk_rows, rows[-1] // chunk_rows
+
+        self.__file.seek(data_offset + info['start'] + sum(lengths[:first]))
+        chunks = [frombuffer(self.__decompress(self.__file.read(length)), dtype=np_dtype(info['dtype']))
+                  for length in lengths[first:last + 1]]
+        arr = concatenate(chunks) if len(chunks) > 1 else chunks[0]
+        arr = arr.reshape((-1,) + tuple(shape[1:]))
+
+        offset = first * chunk_rows
+        return arr[(slice(rows.start - offset, rows[-1] + 1 - offset, rows.step),) + region[1:]]
+
+    def read(self, quantity, step=None, z=None, region=None):
+        """
+        Reads one array of the snapshot for the step or for the nearest z. Only chunks which overlap the region
+        are decompressed.
+
+        :param quantity: intensity (in units of I_0), phase or field
+        :param step: number of step along evolutionary coordinate z
+        :param z: evolutionary coordinate z
+        :param region: tuple of slices of the saved grid (for example, (slice(0, 64),) for the beam with radial
+        coordinate r) or None for the whole snapshot
+
+        :return: array
+        """
+
+        meta, data_offset, _ = self.__read_meta(self.__index[self.__position(step, z)]['offset'])
+
+        if quantity == 'field' and 'field' not in meta['arrays']:
+            intensity = self.read('intensity', meta['step'], region=region)
+            phase = self.read('phase', meta['step'], region=region)
+            return (sqrt(intensity) * exp(1j * phase)).astype(complex64)
+
+        if quantity == 'intensity' and 'intensity' not in meta['arrays'] and 'field' in meta['arrays']:
+            field = self.read('field', meta['step'], region=region)
+            return field.real**2 + field.imag**2
+
+        if quantity not in meta['arrays']:
+            raise Exception('No %s in snapshot!' % quantity)
+
+        arr = self.__read_array(meta['arrays'][quantity], meta['shape'], data_offset, region)
+
+        if quantity == 'intensity':
+            return arr.astype(float32) * meta['intensity_scale']
+        elif quantity == 'phase':
+            if self.__header['phase_bits'] is None:
+                return arr.copy()
+            return (arr.astype(float32) * (2 * pi / 2**self.__header['phase_bits']) - pi).astype(float32)
+        else:
+            return arr.copy()
+
+    def z(self, step):
+        return self.__zs[self.__position(step, None)]
@@ -1,2 +1,3 @@
 from .spectrum_r import SpectrumR
-from .spectrum_xy import SpectrumXY
\ No newline at end of file
+from .spectrum_xy import SpectrumXY
+from .vortex import VortexSpectra
@@ -1,24 +1,35 @@
-from numpy import zeros, float64, complex64, exp, arctan2, pi, angle
-from numpy.fft import fft2, fftshift
+from numpy import zeros, exp, arctan2, pi, multiply
 from numba import jit
+from pyfftw import FFTW, empty_aligned
 
-from core.functions import r_to_xy_real, r_to_xy_complex
+from ..threads import default_threads
+
+from core.functions import r_to_xy_real_in_place, r_to_xy_complex_in_place
 
 
 class SpectrumR:
     def __init__(self, **kwargs):
         self.__beam = kwargs['beam']
-        self.__intensity_xy = zeros((2 * self.__beam.n_r, 2 * self.__beam.n_r), dtype=float64)
-        self.__kerr_phase_xy = zeros((2 * self.__beam.n_r, 2 * self.__beam.n_r), dtype=float64)
-        self.__phase_xy = zeros((2 * self.__beam.n_r, 2 * self.__beam.n_r), dtype=float64)
 
-        self.__spectrum = zeros((2 * self.__beam.n_r, 2 * self.__beam.n_r), dtype=complex64)
-        self.__spectrum_intensity = zeros((2 * self.__beam.n_r, 2 * self.__beam.n_r), dtype=complex64)
+        # arrays follow the precision policy of the beam
+        precision = self.__beam.precision
+        n_perp = 2 * self.__beam.n_r
+        self.__intensity_xy = zeros((n_perp, n_perp), dtype=precision.real_dtype)
+        self.__kerr_phase_xy = zeros((n_perp, n_perp), dtype=precision.real_dtype)
+        self.__phase_xy = zeros((n_perp, n_perp), dtype=precision.real_dtype)
+
+        self.__spectrum = empty_aligned((n_perp, n_perp), dtype=precision.complex_dtype)
+        self.__spectrum_intensity = zeros((n_perp, n_perp), dtype=precision.real_dtype)
 
-        self.__vortex_phase = self.__initialize_vortex_phase(self.__beam.m,
-                                                             2 * self.__beam.r_max,
-                                                             2 * self.__beam.n_r,
-                                                             self.__beam.dr)
+        # FFTW plan with own aligned input buffer, numpy fft2 would upcast the field to complex128, the field (x,y)
+        # is interpolated directly to the input buffer
+        self.__fft_obj = FFTW(empty_aligned((n_perp, n_perp), dtype=precision.complex_dtype), self.__spectrum,
+                              axes=(0, 1), direction='FFTW_FORWARD', flags=('FFTW_ESTIMATE',),
+                              threads=default_threads((n_perp, n_perp), str(precision.complex_dtype))['fftw_threads'])
+
+        self.__vortex_phase = zeros((n_perp, n_perp), dtype=precision.complex_dtype)
+        self.__initialize_vortex_phase(self.__vortex_phase, self.__beam.m, 2 * self.__beam.r_max, n_perp,
+                                       self.__beam.dr)
 
     @property
     def intensity_xy(self):
@@ -36,36 +47,40 @@ class SpectrumR:
     def spectrum_intensity(self):
         return self.__spectrum_intensity
 
-    def __make_fft(self, arr):
-        self.__spectrum = fft2(arr)
-        self.__spectrum = fftshift(self.__spectrum, axes=(0, 1))
+    @staticmethod
+    @jit(nopython=True)
+    def __shifted_intensity(spectrum, spectrum_intensity):
+        """Squared norm of the spectrum with zero frequency shifted to the center (as fftshift) in place"""
+        n_x, n_y = spectrum.shape[0], spectrum.shape[1]
+        for i in range(n_x):
+            i_shifted = (i + n_x // 2) % n_x
+            for j in range(n_y):
+                w = spectrum[i, j]
+                spectrum_intensity[i_shifted, (j + n_y // 2) % n_y] = w.real**2 + w.imag**2
 
     @staticmethod
     @jit(nopython=True)
-    def __initialize_vortex_phase(m, perp_max, n_perp, d_perp):
-        vortex_phase = zeros((n_perp, n_perp), dtype=complex64)
+    def __initialize_vortex_phase(vortex_phase, m, perp_max, n_perp, d_perp):
         for i in range(n_perp):
             for j in range(n_perp):
                 x, y = d_perp * i - 0.5 * perp_max, d_perp * j - 0.5 * perp_max
                 vortex_phase[i, j] = exp(1j * m * (arctan2(x, y) + pi))
 
-        return vortex_phase
-
     def update_data(self):
         # intensity
-        self.__intensity_xy = r_to_xy_real(self.__beam._intensity)
+        r_to_xy_real_in_place(self.__beam._intensity, self.__intensity_xy)
 
         # field
-        field_xy = r_to_xy_complex(self.__beam._field)
+        field_xy = self.__fft_obj.input_array
+        r_to_xy_complex_in_place(self.__beam._field, field_xy)
 
         # kerr phase
-        self.__kerr_phase_xy = angle(field_xy)
+        arctan2(field_xy.imag, field_xy.real, out=self.__kerr_phase_xy)
 
         # full phase
-        field_xy *= self.__vortex_phase
-        self.__phase_xy = angle(field_xy)
+        multiply(field_xy, self.__vortex_phase, out=field_xy)
+        arctan2(field_xy.imag, field_xy.real, out=self.__phase_xy)
 
         # spectrum
-        self.__make_fft(field_xy)
-        self.__spectrum_intensity = self.__beam._field_to_intensity(self.__spectrum)
-
+        self.__fft_obj()
+        self.__shifted_intensity(self.__spectrum, self.__spectrum_intensity)
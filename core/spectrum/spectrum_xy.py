@@ -1,16 +1,27 @@
-from numpy import zeros, float64, complex64, angle
-from numpy.fft import fft2, fftshift
-import numpy as np
+from numpy import zeros, arctan2
+from numba import jit
+from pyfftw import FFTW, empty_aligned
+
+from ..threads import default_threads
 
 
 class SpectrumXY:
     def __init__(self, **kwargs):
         self.__beam = kwargs['beam']
-        self.__intensity_xy = zeros((self.__beam.n_x, self.__beam.n_y), dtype=float64)
-        self.__phase_xy = zeros((self.__beam.n_x, self.__beam.n_y), dtype=float64)
 
-        self.__spectrum = zeros((self.__beam.n_x, self.__beam.n_y), dtype=complex64)
-        self.__spectrum_intensity = zeros((self.__beam.n_x, self.__beam.n_y), dtype=complex64)
+        # arrays follow the precision policy of the beam
+        precision = self.__beam.precision
+        self.__intensity_xy = zeros((self.__beam.n_x, self.__beam.n_y), dtype=precision.real_dtype)
+        self.__phase_xy = zeros((self.__beam.n_x, self.__beam.n_y), dtype=precision.real_dtype)
+
+        self.__spectrum = empty_aligned((self.__beam.n_x, self.__beam.n_y), dtype=precision.complex_dtype)
+        self.__spectrum_intensity = zeros((self.__beam.n_x, self.__beam.n_y), dtype=precision.real_dtype)
+
+        # FFTW plan with own aligned input buffer, the field is copied to it on every update
+        self.__fft_obj = FFTW(empty_aligned((self.__beam.n_x, self.__beam.n_y), dtype=precision.complex_dtype),
+                              self.__spectrum, axes=(0, 1), direction='FFTW_FORWARD', flags=('FFTW_ESTIMATE',),
+                              threads=default_threads((self.__beam.n_x, self.__beam.n_y),
+                                                      str(precision.complex_dtype))['fftw_threads'])
 
     @property
     def intensity_xy(self):
@@ -24,24 +35,26 @@ class SpectrumXY:
     def spectrum_intensity(self):
         return self.__spectrum_intensity
 
-    def __make_fft(self, arr):
-        self.__spectrum = fft2(arr)
-        self.__spectrum = fftshift(self.__spectrum, axes=(0, 1))
+    @staticmethod
+    @jit(nopython=True)
+    def __shifted_intensity(spectrum, spectrum_intensity):
+        """Squared norm of the spectrum with zero frequency shifted to the center (as fftshift) in place"""
+        n_x, n_y = spectrum.shape[0], spectrum.shape[1]
+        for i in range(n_x):
+            i_shifted = (i + n_x // 2) % n_x
+            for j in range(n_y):
+                w = spectrum[i, j]
+                spectrum_intensity[i_shifted, (j + n_y // 2) % n_y] = w.real**2 + w.imag**2
 
     def update_data(self):
         # intensity
-        self.__intensity_xy = self.__beam._intensity
+        self.__intensity_xy = self.__beam.full_intensity()
 
-        field_xy = self.__beam._field
+        field_xy = self.__beam.full_field()
 
         # phase
-        self.__phase_xy = angle(field_xy)
-
-        print('update_data')
-        print('max =', np.max(self.__phase_xy))
-        print('min =', np.min(self.__phase_xy))
+        arctan2(field_xy.imag, field_xy.real, out=self.__phase_xy)
 
         # spectrum
-        self.__make_fft(field_xy)
-        self.__spectrum_intensity = self.__beam._field_to_intensity(self.__spectrum)
-
+        self.__fft_obj(field_xy)
+        self.__shifted_intensity(self.__spectrum, self.__spectrum_intensity)
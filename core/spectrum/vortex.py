@@ -0,0 +1,189 @@
+from numpy import arange, zeros, empty, float64, arctan2, exp, pi, sqrt, abs as np_abs, bincount, fft, asarray
+from pyfftw import FFTW, empty_aligned
+from scipy.special import xlogy
+
+from ..precision import Precision
+from ..threads import default_threads
+
+
+class VortexSpectra:
+    """
+    Far-field spectra of vortex beams
+        E(x, y) = (r / r_0)^|m| exp(-r^2 / 2r_0^2) exp(i m (arctan2(x, y) + pi)) exp(i kerr_coeff r^2)
+    for a batch of configurations (m, r_0, kerr_coeff) on the same grid n_perp x n_perp with the size perp_max.
+    Grids of radius and azimuth are computed once, fields of a batch are initialised by numpy broadcasting
+    into an aligned buffer and transformed by one pyfftw plan shared by all batches. For even n_perp the field is
+    multiplied by the checkerboard (-1)^(i + j), so the spectrum comes out with zero frequency in the center
+    without fftshift. Fields are normalised to the unit peak amplitude (the peak is at r = sqrt(|m|) r_0), so high
+    charges do not overflow. Nothing is plotted, spectra and radial profiles are returned as arrays.
+    """
+
+    def __init__(self, **kwargs):
+        self.__n_perp = kwargs['n_perp']  # number of points along x and y
+        self.__perp_max = kwargs['perp_max']  # size of the grid, [m]
+        self.__d_perp = self.__perp_max / self.__n_perp
+        self.__batch_size = kwargs.get('batch_size', 8)  # number of fields transformed by one call of the plan
+        self.__n_bins = kwargs.get('n_bins', self.__n_perp // 2)  # number of bins of radial profiles
+        self.__n_jobs = kwargs.get('n_jobs', None)  # FFTW threads, cached or default threads if None
+        self.__precision = Precision.make(kwargs.get('precision', None))  # dtypes of fields, spectra and profiles
+
+        if self.__n_perp <= 0 or self.__batch_size <= 0 or self.__n_bins <= 0:
+            raise Exception('Wrong grid or batch size!')
+
+        n = self.__n_perp
+        x = self.__d_perp * arange(n) - 0.5 * self.__perp_max
+        xx, yy = x[:, None], x[None, :]
+
+        self.__r = sqrt(xx**2 + yy**2)
+        self.__r_sq = self.__r**2
+        self.__azimuth = arctan2(xx, yy) + pi
+
+        self.__shifted = not n % 2
+        self.__checkerboard = pi * (arange(n)[:, None] + arange(n)[None, :]) if self.__shifted else 0.0
+
+        # frequencies of the centered spectrum and bins of radial profiles
+        self.__k = fft.fftshift(2 * pi * fft.fftfreq(n, self.__d_perp))
+        k_r = sqrt(self.__k[:, None]**2 + self.__k[None, :]**2)
+        self.__d_k = k_r.max() / self.__n_bins
+        self.__bin_idxs = (k_r / self.__d_k).astype(int).clip(0, self.__n_bins - 1).ravel()
+        self.__bin_counts = bincount(self.__bin_idxs, minlength=self.__n_bins).astype(float64).clip(1)
+        self.__k_r = self.__d_k * (arange(self.__n_bins) + 0.5)
+
+        complex_dtype = self.__precision.complex_dtype
+        n_threads = self.__n_jobs or default_threads((n, n), str(complex_dtype))['fftw_threads']
+        self.__fields = empty_aligned((self.__batch_size, n, n), dtype=complex_dtype)
+        self.__spectra = empty_aligned((self.__batch_size, n, n), dtype=complex_dtype)
+        self.__fft_obj = FFTW(self.__fields, self.__spectra, axes=(1, 2), direction='FFTW_FORWARD',
+                              flags=('FFTW_ESTIMATE',), threads=n_threads)
+
+    @property
+    def n_perp(self):
+        return self.__n_perp
+
+    @property
+    def perp_max(self):
+        return self.__perp_max
+
+    @property
+    def precision(self):
+        return self.__precision
+
+    @property
+    def batch_size(self):
+        return self.__batch_size
+
+    @property
+    def k(self):
+        """Spatial frequencies along k_x and k_y of the centered spectrum, [rad / m]"""
+        return self.__k
+
+    @property
+    def k_r(self):
+        """Centers of bins of radial profiles, [rad / m]"""
+        return self.__k_r
+
+    @staticmethod
+    def __parse(configs):
+        """:return: arrays m, r_0, kerr_coeff from sequence of tuples (m, r_0, kerr_coeff) or dicts"""
+
+        configs = [(e['m'], e['r_0'], e['kerr_coeff']) if isinstance(e, dict) else tuple(e) for e in configs]
+        if any(len(e) != 3 for e in configs):
+            raise Exception('Wrong vortex configuration!')
+
+        m, r_0, kerr_coeff = (asarray(e, dtype=float64) for e in zip(*configs)) if configs else ((), (), ())
+        if (asarray(r_0) <= 0).any():
+            raise Exception('Wrong r_0!')
+
+        return m, r_0, kerr_coeff
+
+    @staticmethod
+    def __amplitude(r_norm, m):
+        """:return: (r / r_0)^|m| exp(-r^2 / 2r_0^2) divided by its peak, computed in log form"""
+
+        m = np_abs(m)
+        return exp(xlogy(m, r_norm) - 0.5 * r_norm**2 - 0.5 * (xlogy(m, m) - m))
+
+    def __initialize_fields(self, m, r_0, kerr_coeff):
+        """Fills the first len(m) fields of the buffer for the configurations of the batch"""
+
+        m, r_0, kerr_coeff = m[:, None, None], r_0[:, None, None], kerr_coeff[:, None, None]
+        r_norm = self.__r / r_0
+        phase = m * self.__azimuth + kerr_coeff * self.__r_sq + self.__checkerboard  # checkerboard is (-1)^(i + j)
+        self.__fields[:len(m)] = self.__amplitude(r_norm, m) * exp(1j * phase)
+
+    def __transform(self, m, r_0, kerr_coeff):
+        """:return: intensity of the centered spectra of the batch"""
+
+        n_batch = len(m)
+        self.__initialize_fields(m, r_0, kerr_coeff)
+        self.__fft_obj()
+
+        spectra = self.__spectra[:n_batch]
+        intensity = spectra.real**2 + spectra.imag**2
+        if not self.__shifted:
+            intensity = fft.fftshift(intensity, axes=(1, 2))
+
+        return intensity
+
+    def __radial_profile(self, intensity):
+        return bincount(self.__bin_idxs, weights=intensity.ravel(), minlength=self.__n_bins) / self.__bin_counts
+
+    def iter_batches(self, configs, radial=False, spectra=True):
+        """
+        Generator over batches of configurations
+
+        :param configs: sequence of tuples (m, r_0, kerr_coeff) or dicts with such keys
+        :param radial: compute radial profiles of the spectra
+        :param spectra: return spectra, set False to scan many configurations with radial profiles only
+
+        :return: yields (start, spectra, profiles), spectra are arrays (n_batch, n_perp, n_perp) in the real dtype
+        of the precision or None, profiles are arrays (n_batch, n_bins) in its computation dtype or None
+        """
+
+        m, r_0, kerr_coeff = self.__parse(configs)
+        for start in range(0, len(m), self.__batch_size):
+            batch = slice(start, start + self.__batch_size)
+            intensity = self.__transform(m[batch], r_0[batch], kerr_coeff[batch])
+
+            profiles = None
+            if radial:
+                profiles = empty((len(intensity), self.__n_bins), dtype=self.__precision.real_compute_dtype)
+                for idx, e in enumerate(intensity):
+                    profiles[idx] = self.__radial_profile(e)
+
+            yield start, intensity.astype(self.__precision.real_dtype) if spectra else None, profiles
+
+    def compute(self, configs, radial=False, spectra=True):
+        """
+        :param configs: sequence of tuples (m, r_0, kerr_coeff) or dicts with such keys
+        :param radial: compute radial profiles of the spectra
+        :param spectra: return spectra, set False to keep only radial profiles
+
+        :return: dict with spectra (n_configs, n_perp, n_perp) and (or) profiles (n_configs, n_bins), k and k_r
+        """
+
+        n_configs = len(configs)
+        if not spectra and not radial:
+            raise Exception('Wrong outputs: nothing to compute!')
+
+        result = {'k': self.__k, 'k_r': self.__k_r}
+        if spectra:
+            result['spectra'] = zeros((n_configs, self.__n_perp, self.__n_perp), dtype=self.__precision.real_dtype)
+        if radial:
+            result['profiles'] = zeros((n_configs, self.__n_bins), dtype=self.__precision.real_compute_dtype)
+
+        for start, batch_spectra, batch_profiles in self.iter_batches(configs, radial, spectra):
+            if spectra:
+                result['spectra'][start:start + len(batch_spectra)] = batch_spectra
+            if radial:
+                result['profiles'][start:start + len(batch_profiles)] = batch_profiles
+
+        return result
+
+    def field(self, m, r_0, kerr_coeff):
+        """:return: complex field of one configuration on the grid"""
+
+        m, r_0, kerr_coeff = (e[0] for e in self.__parse([(m, r_0, kerr_coeff)]))
+        r_norm = self.__r / r_0
+        return (self.__amplitude(r_norm, m) *
+                exp(1j * (m * self.__azimuth + kerr_coeff * self.__r_sq))).astype(self.__precision.complex_dtype)
@@ -0,0 +1,116 @@
+from numpy import arange, zeros, full, moveaxis
+
+
+class Symmetry:
+    """
+    Class for the mirror symmetry of the beam with spatial coordinates x and y, it is declared by the user and is
+    owned by the beam.
+
+    Along every axis the field is even, A(-x) = A(x), or odd, A(-x) = -A(x), about the center of the grid
+    x = 0 (index n / 2) and, since the grid is periodic for FFT, about its edge x = -x_max / 2 (index 0). Only nodes
+    x = k dx of the quadrant are stored:
+        even  ->  k = 0, ..., n / 2      (n / 2 + 1 nodes including both symmetry points)
+        odd   ->  k = 1, ..., n / 2 - 1  (n / 2 - 1 nodes, the field is zero at both symmetry points)
+    The DFT of such sequence is the DCT-I (even) or the DST-I (odd) of the quadrant with wave vectors k dk,
+    k in the same range, so diffraction is processed by real-to-real FFTW transforms of about quarter size
+    (see SymmetricFourierDiffractionExecutorXY).
+    """
+
+    KINDS = {'even': 'FFTW_REDFT00', 'odd': 'FFTW_RODFT00'}  # real-to-real FFTW transform of the symmetry class
+
+    def __init__(self, **kwargs):
+        self.__x = kwargs.get('x', 'even')  # symmetry class along x
+        self.__y = kwargs.get('y', 'even')  # symmetry class along y
+        if self.__x not in self.KINDS or self.__y not in self.KINDS:
+            raise Exception('Wrong symmetry!')
+
+    @staticmethod
+    def make(symmetry):
+        """
+        :param symmetry: Symmetry object, its class along both axes ('even' or 'odd'), pair of classes
+        along x and y or None for the beam without symmetry
+
+        :return: Symmetry object or None
+        """
+        if symmetry is None or isinstance(symmetry, Symmetry):
+            return symmetry
+        if isinstance(symmetry, str):
+            return Symmetry(x=symmetry, y=symmetry)
+        if len(symmetry) != 2:
+            raise Exception('Wrong symmetry!')
+
+        return Symmetry(x=symmetry[0], y=symmetry[1])
+
+    @property
+    def x(self):
+        return self.__x
+
+    @property
+    def y(self):
+        return self.__y
+
+    @property
+    def classes(self):
+        return [self.__x, self.__y]
+
+    @property
+    def kinds(self):
+        """Real-to-real FFTW transforms along x and y, they are inverse to themselves up to the factor n"""
+        return [self.KINDS[self.__x], self.KINDS[self.__y]]
+
+    @staticmethod
+    def nodes(n, symmetry_class):
+        """:return: indices k of stored nodes x = k dx and of wave vectors k dk of the quadrant"""
+
+        if n % 2:
+            raise Exception('Wrong number of points for symmetry!')
+
+        return arange(n // 2 + 1) if symmetry_class == 'even' else arange(1, n // 2)
+
+    @staticmethod
+    def weights(n, symmetry_class):
+        """:return: number of nodes of the full grid for every stored node, the weight of sums over the quadrant"""
+
+        weights = full(len(Symmetry.nodes(n, symmetry_class)), 2.0)
+        if symmetry_class == 'even':
+            weights[0] = weights[-1] = 1.0
+
+        return weights
+
+    def shape(self, n_x, n_y):
+        """:return: shape of the stored quadrant of the grid n_x x n_y"""
+        return len(self.nodes(n_x, self.__x)), len(self.nodes(n_y, self.__y))
+
+    @staticmethod
+    def __unfold_axis(arr, n, symmetry_class, axis, signed):
+        """:return: array with the full axis of n nodes, odd values change sign at mirror nodes if signed"""
+
+        arr = moveaxis(arr, axis, 0)
+        result = zeros((n,) + arr.shape[1:], dtype=arr.dtype)
+        half = n // 2
+        if symmetry_class == 'even':
+            result[half:] = arr[:half]
+            result[0] = arr[half]
+            result[1:half] = arr[half - 1:0:-1]
+        else:
+            result[half + 1:] = arr
+            result[1:half] = -arr[::-1] if signed else arr[::-1]
+
+        return moveaxis(result, 0, axis)
+
+    def unfold(self, arr, n_x, n_y, signed=True):
+        """
+        Reconstructs the full grid from the quadrant, e.g. for visualization
+
+        :param arr: quadrant of the field (signed) or of the intensity (not signed)
+        :param n_x: number of points in spatial grid along x
+        :param n_y: number of points in spatial grid along y
+        :param signed: mirror nodes of odd axes are negative, False for the intensity and other even quantities
+
+        :return: array n_x x n_y
+        """
+        arr = self.__unfold_axis(arr, n_x, self.__x, 0, signed)
+        return self.__unfold_axis(arr, n_y, self.__y, 1, signed)
+
+    def __repr__(self):
+        return 'Symmetry(x=%r, y=%r)' % (self.__x, self.__y)
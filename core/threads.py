@@ -0,0 +1,379 @@
+from multiprocessing import cpu_count
+from time import perf_counter
+import json
+import os
+import platform
+import socket
+
+import numba
+import pyfftw
+
+
+# TBB threading layer of numba hangs the process at exit after fork (SlabPool starts workers with fork),
+# so OpenMP is preferred unless the layer is set explicitly by NUMBA_THREADING_LAYER
+if 'NUMBA_THREADING_LAYER' not in os.environ:
+    numba.config.THREADING_LAYER_PRIORITY = ['omp', 'workqueue', 'tbb']
+
+# environment variables of thread pools of BLAS and OpenMP, they are read by libraries when they are loaded,
+# so they take effect in child processes (and in the process itself if set before numpy is imported)
+BLAS_ENVIRONMENT = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'BLIS_NUM_THREADS',
+                    'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+CACHE_PATH = os.environ.get('PROPAGATION_THREADS_CACHE',
+                            os.path.join(os.path.expanduser('~'), '.cache', 'propagation', 'threads.json'))
+
+
+def available_cpus():
+    """Number of logical CPUs available to the process"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return cpu_count()
+
+
+def physical_cores():
+    """Number of physical cores (hyperthreads are not counted), logical CPUs if it can not be determined"""
+
+    cores, physical_id, core_id = set(), None, None
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                key = key.strip()
+                if key == 'physical id':
+                    physical_id = value.strip()
+                elif key == 'core id':
+                    core_id = value.strip()
+                elif not key and physical_id is not None and core_id is not None:
+                    cores.add((physical_id, core_id))
+                    physical_id, core_id = None, None
+        if physical_id is not None and core_id is not None:
+            cores.add((physical_id, core_id))
+    except OSError:
+        pass
+
+    return min(len(cores), available_cpus()) if cores else available_cpus()
+
+
+def machine_key():
+    """Key of the machine in the cache of tuned thread counts"""
+    return '%s|%s|%d' % (socket.gethostname(), platform.processor() or platform.machine(), available_cpus())
+
+
+def grid_key(shape, dtype):
+    return '%s|%s' % ('x'.join(str(e) for e in shape), dtype)
+
+
+def load_cache(path=CACHE_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache, path=CACHE_PATH):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, 'w') as f:
+        json.dump(cache, f, indent=4)
+
+
+def default_threads(shape, dtype, path=CACHE_PATH):
+    """
+    Thread counts for the grid: tuned values from the cache of the machine, or the number of physical cores
+    for FFTW and numba if the grid was not tuned, within the budget of the current Concurrency
+
+    :param shape: shape of the field
+    :param dtype: dtype of the field
+
+    :return: dict with fftw_threads and numba_threads
+    """
+
+    tuned = load_cache(path).get(machine_key(), {}).get(grid_key(shape, dtype))
+    if tuned is not None:
+        return Concurrency.current().resolve(tuned)
+
+    n_cores = physical_cores()
+    return Concurrency.current().resolve({'fftw_threads': n_cores,
+                                          'numba_threads': min(n_cores, numba.config.NUMBA_NUM_THREADS)})
+
+
+def auto_threads(shape, dtype, path=CACHE_PATH):
+    """
+    Thread counts for the grid tuned on this machine, the grid is tuned with ThreadTuner if it is not in the cache,
+    within the budget of the current Concurrency
+
+    :return: dict with fftw_threads and numba_threads
+    """
+
+    tuned = load_cache(path).get(machine_key(), {}).get(grid_key(shape, dtype))
+    if tuned is None:
+        tuned = ThreadTuner(n_x=shape[0], n_y=shape[1], dtype=dtype, path=path).tune()
+
+    return Concurrency.current().resolve(tuned)
+
+
+def set_numba_threads(n_threads):
+    """Sets number of threads of numba parallel kernels within the limit of numba thread pool"""
+    numba.set_num_threads(max(1, min(n_threads, numba.config.NUMBA_NUM_THREADS)))
+
+
+class NumbaThreads:
+    """
+    Context of the number of threads of numba parallel kernels: the number is set on enter and the previous one is
+    restored on exit, so tuned values of executors do not change the setting of the process outside of the run
+
+    Usage:
+    with NumbaThreads(n_threads=diffraction.numba_threads):
+        ...
+    """
+
+    def __init__(self, **kwargs):
+        self.__n_threads = kwargs.get('n_threads', None)  # number of threads, None keeps the setting of the process
+        self.__previous = None  # number of threads before the context
+
+    def __enter__(self):
+        self.__previous = numba.get_num_threads()
+        if self.__n_threads is not None:
+            set_numba_threads(self.__n_threads)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        set_numba_threads(self.__previous)
+
+        return False
+
+
+def apply_concurrency(kwargs):
+    """Initializer of worker processes of pools: applies the budget of the worker (see Concurrency.initializer)"""
+    Concurrency(**kwargs).apply()
+
+
+class Concurrency:
+    """
+    Class for the thread budget of the process. Numba parallel kernels, FFTW plans and BLAS of numpy have their own
+    thread pools, so without the common budget every sweep worker starts threads for all cores of the node. The
+    current configuration is consulted by executors, spectra of visualizers and out-of-core tiles (through
+    default_threads and auto_threads) and by pools of worker processes (SlabPool, SnapshotRenderer, TrackLoader),
+    which split the budget between workers. The effective parallelism is reported in the run metadata.
+
+    Steps of the solver are sequential (FFT, then numba kernels), so each library may use the whole budget of
+    the process. Tuned or default thread counts of the grid are cut to the budget, explicit fftw_threads and
+    numba_threads replace them.
+
+    Usage:
+    Concurrency(budget=4).apply()  # before executors are created, e.g. in every worker of the sweep
+    """
+
+    __current = None  # applied configuration of the process
+
+    def __init__(self, **kwargs):
+        self.__budget = kwargs.get('budget', None) or available_cpus()  # number of threads of the process
+        self.__fftw_threads = kwargs.get('fftw_threads', None)  # FFTW threads, tuned or default value if None
+        self.__numba_threads = kwargs.get('numba_threads', None)  # numba threads, tuned or default value if None
+        self.__blas_threads = kwargs.get('blas_threads', None)  # BLAS threads, the whole budget if None
+        self.__blas_limited = False  # BLAS of the running process is limited or only the environment is set
+
+        for n_threads in (self.__budget, self.__fftw_threads, self.__numba_threads, self.__blas_threads):
+            if n_threads is not None and n_threads < 1:
+                raise Exception('Wrong number of threads!')
+
+    @staticmethod
+    def current():
+        """:return: applied configuration of the process or the default one (all available CPUs)"""
+        return Concurrency.__current if Concurrency.__current is not None else Concurrency()
+
+    @property
+    def budget(self):
+        return self.__budget
+
+    @property
+    def fftw_threads(self):
+        return None if self.__fftw_threads is None else min(self.__fftw_threads, self.__budget)
+
+    @property
+    def numba_threads(self):
+        return None if self.__numba_threads is None else min(self.__numba_threads, self.__budget)
+
+    @property
+    def blas_threads(self):
+        return min(self.__blas_threads or self.__budget, self.__budget)
+
+    @property
+    def kwargs(self):
+        """Parameters of the configuration, they are passed to worker processes"""
+        return {'budget': self.__budget, 'fftw_threads': self.__fftw_threads, 'numba_threads': self.__numba_threads,
+                'blas_threads': self.__blas_threads}
+
+    def resolve(self, threads):
+        """
+        :param threads: dict with tuned or default fftw_threads and numba_threads of the grid
+
+        :return: dict with fftw_threads and numba_threads within the budget
+        """
+
+        return {'fftw_threads': self.fftw_threads or min(threads['fftw_threads'], self.__budget),
+                'numba_threads': self.numba_threads or min(threads['numba_threads'], self.__budget)}
+
+    def environment(self):
+        """:return: environment variables of thread pools for child processes"""
+
+        environment = {name: str(self.blas_threads) for name in BLAS_ENVIRONMENT}
+        environment['NUMBA_NUM_THREADS'] = str(max(1, min(self.numba_threads or self.__budget,
+                                                          numba.config.NUMBA_NUM_THREADS)))
+
+        return environment
+
+    @staticmethod
+    def __limit_blas(n_threads):
+        """
+        Limits BLAS threads of the running process with threadpoolctl if it is installed, otherwise only
+        the environment of child processes is set
+
+        :return: True if BLAS of the process is limited
+        """
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            return False
+
+        threadpool_limits(limits=n_threads, user_api='blas')
+
+        return True
+
+    def apply(self):
+        """
+        Makes the configuration current: sets numba threads, default threads of pyfftw interfaces, BLAS threads and
+        the environment of child processes
+
+        :return: the configuration
+        """
+
+        Concurrency.__current = self
+        set_numba_threads(self.numba_threads or self.__budget)
+        pyfftw.config.NUM_THREADS = self.fftw_threads or self.__budget
+        os.environ.update(self.environment())
+        self.__blas_limited = self.__limit_blas(self.blas_threads)
+
+        return self
+
+    def split(self, n_workers):
+        """:return: configuration of one of n_workers worker processes sharing the budget"""
+        return Concurrency(**dict(self.kwargs, budget=max(1, self.__budget // max(n_workers, 1))))
+
+    def initializer(self, n_workers):
+        """
+        Initializer of worker processes of the pool, usage: Pool(n_workers, *concurrency.initializer(n_workers))
+
+        :return: function and its arguments
+        """
+        return apply_concurrency, (self.split(n_workers).kwargs,)
+
+    def report(self):
+        """:return: dict with the effective parallelism of the process"""
+
+        return {'budget': self.__budget,
+                'fftw_threads': self.fftw_threads,
+                'numba_threads': numba.get_num_threads(),
+                'blas_threads': self.blas_threads,
+                'blas_limited': self.__blas_limited,
+                'threading_layer': numba.config.THREADING_LAYER,
+                'available_cpus': available_cpus(),
+                'physical_cores': physical_cores()}
+
+
+class ThreadTuner:
+    """
+    Class for measuring steps/second of the XY step (diffraction, Kerr effect and intensity update) versus
+    the numbers of FFTW and numba threads on the given grid, and for caching the best split for the machine.
+    FourierDiffractionExecutorXY uses cached values by default (see default_threads).
+    """
+
+    def __init__(self, **kwargs):
+        self.__n_x = kwargs['n_x']  # number of points in spatial grid along x
+        self.__n_y = kwargs.get('n_y', self.__n_x)  # number of points in spatial grid along y
+        self.__dtype = kwargs.get('dtype', 'complex64')  # dtype of the field
+
+        max_threads = available_cpus()
+        candidates = sorted({1, 2, 4, 8, 16, 32, 64, physical_cores(), max_threads})
+        self.__fftw_threads = kwargs.get('fftw_threads', [e for e in candidates if e <= max_threads])
+        self.__numba_threads = kwargs.get('numba_threads', [e for e in candidates
+                                                            if e <= min(max_threads, numba.config.NUMBA_NUM_THREADS)])
+
+        self.__n_steps = kwargs.get('n_steps', 5)  # number of timed steps for every split
+        self.__path = kwargs.get('path', CACHE_PATH)  # path to cache of tuned thread counts
+        self.__verbose = kwargs.get('verbose', True)
+
+    @property
+    def shape(self):
+        return self.__n_x, self.__n_y
+
+    def __make_step(self, fftw_threads):
+        # imports are here to avoid circular imports: executors use default_threads
+        from .beam import BeamXY
+        from .diffraction import FourierDiffractionExecutorXY
+        from .kerr_effect import KerrExecutorXY
+
+        beam = BeamXY(medium='SiO2', p_0_to_p_vortex=1, m=1, M=1, lmbda=800 * 10**-9, x_0=100 * 10**-6,
+                      y_0=150 * 10**-6, radii_in_grid=10, n_x=self.__n_x, n_y=self.__n_y,
+                      precision='double' if str(self.__dtype) == 'complex128' else 'mixed')
+
+        diffraction = FourierDiffractionExecutorXY(beam=beam, n_jobs=fftw_threads, numba_threads=None)
+        kerr_effect = KerrExecutorXY(beam=beam)
+        dz = beam.z_diff / 1000
+
+        def step():
+            diffraction.process_diffraction(dz)
+            kerr_effect.process_kerr_effect(dz)
+            beam.update_intensity()
+
+        return step
+
+    def scan(self):
+        """
+        :return: list of dicts with fftw_threads, numba_threads and steps_per_second
+        """
+
+        results = []
+        with NumbaThreads():
+            for fftw_threads in self.__fftw_threads:
+                step = self.__make_step(fftw_threads)
+                for numba_threads in self.__numba_threads:
+                    set_numba_threads(numba_threads)
+                    step()  # warm-up: JIT compilation and buffers
+
+                    t_start = perf_counter()
+                    for _ in range(self.__n_steps):
+                        step()
+                    steps_per_second = self.__n_steps / (perf_counter() - t_start)
+
+                    results.append({'fftw_threads': fftw_threads,
+                                    'numba_threads': numba_threads,
+                                    'steps_per_second': steps_per_second})
+                    if self.__verbose:
+                        print('n_x = %d, n_y = %d, fftw_threads = %2d, numba_threads = %2d: %.3f steps/s' %
+                              (self.__n_x, self.__n_y, fftw_threads, numba_threads, steps_per_second), flush=True)
+
+        return results
+
+    def tune(self):
+        """
+        Scans all splits of threads and saves the best one to the cache of the machine
+
+        :return: dict with the best fftw_threads, numba_threads, steps_per_second and the scan
+        """
+
+        scan = self.scan()
+        best = max(scan, key=lambda e: e['steps_per_second'])
+        best = dict(best, scan=scan)
+
+        cache = load_cache(self.__path)
+        cache.setdefault(machine_key(), {})[grid_key(self.shape, self.__dtype)] = best
+        save_cache(cache, self.__path)
+
+        return best
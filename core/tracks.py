@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import cpu_count
+from glob import glob
+from hashlib import sha1
+import os
+import pickle
+
+from numpy import load
+import pandas as pd
+
+from .functions import normalize_track_df
+from .threads import Concurrency
+
+
+def read_track(results_dir, normalize_z_to=10**2, normalize_i_to=10**17):
+    """
+    Reads track of the run preferring binary npz-file and falling back to xlsx-file
+
+    :param results_dir: results directory of the run
+    :param normalize_z_to: multiplier for z and dz columns
+    :param normalize_i_to: divider for i_max column
+
+    :return: pandas dataframe with normalized columns
+    """
+
+    binary_filename = results_dir + '/propagation.npz'
+    if os.path.exists(binary_filename):
+        with load(binary_filename) as data:
+            df = pd.DataFrame(data['states'], columns=[str(e) for e in data['columns']])
+    else:
+        df = pd.read_excel(results_dir + '/propagation.xlsx')
+
+    return normalize_track_df(df, normalize_z_to, normalize_i_to)
+
+
+def _read_track_task(args):
+    """Reads track in a worker"""
+
+    return read_track(*args)
+
+
+class TrackLoader:
+    """
+    Class for bulk loading of tracks from many results directories. Tracks are read concurrently and returned
+    as one dataframe with run_id column. Loaded tracks are cached in memory and, if cache_dir is given, on disk,
+    so repeated loads of unchanged runs do not read track files at all.
+    """
+
+    def __init__(self, **kwargs):
+        self.__n_jobs = kwargs.get('n_jobs', cpu_count())  # number of workers
+        self.__executor = kwargs.get('executor', 'thread')  # thread or process workers
+        if self.__executor not in ('thread', 'process'):
+            raise Exception('Wrong executor!')
+        self.__cache_dir = kwargs.get('cache_dir', None)  # directory for disk cache of loaded tracks
+        self.__normalize_z_to = kwargs.get('normalize_z_to', 10**2)
+        self.__normalize_i_to = kwargs.get('normalize_i_to', 10**17)
+
+        self.__memory_cache = {}
+
+        if self.__cache_dir is not None and not os.path.exists(self.__cache_dir):
+            os.makedirs(self.__cache_dir)
+
+    @staticmethod
+    def results_dirs(source):
+        """
+        Converts source of runs to the list of results directories
+
+        :param source: glob pattern, list of results directories or list of catalog records (see Catalog.query)
+
+        :return: list of results directories
+        """
+
+        if isinstance(source, str):
+            return sorted(e for e in glob(source) if os.path.isdir(e))
+
+        return [e['results_dir'] if isinstance(e, dict) else e for e in source]
+
+    def __key(self, results_dir):
+        """Cache key of the track: path, modification time and size of track file and normalization"""
+
+        for filename in ('propagation.npz', 'propagation.xlsx'):
+            path = results_dir + '/' + filename
+            if os.path.exists(path):
+                stat = os.stat(path)
+                return os.path.abspath(path), stat.st_mtime_ns, stat.st_size, self.__normalize_z_to, \
+                    self.__normalize_i_to
+
+        raise Exception('No track in %s!' % results_dir)
+
+    def __cache_filename(self, key):
+        return self.__cache_dir + '/' + sha1(repr(key).encode()).hexdigest() + '.pkl'
+
+    def __from_cache(self, key):
+        if key in self.__memory_cache:
+            return self.__memory_cache[key]
+
+        if self.__cache_dir is not None:
+            filename = self.__cache_filename(key)
+            if os.path.exists(filename):
+                with open(filename, 'rb') as f:
+                    df = pickle.load(f)
+                self.__memory_cache[key] = df
+                return df
+
+        return None
+
+    def __to_cache(self, key, df):
+        self.__memory_cache[key] = df
+
+        if self.__cache_dir is not None:
+            with open(self.__cache_filename(key), 'wb') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, source):
+        """
+        :param source: glob pattern, list of results directories or list of catalog records
+
+        :return: pandas dataframe with tracks of all runs and run_id column
+        """
+
+        results_dirs = self.results_dirs(source)
+        keys = [self.__key(e) for e in results_dirs]
+
+        dfs = [self.__from_cache(key) for key in keys]
+        missing = [i for i, df in enumerate(dfs) if df is None]
+
+        if missing:
+            tasks = [(results_dirs[i], self.__normalize_z_to, self.__normalize_i_to) for i in missing]
+            n_jobs = max(min(self.__n_jobs, len(tasks)), 1)
+            if self.__executor == 'thread':
+                executor = ThreadPoolExecutor(n_jobs)
+            else:
+                initializer, initargs = Concurrency.current().initializer(n_jobs)
+                executor = ProcessPoolExecutor(n_jobs, initializer=initializer, initargs=initargs)
+            with executor:
+                for i, df in zip(missing, executor.map(_read_track_task, tasks)):
+                    df.insert(0, 'run_id', os.path.basename(os.path.normpath(results_dirs[i])))
+                    self.__to_cache(keys[i], df)
+                    dfs[i] = df
+
+        if not dfs:
+            return pd.DataFrame()
+
+        return pd.concat(dfs, ignore_index=True)
@@ -7,15 +7,41 @@ from core.spectrum import SpectrumR, SpectrumXY
 
 
 class BaseVisualizer:
+    # panels available for plot_pair: title and default colormap
+    PANELS = {'intensity': ('$\mathbf{I(x, y)}$', 'jet'),
+              'kerr_phase': ('$\mathbf{\\varphi_{kerr}(x, y)}$', 'hot'),
+              'phase': ('$\mathbf{\\varphi(x, y)}$', 'hot'),
+              'spectrum': ('$\mathbf{S(k_x, k_y)}$', 'jet')}
+
     def __init__(self, **kwargs):
         self._beam = kwargs['beam']
         self._remaining_central_part_coeff_field = kwargs['remaining_central_part_coeff_field']
         self._remaining_central_part_coeff_spectrum = kwargs['remaining_central_part_coeff_spectrum']
 
+        self._panels = kwargs.get('panels', ('intensity', 'phase', 'spectrum'))  # panels in plot_pair
+        for panel in self._panels:
+            if panel not in self.PANELS:
+                raise Exception('Wrong panel!')
+        self._log_scale = kwargs.get('log_scale', ())  # panels plotted in logarithmic scale
+        self._log_floor = kwargs.get('log_floor', 10**-6)  # lower limit of normalized values in logarithmic scale
+        self._cmaps = kwargs.get('cmaps', {})  # colormaps of panels, default colormaps are in PANELS
+        self._dpi = kwargs.get('dpi', 50)  # dpi of saved pictures
+
         self._path_to_save = None
 
         self._spectrum_obj = None
 
+    @property
+    def parameters(self):
+        """Settings which define the rendered pictures"""
+        return {'remaining_central_part_coeff_field': self._remaining_central_part_coeff_field,
+                'remaining_central_part_coeff_spectrum': self._remaining_central_part_coeff_spectrum,
+                'panels': list(self._panels),
+                'log_scale': list(self._log_scale),
+                'log_floor': self._log_floor,
+                'cmaps': dict(self._cmaps),
+                'dpi': self._dpi}
+
     def get_path_to_save(self, path_to_save):
         self._path_to_save = path_to_save
 
@@ -55,50 +81,42 @@ class BaseVisualizer:
 
         return arr[i_min:i_max, i_min:i_max]
 
-    @staticmethod
-    def __log_arr(arr):
+    def _log_arr(self, arr):
         MAX = maximum(arr)
-        return log10(arr / MAX)
+        return log10(np.maximum(arr / MAX, self._log_floor))
+
+    def _panel_arr(self, panel):
+        """Returns cropped array for the panel"""
+
+        if panel == 'intensity':
+            arr = self._crop_arr_field(self._spectrum_obj.intensity_xy)
+        elif panel == 'kerr_phase':
+            arr = self._crop_arr_field(self._spectrum_obj.kerr_phase_xy)
+        elif panel == 'phase':
+            arr = self._crop_arr_field(self._spectrum_obj.phase_xy)
+        else:
+            arr = self._crop_arr_spectrum(self._spectrum_obj.spectrum_intensity).real
+
+        if panel in self._log_scale:
+            arr = self._log_arr(arr)
+
+        return arr
 
     def plot_pair(self, beam, z, step):
         self._spectrum_obj.update_data()
 
-        fig = plt.figure(figsize=(15, 10), constrained_layout=True)
-        spec = gridspec.GridSpec(ncols=3, nrows=1, figure=fig)
-        ax1 = fig.add_subplot(spec[0, 0])
-        #ax2 = fig.add_subplot(spec[0, 1])
-        ax3 = fig.add_subplot(spec[0, 1])
-        ax4 = fig.add_subplot(spec[0, 2])
-
-        ax1.set_aspect('equal')
-        #ax2.set_aspect('equal')
-        ax3.set_aspect('equal')
-        ax4.set_aspect('equal')
-
-        ax1.set_title('$\mathbf{I(x, y)}$', fontdict={'fontsize': 30})
-        #ax2.set_title('$\mathbf{\\varphi_{kerr}(x, y)}$', fontdict={'fontsize': 30})
-        ax3.set_title('$\mathbf{\\varphi(x, y)}$', fontdict={'fontsize': 30})
-        ax4.set_title('$\mathbf{S(k_x, k_y)}$', fontdict={'fontsize': 30})
-
-        intensity_for_plot = self._crop_arr_field(self._spectrum_obj.intensity_xy)
-        #kerr_phase_for_plot = self._crop_arr_field(self._spectrum_obj.kerr_phase_xy)
-        phase_for_plot = self._crop_arr_field(self._spectrum_obj.phase_xy)
-        spectrum_for_plot = self._crop_arr_spectrum(self._spectrum_obj.spectrum_intensity)
-
-        ax1.contourf(intensity_for_plot, cmap=plt.get_cmap('jet'), levels=100)
-        #print('max =', np.max(phase_for_plot))
-        #print('min =', np.min(phase_for_plot))
-        #ax2.contourf(kerr_phase_for_plot, cmap=plt.get_cmap('hot'), levels=100)
-        ax3.contourf(phase_for_plot, cmap=plt.get_cmap('hot'), levels=100)
-        ax4.contourf(spectrum_for_plot, cmap=plt.get_cmap('jet'), levels=100)
-
-        ax1.set_axis_off()
-        #ax2.set_axis_off()
-        ax3.set_axis_off()
-        ax4.set_axis_off()
-
-        plt.savefig(self._path_to_save + '/%04d.png' % step, bbox_inches='tight', dpi=50)
-        plt.savefig('fft_vortex.png', bbox_inches='tight')
+        fig = plt.figure(figsize=(5 * len(self._panels), 10), constrained_layout=True)
+        spec = gridspec.GridSpec(ncols=len(self._panels), nrows=1, figure=fig)
+
+        for col, panel in enumerate(self._panels):
+            title, cmap = self.PANELS[panel]
+            ax = fig.add_subplot(spec[0, col])
+            ax.set_aspect('equal')
+            ax.set_title(title, fontdict={'fontsize': 30})
+            ax.contourf(self._panel_arr(panel), cmap=plt.get_cmap(self._cmaps.get(panel, cmap)), levels=100)
+            ax.set_axis_off()
+
+        plt.savefig(self._path_to_save + '/%04d.png' % step, bbox_inches='tight', dpi=self._dpi)
         plt.close()
 
     def plot_track(self, states_arr, parameter_index, path):
@@ -0,0 +1,156 @@
+from numpy import dtype as np_dtype
+from pyfftw import empty_aligned, simd_alignment
+import tracemalloc
+
+
+class Workspace:
+    """
+    Class for the arena of preallocated aligned buffers owned by the beam. Executors request named buffers (field,
+    intensity, spectrum, ...) once and then write into them in place, so the steady-state propagation loop does not
+    allocate full-size arrays. A buffer is reallocated only if the requested shape or dtype changes.
+    """
+
+    def __init__(self, **kwargs):
+        self.__alignment = kwargs.get('alignment', simd_alignment)  # alignment of buffers, [bytes]
+
+        self.__buffers = {}
+        self.__n_allocations = 0  # number of allocations of buffers
+
+    @property
+    def names(self):
+        return list(self.__buffers)
+
+    @property
+    def n_allocations(self):
+        return self.__n_allocations
+
+    @property
+    def nbytes(self):
+        """Memory of all buffers, [bytes]"""
+        return sum(e.nbytes for e in self.__buffers.values())
+
+    def buffer(self, name, shape, dtype):
+        """
+        :param name: name of buffer
+        :param shape: shape of buffer
+        :param dtype: dtype of buffer
+
+        :return: aligned buffer (with undefined content if it has just been allocated)
+        """
+
+        shape, dtype = tuple(shape), np_dtype(dtype)
+        arr = self.__buffers.get(name)
+        if arr is None or arr.shape != shape or arr.dtype != dtype:
+            arr = empty_aligned(shape, dtype=dtype, n=self.__alignment)
+            self.__buffers[name] = arr
+            self.__n_allocations += 1
+
+        return arr
+
+    def adopt(self, name, arr):
+        """
+        Copies array to the aligned buffer with the same shape and dtype
+
+        :param name: name of buffer
+        :param arr: array
+
+        :return: buffer with the content of arr
+        """
+
+        buffer = self.buffer(name, arr.shape, arr.dtype)
+        if buffer is not arr:
+            buffer[...] = arr
+
+        return buffer
+
+    def is_buffer(self, name, arr):
+        """Returns True if arr is the buffer with the name"""
+        return self.__buffers.get(name) is arr
+
+    def release(self, name):
+        """Removes buffer from the workspace"""
+        self.__buffers.pop(name, None)
+
+
+class AllocationMonitor:
+    """
+    Class for counting large allocations in measured functions with tracemalloc (numpy reports its data buffers
+    to tracemalloc). An allocation is large if the peak of traced memory during the call exceeds the memory before
+    the call by threshold bytes or more.
+    """
+
+    def __init__(self, **kwargs):
+        self.__threshold = kwargs['threshold']  # size of large allocation, [bytes]
+
+        self.__n_calls = 0
+        self.__n_large_allocations = 0
+        self.__max_transient_bytes = 0
+        self.__large_allocations = {}  # number of large allocations per function name
+        self.__started_tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def threshold(self):
+        return self.__threshold
+
+    @property
+    def n_calls(self):
+        return self.__n_calls
+
+    @property
+    def n_large_allocations(self):
+        return self.__n_large_allocations
+
+    @property
+    def max_transient_bytes(self):
+        return self.__max_transient_bytes
+
+    @property
+    def large_allocations(self):
+        return dict(self.__large_allocations)
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+
+    def stop(self):
+        if self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+
+    def measure(self, func, *args, name=None):
+        """
+        Calls func(*args) and counts its large allocations
+
+        :param name: name of measured function in large_allocations, qualified name of func by default
+
+        :return: result of func
+        """
+
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = func(*args)
+        transient = tracemalloc.get_traced_memory()[1] - before
+
+        self.__n_calls += 1
+        self.__max_transient_bytes = max(self.__max_transient_bytes, transient)
+        if transient >= self.__threshold:
+            self.__n_large_allocations += 1
+            name = name or getattr(func, '__qualname__', repr(func))
+            self.__large_allocations[name] = self.__large_allocations.get(name, 0) + 1
+
+        return result
+
+    def summary(self):
+        return {'n_calls': self.__n_calls,
+                'n_large_allocations': self.__n_large_allocations,
+                'max_transient_bytes': self.__max_transient_bytes,
+                'threshold': self.__threshold,
+                'large_allocations': self.large_allocations}
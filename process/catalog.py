@@ -0,0 +1,39 @@
+import argparse
+
+from core import Catalog
+
+# parse args from command line
+# examples:
+#   python process/catalog.py --global_results_dir /home/<user>/projects/sf/results scan
+#   python process/catalog.py --global_results_dir ... query medium=LiF distribution_type=vortex m=1 \
+#       p_0_to_p_vortex__gt=3
+parser = argparse.ArgumentParser()
+parser.add_argument('--global_results_dir', required=True)
+parser.add_argument('command', choices=['scan', 'query', 'clean'])
+parser.add_argument('filters', nargs='*')
+parser.add_argument('--columns', nargs='+', default=['run_id', 'medium', 'distribution_type', 'm', 'p_0_to_p_vortex',
+                                                     'stop_reason', 'i_max_peak_to_i_0', 'z_collapse', 'wall_time'])
+args = parser.parse_args()
+
+
+def parse_value(value):
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+with Catalog(path=args.global_results_dir + '/catalog.sqlite') as catalog:
+    if args.command == 'scan':
+        print('registered runs:', catalog.scan(args.global_results_dir))
+    elif args.command == 'clean':
+        print('removed runs:', catalog.remove_missing())
+    else:
+        filters = dict((key, parse_value(value)) for key, value in (e.split('=', 1) for e in args.filters))
+        runs = catalog.query(**filters)
+        print(' | '.join(args.columns))
+        for run in runs:
+            print(' | '.join(str(run[column]) for column in args.columns))
+        print('total:', len(runs))
@@ -11,7 +11,8 @@ beam = BeamR(medium='LiF',
              lmbda=1800*10**-9,
              r_0=100*10**-6,
              radii_in_grid=70,
-             n_r=4096)
+             n_r=4096,
+             precision=args.precision)
 
 # create visualizer object
 visualizer = VisualizerR(beam=beam,
@@ -26,7 +27,7 @@ propagator = Propagator(args=args,
                         n_z=1000,
                         dz_0=beam.z_diff / 1000,
                         const_dz=True,
-                        print_current_state_every=1,
+                        progress=True,
                         plot_beam_every=5,
                         max_intensity_to_stop=5 * 10**17,
                         visualizer=visualizer)
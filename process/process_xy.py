@@ -14,7 +14,8 @@ beam = BeamXY(medium='LiF',
               radii_in_grid=70,  # 70 # 140 # 170 #8
               noise_percent=0.0,
               n_x=4096,  # 8k
-              n_y=4096)
+              n_y=4096,
+              precision=args.precision)
 
 # create visualizer object
 visualizer = VisualizerXY(beam=beam,
@@ -29,7 +30,7 @@ propagator = Propagator(args=args,
                         n_z=0,
                         dz_0=beam.z_diff / 1000,
                         const_dz=True,
-                        print_current_state_every=1,
+                        progress=True,
                         plot_beam_every=1,
                         max_intensity_to_stop=10**17,
                         visualizer=visualizer)
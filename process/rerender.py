@@ -0,0 +1,33 @@
+import argparse
+
+from core import SnapshotRenderer
+
+# parse args from command line
+parser = argparse.ArgumentParser()
+parser.add_argument('--results_dir', required=True)
+parser.add_argument('--dir_name', default='rendered')
+parser.add_argument('--remaining_central_part_coeff_field', type=float, default=0.05)
+parser.add_argument('--remaining_central_part_coeff_spectrum', type=float, default=0.05)
+parser.add_argument('--panels', nargs='+', default=['intensity', 'phase', 'spectrum'])
+parser.add_argument('--log_scale', nargs='*', default=[])
+parser.add_argument('--dpi', type=int, default=50)
+parser.add_argument('--n_jobs', type=int, default=None)
+args = parser.parse_args()
+
+# visualizer settings for rendering
+visualizer_kwargs = {'remaining_central_part_coeff_field': args.remaining_central_part_coeff_field,
+                     'remaining_central_part_coeff_spectrum': args.remaining_central_part_coeff_spectrum,
+                     'panels': tuple(args.panels),
+                     'log_scale': tuple(args.log_scale),
+                     'dpi': args.dpi}
+
+# create renderer object
+renderer_kwargs = {'results_dir': args.results_dir,
+                   'dir_name': args.dir_name,
+                   'visualizer_kwargs': visualizer_kwargs}
+if args.n_jobs:
+    renderer_kwargs['n_jobs'] = args.n_jobs
+renderer = SnapshotRenderer(**renderer_kwargs)
+
+# render frames, animation and video from stored snapshots
+renderer.render()
@@ -0,0 +1,46 @@
+from argparse import Namespace
+
+import pytest
+
+from core import BeamR, BeamXY, SweepDiffractionExecutorR, KerrExecutorR, Propagator
+
+
+@pytest.fixture
+def make_args(tmp_path):
+    """Command line arguments of runs with results directories in the temporary directory"""
+
+    def make_args(prefix='r'):
+        return Namespace(global_root_dir=str(tmp_path), global_results_dir_name='results', prefix=prefix,
+                         insert_datetime=False)
+
+    return make_args
+
+
+def make_beam_r(**kwargs):
+    parameters = dict(medium='SiO2', p_0_to_p_vortex=5, m=1, M=1, lmbda=800e-9, r_0=100e-6, radii_in_grid=10,
+                      n_r=256)
+    parameters.update(kwargs)
+    return BeamR(**parameters)
+
+
+def make_propagator_r(args, beam=None, **kwargs):
+    beam = beam or make_beam_r()
+    parameters = dict(args=args, beam=beam, diffraction=SweepDiffractionExecutorR(beam=beam),
+                      kerr_effect=KerrExecutorR(beam=beam), n_z=100, dz_0=beam.z_diff / 100, const_dz=False,
+                      print_track=False, register_run=False)
+    parameters.update(kwargs)
+    return Propagator(**parameters)
+
+
+def make_beam_xy(**kwargs):
+    parameters = dict(medium='SiO2', p_0_to_p_vortex=5, m=1, M=1, lmbda=800e-9, x_0=100e-6, y_0=100e-6,
+                      radii_in_grid=10, n_x=128, n_y=96)
+    parameters.update(kwargs)
+    return BeamXY(**parameters)
+
+
+def make_propagator_xy(args, beam, diffraction, kerr_effect, **kwargs):
+    parameters = dict(args=args, beam=beam, diffraction=diffraction, kerr_effect=kerr_effect, n_z=20,
+                      dz_0=beam.z_diff / 100, const_dz=False, print_track=False, register_run=False)
+    parameters.update(kwargs)
+    return Propagator(**parameters)
@@ -0,0 +1,49 @@
+import json
+
+from numpy import array_equal, isnan, load, savez
+
+from core import CheckpointObserver
+
+from conftest import make_propagator_r
+
+
+def run(propagator):
+    views = list(propagator.iter_steps())
+    return views, views[-1].states.copy()
+
+
+def run_trunk(make_args):
+    trunk = make_propagator_r(make_args('trunk'), n_z=40, observers=[CheckpointObserver(every=20)])
+    _, states = run(trunk)
+    return trunk, states, trunk.manager.checkpoints_dir + '/0020.npz'
+
+
+def test_branch_resumes_trunk(make_args):
+    trunk, trunk_states, checkpoint = run_trunk(make_args)
+
+    branch = make_propagator_r(make_args('branch'), n_z=40, branch_from=checkpoint)
+    views, states = run(branch)
+
+    assert views[0].n_step == 20 and views[-1].n_step == 40
+    assert branch.branch['n_step'] == 20 and branch.branch['parent_run_id'] == trunk.manager.results_dir_name
+    assert array_equal(states, trunk_states)
+    assert branch.z == trunk.z
+    assert array_equal(branch.beam.field, trunk.beam.field)
+
+
+def test_branch_from_checkpoint_without_track(make_args, tmp_path):
+    trunk, trunk_states, checkpoint = run_trunk(make_args)
+
+    # checkpoints of older versions have no track of the trunk
+    with load(checkpoint) as arrays:
+        old_checkpoint = str(tmp_path / 'old.npz')
+        savez(old_checkpoint, **{name: arrays[name] for name in ('field', 'z', 'dz', 'n_step')})
+
+    branch = make_propagator_r(make_args('branch'), n_z=40, branch_from=old_checkpoint, register_run=True)
+    _, states = run(branch)
+
+    assert isnan(states[:20]).all()
+    assert array_equal(states[20:], trunk_states[20:])
+    with open(branch.manager.run_metadata_filename, 'r') as f:
+        summary = json.load(f)['summary']
+    assert summary['i_max_peak'] == states[20:, 3].max()
@@ -0,0 +1,79 @@
+from numpy import array_equal
+import pytest
+
+from core import ResultCache, SweepDiffractionExecutorR, KerrExecutorR, BeamRT, SweepDiffractionExecutorRT, \
+    KerrExecutorRT, RK4IPIntegrator, Medium, MATERIALS, register_material
+
+from conftest import make_beam_r, make_propagator_r
+
+
+@pytest.fixture
+def glass():
+    register_material('test_glass', C=MATERIALS['SiO2']['C'], lambdas=MATERIALS['SiO2']['lambdas'], n_2=3e-20)
+    yield 'test_glass'
+    del MATERIALS['test_glass']
+    Medium.clear_cache('test_glass')
+
+
+def run(propagator):
+    views = list(propagator.iter_steps())
+    return views[-1].states.copy(), propagator.beam.field.copy()
+
+
+def test_hit_restores_run(make_args, tmp_path):
+    cache = ResultCache(path=str(tmp_path / 'cache'))
+    propagator = make_propagator_r(make_args('first'), cache=cache, n_z=20)
+    states, field = run(propagator)
+    assert not propagator.cache_hit
+
+    propagator = make_propagator_r(make_args('second'), cache=cache, n_z=20)
+    cached_states, cached_field = run(propagator)
+
+    assert propagator.cache_hit
+    assert array_equal(cached_states, states)
+    assert array_equal(cached_field, field)
+
+
+@pytest.mark.parametrize('changes', [{'n_z': 21}, {'dz_0': 1e-4}, {'const_dz': True}, {'max_intensity_to_stop': 1e18},
+                                     {'nonlin_phase_max': 0.03}, {'diagnostics': True}])
+def test_key_depends_on_propagation(make_args, changes):
+    assert ResultCache.key(make_propagator_r(make_args()).configuration) != \
+           ResultCache.key(make_propagator_r(make_args(), **changes).configuration)
+
+
+def test_key_depends_on_integrator(make_args):
+    def key(**kwargs):
+        beam = make_beam_r()
+        diffraction, kerr_effect = SweepDiffractionExecutorR(beam=beam), KerrExecutorR(beam=beam)
+        integrator = RK4IPIntegrator(beam=beam, diffraction=diffraction, kerr_effect=kerr_effect, **kwargs)
+        return ResultCache.key(make_propagator_r(make_args(), beam=beam, diffraction=diffraction,
+                                                 kerr_effect=kerr_effect, integrator=integrator).configuration)
+
+    assert key() == key()
+    assert key() != key(nonlin_phase_max=0.1)
+
+
+def test_key_depends_on_material(make_args, glass):
+    key = ResultCache.key(make_propagator_r(make_args(), beam=make_beam_r(medium=glass)).configuration)
+
+    register_material(glass, C=MATERIALS[glass]['C'], lambdas=MATERIALS[glass]['lambdas'], n_2=4e-20, overwrite=True)
+
+    configuration = make_propagator_r(make_args(), beam=make_beam_r(medium=glass)).configuration
+    assert configuration['medium'] == {'name': glass, 'C': list(MATERIALS['SiO2']['C']),
+                                       'lambdas': list(MATERIALS['SiO2']['lambdas']), 'n_2': 4e-20}
+    assert ResultCache.key(configuration) != key
+
+
+@pytest.mark.parametrize('beam_changes, diffraction_changes', [({'durations_in_grid': 12}, {}),
+                                                               ({}, {'full_dispersion': True}),
+                                                               ({}, {'n_chunk': 16})])
+def test_key_depends_on_time_resolved_settings(make_args, beam_changes, diffraction_changes):
+    def key(beam_kwargs, diffraction_kwargs):
+        beam = BeamRT(**dict(dict(medium='SiO2', p_0_to_p_vortex=1, m=1, M=1, lmbda=800e-9, r_0=100e-6,
+                                  radii_in_grid=10, n_r=64, t_0=50e-15, n_t=32), **beam_kwargs))
+        diffraction = SweepDiffractionExecutorRT(beam=beam, **diffraction_kwargs)
+        return ResultCache.key(make_propagator_r(make_args(), beam=beam, diffraction=diffraction,
+                                                 kerr_effect=KerrExecutorRT(beam=beam)).configuration)
+
+    assert key({}, {}) == key({}, {})
+    assert key(beam_changes, diffraction_changes) != key({}, {})
@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from core import Catalog
+
+from conftest import make_propagator_r
+
+
+def make_metadata(run_id, results_dir, medium='LiF', m=1, p_0_to_p_vortex=5.0, wall_time=1.0):
+    return {'run_id': run_id,
+            'results_dir': results_dir,
+            'prefix': 'r',
+            'created': '2026-01-01T00:00:%02d' % int(run_id[-1]),
+            'beam': {'beam': 'beam_r', 'medium': medium, 'M': abs(m), 'm': m, 'p_0_to_p_vortex': p_0_to_p_vortex},
+            'propagation': {'n_z': 100},
+            'summary': {'wall_time': wall_time, 'stop_reason': 'n_z'}}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    with Catalog(path=str(tmp_path / 'catalog.sqlite')) as catalog:
+        for i, (medium, m, p) in enumerate([('LiF', 1, 5.0), ('LiF', 2, 3.0), ('SiO2', 1, 10.0), ('LiF', 1, 2.0)]):
+            catalog.register(make_metadata('run_%d' % i, str(tmp_path / ('run_%d' % i)), medium, m, p))
+        yield catalog
+
+
+def test_query_filters(catalog):
+    assert [run['run_id'] for run in catalog.query(medium='LiF', m=1)] == ['run_0', 'run_3']
+    assert [run['run_id'] for run in catalog.query(p_0_to_p_vortex__gt=3)] == ['run_0', 'run_2']
+    assert [run['run_id'] for run in catalog.query(medium__ne='LiF')] == ['run_2']
+    assert [run['run_id'] for run in catalog.query(M_power=2)] == ['run_1']
+    assert [run['run_id'] for run in catalog.query(order_by='p_0_to_p_vortex', medium__like='Li%')] == \
+        ['run_3', 'run_1', 'run_0']
+    assert catalog.query(medium='BaF2') == []
+
+
+def test_wrong_filters(catalog):
+    with pytest.raises(Exception):
+        catalog.query(color='red')
+    with pytest.raises(Exception):
+        catalog.query(m__between=1)
+    with pytest.raises(Exception):
+        catalog.query(order_by='color')
+
+
+def test_register_replaces_run(catalog):
+    catalog.register(make_metadata('run_0', 'elsewhere', wall_time=7.0))
+
+    run, = catalog.query(run_id='run_0')
+    assert run['wall_time'] == 7.0 and len(catalog.query()) == 4
+    assert catalog.metadata('run_0')['results_dir'] == 'elsewhere'
+
+
+def test_scan_and_remove_missing(tmp_path):
+    for i in range(2):
+        results_dir = tmp_path / 'results' / ('run_%d' % i)
+        os.makedirs(str(results_dir))
+        with open(str(results_dir / Catalog.METADATA_FILENAME), 'w') as f:
+            json.dump(make_metadata('run_%d' % i, str(results_dir)), f)
+
+    with Catalog(path=str(tmp_path / 'catalog.sqlite')) as catalog:
+        assert catalog.scan(str(tmp_path / 'results')) == 2
+        os.remove(str(tmp_path / 'results' / 'run_0' / Catalog.METADATA_FILENAME))
+        os.rmdir(str(tmp_path / 'results' / 'run_0'))
+        assert catalog.remove_missing() == 1
+        assert [run['run_id'] for run in catalog.query()] == ['run_1']
+
+
+def test_propagator_registers_run(make_args):
+    propagator = make_propagator_r(make_args('registered'), n_z=10, register_run=True)
+    propagator.propagate()
+
+    with Catalog(path=propagator.manager.catalog_filename) as catalog:
+        run, = catalog.query(prefix='registered')
+        assert run['run_id'] == propagator.manager.results_dir_name
+        assert run['n_steps'] == 10 and run['stop_reason'] == 'n_z' and run['medium'] == 'SiO2'
+        assert run['z_final'] == pytest.approx(propagator.z)
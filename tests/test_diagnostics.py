@@ -0,0 +1,44 @@
+from numpy import load
+import pytest
+
+from core import xlsx_to_df
+
+from conftest import make_beam_r, make_propagator_r
+
+
+TRACK_COLUMNS = ['z, m', 'dz, m', 'i_max / i_0', 'i_max, W / m^2']
+
+
+def read_columns(propagator):
+    with load(propagator.manager.results_dir + '/propagation.npz') as track:
+        return [str(column) for column in track['columns']], track['states']
+
+
+def test_diagnostics_are_opt_in(make_args):
+    propagator = make_propagator_r(make_args(), n_z=10)
+    propagator.propagate()
+
+    columns, states = read_columns(propagator)
+    assert columns == TRACK_COLUMNS and states.shape == (11, 4)
+
+
+def test_diagnostics_columns(make_args):
+    propagator = make_propagator_r(make_args(), n_z=10, diagnostics=True)
+    propagator.propagate()
+
+    columns, states = read_columns(propagator)
+    assert columns == TRACK_COLUMNS + ['power, W', 'radius, m', 'r_peak, m', 'i_axis, W / m^2', 'energy_error']
+    assert abs(states[:, -1]).max() < 1e-3  # power is conserved
+    assert states[0, 4] == pytest.approx(propagator.beam.p_0, rel=1e-2)
+
+
+def test_i_axis_is_normalized_as_i_max(make_args):
+    beam = make_beam_r(m=0, M=0, p_0_to_p_vortex=None, p_0_to_p_gauss=0.5)  # peak intensity is on the axis
+    propagator = make_propagator_r(make_args(), beam=beam, n_z=10, diagnostics=True)
+    propagator.propagate()
+
+    _, states = read_columns(propagator)
+    df = xlsx_to_df(propagator.logger.track_filename)
+    assert df['i_max_normalized'].iloc[-1] == pytest.approx(states[-1, 3] / 10**17, rel=1e-6)
+    assert df['i_axis_normalized'].iloc[-1] == pytest.approx(states[-1, 7] / 10**17, rel=1e-6)
+    assert df['i_axis_normalized'].iloc[-1] == pytest.approx(df['i_max_normalized'].iloc[-1], rel=1e-2)
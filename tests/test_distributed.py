@@ -0,0 +1,23 @@
+from numpy import abs as np_abs
+
+from core import FourierDiffractionExecutorXY, KerrExecutorXY, DistributedFourierDiffractionExecutorXY, \
+    DistributedKerrExecutorXY, SlabPool
+
+from conftest import make_beam_xy, make_propagator_xy
+
+
+def test_slab_pool_matches_single_process(make_args):
+    reference = make_beam_xy()
+    make_propagator_xy(make_args('reference'), reference, FourierDiffractionExecutorXY(beam=reference),
+                       KerrExecutorXY(beam=reference)).propagate()
+
+    beam = make_beam_xy()
+    with SlabPool(beam=beam, n_workers=2) as pool:
+        propagator = make_propagator_xy(make_args('distributed'), beam,
+                                        DistributedFourierDiffractionExecutorXY(beam=beam, pool=pool),
+                                        DistributedKerrExecutorXY(beam=beam, pool=pool))
+        propagator.propagate()
+        field = beam._field.copy()
+
+    assert np_abs(field - reference._field).max() <= 1e-4 * np_abs(reference._field).max()
+    assert abs(beam.i_max / reference.i_max - 1) < 1e-4
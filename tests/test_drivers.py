@@ -0,0 +1,37 @@
+from numpy import array_equal
+import pytest
+
+from core import ThresholdEvent
+
+from conftest import make_beam_r, make_propagator_r
+
+
+def run(args, compiled_steps, precision='mixed', **kwargs):
+    beam = make_beam_r(precision=precision)
+    propagator = make_propagator_r(args, beam=beam, compiled_steps=compiled_steps, **kwargs)
+    views = list(propagator.iter_steps())
+    return views[-1], propagator
+
+
+@pytest.mark.parametrize('precision', ['single', 'mixed', 'double'])
+@pytest.mark.parametrize('kwargs', [{}, {'diagnostics': True}, {'nonlin_phase_max': 0.02}])
+def test_compiled_driver_matches_python_loop(make_args, precision, kwargs):
+    reference_view, reference = run(make_args('loop'), None, precision, **kwargs)
+    view, propagator = run(make_args('compiled'), 32, precision, **kwargs)
+
+    assert view.n_step == reference_view.n_step
+    assert view.states_columns == reference_view.states_columns
+    assert array_equal(view.states, reference_view.states)
+    assert array_equal(propagator.beam.field, reference.beam.field)
+
+
+def test_compiled_driver_stops_at_event(make_args):
+    def events():
+        return [ThresholdEvent(name='focus', quantity='i_max / i_0', threshold=0.8, action='stop')]
+
+    reference_view, reference = run(make_args('loop'), None, events=events(), diagnostics=True)
+    view, propagator = run(make_args('compiled'), 1000, events=events(), diagnostics=True)
+
+    assert reference.stop_reason == propagator.stop_reason == 'focus'
+    assert view.n_step == reference_view.n_step < 100
+    assert array_equal(view.states, reference_view.states)
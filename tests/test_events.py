@@ -0,0 +1,57 @@
+import pytest
+
+from core import ThresholdEvent, RelativeChangeEvent, StabilizationEvent
+
+from conftest import make_propagator_r
+
+
+def test_threshold_event_fires_beyond_threshold():
+    above = ThresholdEvent(quantity='i_max / i_0', threshold=1.5)
+    below = ThresholdEvent(quantity='i_max / i_0', threshold=1.5, direction='below')
+
+    assert not above.check({'i_max / i_0': 1.0}) and below.check({'i_max / i_0': 1.0})
+    assert above.check({'i_max / i_0': 2.0})
+    assert not above.check({'i_max / i_0': 3.0}) and not above.active  # fires once
+
+
+def test_event_reset_clears_state_of_run():
+    threshold = ThresholdEvent(quantity='power', threshold=1.0, once=True)
+    relative = RelativeChangeEvent(quantity='power', rel_change=0.1)
+    stabilization = StabilizationEvent(quantity='power', n_steps=2, rel_tol=1e-3)
+
+    for value in (2.0, 1.0, 1.0, 1.0):
+        threshold.check({'power': value}), relative.check({'power': value}), stabilization.check({'power': value})
+    for event in (threshold, relative, stabilization):
+        event.reset()
+
+    assert threshold.active
+    assert not relative.check({'power': 1.0})  # new initial value
+    assert not stabilization.check({'power': 1.0})  # history is empty
+
+
+def test_wrong_event_arguments():
+    with pytest.raises(Exception):
+        ThresholdEvent(quantity='i_max', threshold=1.0, action='explode')
+    with pytest.raises(Exception):
+        ThresholdEvent(quantity='i_max', threshold=1.0, direction='sideways')
+
+
+def test_stop_event_stops_run(make_args):
+    event = ThresholdEvent(quantity='i_max / i_0', threshold=0.5, action='stop', name='focus')
+    propagator = make_propagator_r(make_args(), events=[event])
+    propagator.propagate()
+
+    assert propagator.stop_reason == 'focus'
+    (n_step, z, name, action), = propagator.fired_events
+    assert name == 'focus' and action == 'stop' and n_step < propagator.n_z
+    assert z == propagator.z
+
+
+def test_events_are_reused_by_runs(make_args):
+    event = ThresholdEvent(quantity='i_max / i_0', threshold=0.5, action='stop', name='focus')
+    first = make_propagator_r(make_args('first'), events=[event])
+    first.propagate()
+    second = make_propagator_r(make_args('second'), events=[event])
+    second.propagate()
+
+    assert second.stop_reason == 'focus' and second.fired_events == first.fired_events
@@ -0,0 +1,70 @@
+from numpy import asfortranarray, abs as np_abs, exp, log2
+from numpy.linalg import norm
+import pytest
+
+from core import FourierDiffractionExecutorXY, KerrExecutorXY, RK4IPIntegrator
+
+from conftest import make_beam_xy, make_propagator_xy
+
+
+def make_beam():
+    return make_beam_xy(p_0_to_p_vortex=None, p_0_to_p_gauss=3, m=0, M=0, radii_in_grid=8, n_x=64, n_y=64)
+
+
+def propagate(args, rk4ip, n_z, length):
+    beam = make_beam()
+    diffraction, kerr_effect = FourierDiffractionExecutorXY(beam=beam, n_jobs=1), KerrExecutorXY(beam=beam)
+    integrator = RK4IPIntegrator(beam=beam, diffraction=diffraction, kerr_effect=kerr_effect) if rk4ip else None
+    make_propagator_xy(args, beam, diffraction, kerr_effect, integrator=integrator, n_z=n_z, dz_0=length / n_z,
+                       const_dz=True).propagate()
+    return beam._field.astype(complex)
+
+
+def test_rk4ip_converges_faster_than_lie_splitting(make_args):
+    length = 0.05 * make_beam().z_diff
+    reference = propagate(make_args('reference'), True, 256, length)
+
+    errors = {}
+    for rk4ip in (False, True):
+        errors[rk4ip] = [norm(propagate(make_args(), rk4ip, n_z, length) - reference) / norm(reference)
+                         for n_z in (4, 8)]
+
+    lie_order, rk4ip_order = log2(errors[False][0] / errors[False][1]), log2(errors[True][0] / errors[True][1])
+    assert 0.7 < lie_order < 1.5
+    assert rk4ip_order > 3
+    assert errors[True][1] < 0.05 * errors[False][1]
+
+
+def test_adaptive_step_limit_is_taken_from_integrator(make_args):
+    beam = make_beam()
+    diffraction, kerr_effect = FourierDiffractionExecutorXY(beam=beam, n_jobs=1), KerrExecutorXY(beam=beam)
+    integrator = RK4IPIntegrator(beam=beam, diffraction=diffraction, kerr_effect=kerr_effect)
+    assert integrator.nonlin_phase_max > RK4IPIntegrator.__base__.NONLIN_PHASE_MAX
+
+    medium = beam.medium
+    dz_0 = 0.3 * medium.n_0 / (medium.k_0 * medium.n_2 * beam.i_max)  # the first step is too long
+    propagator = make_propagator_xy(make_args(), beam, diffraction, kerr_effect, integrator=integrator, n_z=3,
+                                    dz_0=dz_0)
+    steps = list(propagator.iter_steps())
+    phase = medium.k_0 * medium.n_2 * steps[1].state['i_max'] * steps[1].dz / medium.n_0
+    assert phase == pytest.approx(0.8 * integrator.nonlin_phase_max, rel=1e-6)
+
+
+class NoDiffraction:
+    """Diffraction object with L = 0 which keeps the field array of the beam as it is"""
+
+    def process_diffraction(self, dz):
+        pass
+
+
+def test_rk4ip_writes_to_not_contiguous_field():
+    beam = make_beam()
+    beam._field = asfortranarray(beam._field)
+    field, kerr_effect = beam._field.copy(), KerrExecutorXY(beam=beam)
+    dz = 0.01 * beam.z_diff
+
+    RK4IPIntegrator(beam=beam, diffraction=NoDiffraction(), kerr_effect=kerr_effect).process_step(dz)
+
+    # without diffraction the step is the Kerr phase shift
+    exact = field * exp(kerr_effect.nonlin_phase_const * dz * np_abs(field)**2)
+    assert np_abs(beam._field - exact).max() <= 1e-5 * np_abs(exact).max()
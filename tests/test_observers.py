@@ -0,0 +1,34 @@
+import pytest
+
+from core.observers import BeamView, StepView
+
+from conftest import make_beam_r, make_propagator_r
+
+
+def test_beam_view_returns_read_only_arrays():
+    beam = make_beam_r()
+    view = BeamView(beam)
+
+    for arr in (view.field, view.intensity, view._field, view.full_field(), view.full_intensity(),
+                view._field_to_intensity(beam.field)):
+        with pytest.raises(ValueError):
+            arr[0] = 0
+
+    assert view.reduced_quantities() == beam.reduced_quantities()
+
+
+def test_beam_view_rejects_mutating_methods():
+    view = BeamView(make_beam_r())
+
+    for name in ('update_intensity', '_update_intensity', '_chunk_maxima'):
+        with pytest.raises(Exception, match='Wrong method'):
+            getattr(view, name)
+
+
+def test_step_view_field_is_field_of_beam(make_args):
+    propagator = make_propagator_r(make_args(), n_z=3)
+
+    for view in propagator.iter_steps():
+        assert isinstance(view, StepView)
+        assert (view.field == propagator.beam.field).all()
+        assert not view.field.flags.writeable
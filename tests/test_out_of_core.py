@@ -0,0 +1,24 @@
+from numpy import abs as np_abs, array
+import pytest
+
+from core import FourierDiffractionExecutorXY, KerrExecutorXY, OutOfCoreFourierDiffractionExecutorXY, \
+    OutOfCoreKerrExecutorXY
+
+from conftest import make_beam_xy, make_propagator_xy
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_out_of_core_matches_in_memory(make_args, tmp_path, prefetch):
+    reference = make_beam_xy()
+    make_propagator_xy(make_args('reference'), reference, FourierDiffractionExecutorXY(beam=reference),
+                       KerrExecutorXY(beam=reference)).propagate()
+
+    # tiles of 20 rows or columns do not divide the grid 128 x 96, so the last tiles are partial
+    beam = make_beam_xy(memmap_dir=str(tmp_path / 'memmap'), n_tile=20, prefetch=prefetch)
+    with beam.slab_pool:
+        make_propagator_xy(make_args('out_of_core'), beam, OutOfCoreFourierDiffractionExecutorXY(beam=beam),
+                           OutOfCoreKerrExecutorXY(beam=beam)).propagate()
+        field = array(beam.field)
+
+    assert np_abs(field - reference.field).max() <= 1e-4 * np_abs(reference.field).max()
+    assert abs(beam.i_max / reference.i_max - 1) < 1e-4
@@ -0,0 +1,31 @@
+from numpy import abs as np_abs, complex64, complex128
+import pytest
+
+from core import FourierDiffractionExecutorXY, KerrExecutorXY
+
+from conftest import make_beam_r, make_propagator_r, make_beam_xy, make_propagator_xy
+
+
+def propagate_r(args, precision):
+    beam = make_beam_r(p_0_to_p_vortex=2, precision=precision)
+    make_propagator_r(args, beam=beam, const_dz=True).propagate()
+    return beam
+
+
+def propagate_xy(args, precision):
+    beam = make_beam_xy(p_0_to_p_vortex=2, precision=precision)
+    make_propagator_xy(args, beam, FourierDiffractionExecutorXY(beam=beam), KerrExecutorXY(beam=beam),
+                       const_dz=True).propagate()
+    return beam
+
+
+@pytest.mark.parametrize('propagate', [propagate_r, propagate_xy])
+@pytest.mark.parametrize('precision, dtype, tolerance', [('single', complex64, 1e-3), ('mixed', complex64, 1e-4)])
+def test_precision_matches_double(make_args, propagate, precision, dtype, tolerance):
+    reference = propagate(make_args('double'), 'double')
+    beam = propagate(make_args(precision), precision)
+
+    assert reference.field.dtype == complex128
+    assert beam.field.dtype == dtype
+    assert np_abs(beam.field - reference.field).max() <= tolerance * np_abs(reference.field).max()
+    assert abs(beam.i_max / reference.i_max - 1) < tolerance
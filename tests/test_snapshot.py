@@ -0,0 +1,88 @@
+import struct
+
+from numpy import abs as np_abs, angle, array_equal, complex64, minimum, pi
+import pytest
+
+from core import BeamXY, BeamRT, SnapshotWriter, SnapshotReader
+
+from conftest import make_beam_r
+
+
+def make_beam_xy():
+    return BeamXY(medium='SiO2', p_0_to_p_vortex=5, m=1, M=1, lmbda=800e-9, x_0=100e-6, y_0=100e-6,
+                  radii_in_grid=10, n_x=128, n_y=128)
+
+
+def write_archive(path, beam, steps=(0, 5, 10), **kwargs):
+    writer = SnapshotWriter(beam=beam, **kwargs)
+    writer.open(path)
+    for step in steps:
+        writer.write(beam, z=step * 1e-5, step=step)
+    writer.close()
+    return writer
+
+
+@pytest.mark.parametrize('make_beam', [make_beam_r, make_beam_xy])
+def test_round_trip(tmp_path, make_beam):
+    beam = make_beam()
+    path = str(tmp_path / 'beam.vsnap')
+    write_archive(path, beam, quantities=('intensity', 'phase', 'field'))
+
+    with SnapshotReader(path=path) as reader:
+        assert len(reader) == 3 and reader.steps == [0, 5, 10] and reader.z(5) == pytest.approx(5e-5)
+        assert reader.header['beam'] == beam.info
+        field = beam.full_field()
+        assert array_equal(reader.read('field', step=5), field.astype(complex64))
+
+        intensity = reader.read('intensity', z=4.9e-5)  # the nearest step is 5
+        reference = beam._field_to_intensity(field)
+        assert np_abs(intensity - reference).max() <= 1e-3 * reference.max()
+
+        phase_error = (reader.read('phase', step=0) - angle(field)) % (2 * pi)
+        phase_error = minimum(phase_error, 2 * pi - phase_error)[np_abs(field) > 1e-3 * np_abs(field).max()]
+        assert phase_error.max() <= 2 * pi / 2**8
+
+
+@pytest.mark.parametrize('make_beam, region', [(make_beam_r, (slice(40, 90, 3),)),
+                                               (make_beam_xy, (slice(30, 70), slice(10, 20)))])
+def test_region_is_read_by_chunks(tmp_path, monkeypatch, make_beam, region):
+    beam = make_beam()
+    path = str(tmp_path / 'beam.vsnap')
+    write_archive(path, beam, quantities=('field',), chunk_size=16 * 128 if beam.info == 'beam_xy' else 32)
+
+    decompress = SnapshotWriter.CODECS['zlib'][1]
+    n_calls = []
+    monkeypatch.setitem(SnapshotWriter.CODECS, 'zlib', (SnapshotWriter.CODECS['zlib'][0],
+                                                        lambda data: n_calls.append(1) or decompress(data)))
+    with SnapshotReader(path=path) as reader:
+        whole = reader.read('field', step=10)
+        n_whole = len(n_calls)
+        part = reader.read('field', step=10, region=region)
+
+    assert array_equal(part, whole[region])
+    assert 1 < n_whole and len(n_calls) - n_whole < n_whole  # only chunks which overlap the region
+
+
+def test_unclosed_archive_is_indexed(tmp_path):
+    beam = make_beam_r()
+    path = str(tmp_path / 'beam.vsnap')
+    write_archive(path, beam, steps=(0, 1))
+
+    # the index and the footer are written by close, drop them as in interrupted calculations
+    with open(path, 'rb') as f:
+        data = f.read()
+    index_offset, _ = struct.unpack('<QQ', data[-struct.calcsize('<QQ') - len(SnapshotWriter.MAGIC):
+                                              -len(SnapshotWriter.MAGIC)])
+    with open(path, 'wb') as f:
+        f.write(data[:index_offset])
+
+    with SnapshotReader(path=path) as reader:
+        assert reader.steps == [0, 1]
+        assert reader.read('intensity', step=1).shape == (beam.n_r,)
+
+
+def test_time_resolved_beams_are_rejected():
+    beam = BeamRT(medium='SiO2', p_0_to_p_vortex=5, m=1, M=1, lmbda=800e-9, r_0=100e-6, radii_in_grid=10, n_r=64,
+                  t_0=100e-15, n_t=32)
+    with pytest.raises(Exception, match='time-resolved'):
+        SnapshotWriter(beam=beam)
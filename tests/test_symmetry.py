@@ -0,0 +1,22 @@
+from numpy import abs as np_abs
+import pytest
+
+from core import FourierDiffractionExecutorXY, SymmetricFourierDiffractionExecutorXY, KerrExecutorXY
+
+from conftest import make_beam_xy, make_propagator_xy
+
+
+@pytest.mark.parametrize('M', [0, 1])
+def test_symmetric_beam_matches_full_grid(make_args, M):
+    reference = make_beam_xy(m=0, M=M, p_0_to_p_vortex=2)
+    make_propagator_xy(make_args('reference'), reference, FourierDiffractionExecutorXY(beam=reference),
+                       KerrExecutorXY(beam=reference)).propagate()
+
+    beam = make_beam_xy(m=0, M=M, p_0_to_p_vortex=2, symmetry='even')
+    make_propagator_xy(make_args('symmetric'), beam, SymmetricFourierDiffractionExecutorXY(beam=beam),
+                       KerrExecutorXY(beam=beam)).propagate()
+
+    assert beam.field.shape == (65, 49)
+    field = beam.full_field()
+    assert np_abs(field - reference.field).max() <= 1e-4 * np_abs(reference.field).max()
+    assert abs(beam.i_max / reference.i_max - 1) < 1e-4
@@ -0,0 +1,38 @@
+import numba
+
+from core import FourierDiffractionExecutorXY, KerrExecutorXY
+from core.threads import NumbaThreads
+
+from conftest import make_beam_xy, make_propagator_xy
+
+
+def test_executor_keeps_numba_threads_of_process():
+    n_threads = numba.get_num_threads()
+    diffraction = FourierDiffractionExecutorXY(beam=make_beam_xy(), n_jobs=1, numba_threads=1)
+
+    assert diffraction.numba_threads == 1
+    assert numba.get_num_threads() == n_threads
+
+
+def test_numba_threads_context_restores_setting():
+    n_threads = numba.get_num_threads()
+
+    with NumbaThreads(n_threads=1):
+        assert numba.get_num_threads() == 1
+    assert numba.get_num_threads() == n_threads
+
+    with NumbaThreads():
+        assert numba.get_num_threads() == n_threads
+    assert numba.get_num_threads() == n_threads
+
+
+def test_run_restores_numba_threads(make_args):
+    n_threads = numba.get_num_threads()
+    beam = make_beam_xy()
+    diffraction = FourierDiffractionExecutorXY(beam=beam, n_jobs=1, numba_threads=1)
+    propagator = make_propagator_xy(make_args(), beam, diffraction, KerrExecutorXY(beam=beam), n_z=2)
+
+    threads_of_steps = [numba.get_num_threads() for _ in propagator.iter_steps()]
+
+    assert threads_of_steps == [1] * 3
+    assert numba.get_num_threads() == n_threads
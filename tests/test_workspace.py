@@ -0,0 +1,21 @@
+from core.spectrum import SpectrumR
+
+from conftest import make_beam_r, make_propagator_r
+
+
+def test_steady_state_loop_does_not_allocate(make_args):
+    propagator = make_propagator_r(make_args('r'), n_z=20, monitor_allocations=True)
+    propagator.propagate()
+    assert propagator.allocation_monitor.n_calls > 0
+    assert propagator.allocation_monitor.n_large_allocations == 0
+
+
+def test_spectrum_r_updates_buffers_in_place():
+    spectrum = SpectrumR(beam=make_beam_r(n_r=64))
+    spectrum.update_data()
+    arrays = [spectrum.intensity_xy, spectrum.kerr_phase_xy, spectrum.phase_xy, spectrum.spectrum_intensity]
+    spectrum.update_data()
+
+    assert all(a is b for a, b in zip(arrays, [spectrum.intensity_xy, spectrum.kerr_phase_xy, spectrum.phase_xy,
+                                               spectrum.spectrum_intensity]))
+    assert spectrum.spectrum_intensity.argmax() // 128 in range(60, 68)  # zero frequency is in the center
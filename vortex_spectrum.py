@@ -1,117 +1,59 @@
 from matplotlib import pyplot as plt
 import matplotlib.gridspec as gridspec
 from matplotlib import cm
-import numpy as np
-from numpy import zeros, complex64, float64, exp, arctan2, pi, sqrt, log10, where
-from numpy.fft import fft2, fftshift
-from numba import jit
+from numpy import log10, where, maximum
 
+from core.spectrum import VortexSpectra
 
-class FFTVortex:
-    def __init__(self, **kwargs):
-        self.__n_perp = kwargs['n_perp']
-        self.__perp_max = kwargs['perp_max']
-        self.__d_perp = self.__perp_max / self.__n_perp
 
-        self.__m = kwargs['m']
-        self.__r_0 = kwargs['r_0']
+def crop_arr(arr, remaining_central_part_coeff):
+    """
+    :param remaining_central_part_coeff: 0 -> no points, 0.5 -> central half number of points, 1.0 -> all points
+    :return:
+    """
 
-        self.__kerr_coeff = kwargs['kerr_coeff']
+    if remaining_central_part_coeff < 0 or remaining_central_part_coeff > 1:
+        raise Exception('Wrong remaining_central part_coeff!')
 
-        self.__arr = zeros((self.__n_perp, self.__n_perp), dtype=complex64)
-        self.__arr_norm = zeros((self.__n_perp, self.__n_perp), dtype=float64)
-        self.__arr_norm_cropped = None
+    N = arr.shape[0]
+    delta = int(remaining_central_part_coeff / 2 * N)
+    i_min, i_max = N // 2 - delta, N // 2 + delta
 
-        self.__spectrum = zeros((self.__n_perp, self.__n_perp), dtype=complex64)
-        self.__spectrum_norm = zeros((self.__n_perp, self.__n_perp), dtype=float64)
-        self.__spectrum_norm_cropped = None
+    return arr[i_min:i_max, i_min:i_max]
 
-    @staticmethod
-    @jit(nopython=True)
-    def __initialize_arr(arr, perp_max, d_perp, r_0, m, kerr_coeff):
-        N, M = arr.shape[0], arr.shape[1]
-        for i in range(N):
-            for j in range(M):
-                x, y = d_perp * i - 0.5 * perp_max, d_perp * j - 0.5 * perp_max
-                r = sqrt(x**2 + y**2)
-                arr[i, j] = (r / r_0)**abs(m) * exp(-0.5 * (r / r_0)**2) * \
-                            exp(1j * m * (arctan2(x, y) + pi)) * \
-                            exp(1j * kerr_coeff * r**2)
 
-    @staticmethod
-    @jit(nopython=True)
-    def __normalize(arr):
-        N, M = arr.shape[0], arr.shape[1]
-        arr_norm = zeros((N, M), dtype=float64)
-        for i in range(N):
-            for j in range(M):
-                arr_norm[i, j] = arr[i, j].real**2 + arr[i, j].imag**2
+def log_arr(arr):
+    return where(arr < 0.1, -1, log10(maximum(arr, 0.1)))
 
-        return arr_norm
 
-    def __make_fft(self):
-        self.__spectrum = fft2(self.__arr)
-        self.__spectrum = fftshift(self.__spectrum, axes=(0, 1))
+def log_spectrum(arr):
+    return log10(maximum(arr / arr.max(), 1e-12))
 
-    def __crop_arr(self, arr, remaining_central_part_coeff):
-        """
-        :param remaining_central_part_coeff: 0 -> no points, 0.5 -> central half number of points, 1.0 -> all points
-        :return:
-        """
 
-        if remaining_central_part_coeff < 0 or remaining_central_part_coeff > 1:
-            raise Exception('Wrong remaining_central part_coeff!')
+def plot(intensity, spectrum, path):
+    fig = plt.figure(figsize=(15, 10), constrained_layout=True)
+    spec = gridspec.GridSpec(ncols=2, nrows=1, figure=fig)
+    ax1 = fig.add_subplot(spec[0, 0])
+    ax2 = fig.add_subplot(spec[0, 1])
 
-        N = arr.shape[0]
-        delta = int(remaining_central_part_coeff / 2 * N)
-        i_min, i_max = N // 2 - delta, N // 2 + delta
+    ax1.set_aspect('equal')
+    ax2.set_aspect('equal')
 
-        return arr[i_min:i_max, i_min:i_max]
+    ax1.set_title('$\\mathbf{I(x, y)}$')
+    ax2.set_title('$\\mathbf{S(k_x, k_y)}$')
 
-    @staticmethod
-    def __log_arr(arr):
-        return where(arr < 0.1, -1, log10(arr))
+    ax1.contourf(log_arr(crop_arr(intensity, 0.2)), cmap=cm.jet, levels=100)
+    ax2.contourf(log_spectrum(crop_arr(spectrum, 0.2)), cmap=cm.gray, levels=100)
 
-    @staticmethod
-    def __log_spectrum(arr):
-        return log10(arr / np.max(arr))
+    plt.savefig(path, bbox_inches='tight')
+    plt.close()
 
-    def __plot(self):
 
-        fig = plt.figure(figsize=(15, 10), constrained_layout=True)
-        spec = gridspec.GridSpec(ncols=2, nrows=1, figure=fig)
-        ax1 = fig.add_subplot(spec[0, 0])
-        ax2 = fig.add_subplot(spec[0, 1])
+if __name__ == '__main__':
+    m, r_0, kerr_coeff = 1, 15 * 10**-6, 10**5
 
-        ax1.set_aspect('equal')
-        ax2.set_aspect('equal')
+    vortex_spectra = VortexSpectra(n_perp=1024, perp_max=1000 * 10**-6, batch_size=1)
+    field = vortex_spectra.field(m, r_0, kerr_coeff)
+    spectrum = vortex_spectra.compute([(m, r_0, kerr_coeff)])['spectra'][0]
 
-        ax1.set_title('$\mathbf{I(x, y)}$')
-        ax2.set_title('$\mathbf{S(k_x, k_y)}$')
-
-        arr_for_plot = self.__log_arr(self.__crop_arr(self.__arr_norm, 0.2))
-        spectrum_for_plot = self.__log_arr(self.__crop_arr(self.__arr_norm, 0.2))
-
-        ax1.contourf(arr_for_plot, cmap=cm.jet, levels=100)
-        ax2.contourf(spectrum_for_plot, cmap=cm.gray, levels=100)
-
-        plt.savefig('fft_vortex.png', bbox_inches='tight')
-        plt.close()
-
-    def process(self):
-        self.__initialize_arr(self.__arr, self.__perp_max, self.__d_perp, self.__r_0, self.__m, self.__kerr_coeff)
-        self.__arr_norm = self.__normalize(self.__arr)
-
-        self.__make_fft()
-        self.__spectrum_norm = self.__normalize(self.__spectrum)
-
-        self.__plot()
-
-
-fft_vortex = FFTVortex(n_perp=1024,
-                       perp_max=1000 * 10**-6,
-                       m=1,
-                       r_0=15 * 10**-6,
-                       kerr_coeff=10**5)
-
-fft_vortex.process()
\ No newline at end of file
+    plot(field.real**2 + field.imag**2, spectrum, 'fft_vortex.png')